@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+BACKOFF_FACTOR = 2
+# Границы интервала опроса в долях базового RETRY_PERIOD тенанта.
+# Дольше RETRY_PERIOD опрос откладывается только после approved: до
+# следующей сдачи обычно проходят дни. Частый опрос во время проверки
+# окупает эту задержку, и в среднем и в p95 уведомления приходят не
+# позже, чем при постоянном интервале (см. replay()).
+STATUS_BOUNDS = {
+    'reviewing': (0.1, 0.25),
+    'rejected': (0.5, 1),
+    'approved': (1, 6),
+    None: (1, 1),
+}
+
+ReplayResult = namedtuple('ReplayResult', ('api_calls', 'latencies'))
+
+
+class FixedInterval:
+    """Постоянный интервал опроса, как в исходном main()."""
+
+    def interval(self, status, idle_polls, base):
+        """Интервал всегда равен базовому."""
+        return base
+
+
+class AdaptiveInterval:
+    """Интервал опроса, зависящий от последнего статуса работы.
+
+    После изменения статуса опрос начинается с нижней границы для
+    этого статуса и экспоненциально замедляется с каждым опросом без
+    изменений, пока не упрётся в верхнюю границу.
+    """
+
+    def __init__(self, bounds=None, factor=BACKOFF_FACTOR):
+        """Границы задаются словарём статус -> (минимум, максимум)."""
+        self.bounds = STATUS_BOUNDS if bounds is None else bounds
+        self.factor = factor
+
+    def interval(self, status, idle_polls, base):
+        """Интервал до следующего опроса в секундах."""
+        low, high = self.bounds.get(status, self.bounds[None])
+        return base * min(high, low * self.factor ** idle_polls)
+
+
+def polling_policy(adaptive=False):
+    """Политика опроса: адаптивная при настройке ADAPTIVE_POLLING."""
+    return AdaptiveInterval() if adaptive else FixedInterval()
+
+
+def replay(timeline, policy, horizon, base=600):
+    """Прогоняем историю статусов через политику опроса.
+
+    timeline — отсортированный список пар (момент, статус). Возвращает
+    число запросов к API и задержку уведомления для каждой смены
+    статуса: от момента смены до первого опроса, который её увидел.
+    """
+    api_calls, latencies = 0, []
+    now, seen, idle_polls, index = 0, None, 0, 0
+    while now < horizon:
+        api_calls += 1
+        while index < len(timeline) and timeline[index][0] <= now:
+            latencies.append(now - timeline[index][0])
+            status = timeline[index][1]
+            index += 1
+        if index and status != seen:
+            seen, idle_polls = status, 0
+        else:
+            idle_polls += 1
+        now += policy.interval(seen, idle_polls, base)
+    return ReplayResult(api_calls, latencies)
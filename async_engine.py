@@ -0,0 +1,351 @@
+import asyncio
+import logging
+import random
+import signal
+import time
+from http import HTTPStatus
+
+import aiohttp
+import telegram
+
+import homework
+from adaptive import FixedInterval, polling_policy
+from api_client import CONNECT_TIMEOUT, READ_TIMEOUT
+from commands import chat_states
+from exceptions import (CircuitOpen, RequestError, ShutdownRequested,
+                        WrongStatusCode)
+from health import DELIVERY, HEALTH
+from logs import register_logger
+from metrics import (API_ERRORS, API_LATENCY, LOOP_LAG, TELEGRAM_FAILURES,
+                     TELEGRAM_LATENCY, api_response)
+from retry import AsyncRetryPolicy, parse_retry_after
+from scheduler import next_deadline
+from state_store import (MemoryStateStore, checkpoint_state,
+                         open_state_store, restore_state)
+from tenants import load_tenants
+from validation import loads
+
+logger = logging.getLogger(__name__)
+register_logger(logger)
+
+TELEGRAM_DEFAULT_URL = 'https://api.telegram.org/bot'
+API_CONCURRENCY = 100
+TELEGRAM_CONCURRENCY = 30
+
+api_retry = AsyncRetryPolicy((RequestError, WrongStatusCode),
+                             listener=homework.retry_scheduled)
+telegram_retry = AsyncRetryPolicy(
+    (RequestError, WrongStatusCode), max_attempts=3, max_delay=10,
+    max_elapsed=30, listener=homework.delivery_retry_scheduled,
+)
+
+
+async def async_get_api_answer(session, timestamp, headers=None, cache=None):
+    """Асинхронно запрашиваем API Практикума, повторяя временные сбои.
+
+    Повторы идут по политике api_retry, как в request_api_answer.
+    """
+    return await api_retry.call(async_fetch_api_answer, session, timestamp,
+                                headers, cache)
+
+
+async def async_fetch_api_answer(session, timestamp, headers=None,
+                                 cache=None):
+    """Один асинхронный запрос к API Практикума."""
+    if not homework.api_breaker.allow():
+        raise CircuitOpen('API Практикума недоступен, опрос приостановлен')
+    logger.debug('Запрашиваем информацию по API')
+    headers = homework.HEADERS if headers is None else headers
+    if cache is not None:
+        headers = cache.conditional_headers(headers)
+    started = time.perf_counter()
+    try:
+        async with session.get(
+            homework.ENDPOINT,
+            headers=headers,
+            params={'from_date': timestamp},
+        ) as response:
+            api_response(response.status).inc()
+            homework.record_api_status(response.status)
+            if (cache is not None
+                    and response.status == HTTPStatus.NOT_MODIFIED):
+                logger.debug('Ответ API не изменился')
+                return {'homeworks': [], 'current_date': timestamp}
+            if response.status != HTTPStatus.OK:
+                raise WrongStatusCode(
+                    f'Ошибка {response.status} '
+                    'при получении ответа от API Практикума',
+                    response.status,
+                    parse_retry_after(response.headers.get('Retry-After')),
+                )
+            body = await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        API_ERRORS.inc()
+        homework.api_breaker.record_failure()
+        raise RequestError('Ошибка запроса к API Практикума')
+    finally:
+        API_LATENCY.observe(time.perf_counter() - started)
+    if cache is not None:
+        current_date = cache.unchanged(response.headers, body)
+        if current_date is not None:
+            logger.debug('Ответ API не изменился')
+            return {'homeworks': [], 'current_date': current_date}
+    logger.debug('Ответ от API получен')
+    return loads(body)
+
+
+async def telegram_retry_after(response):
+    """Пауза, которую просит выдержать Telegram в ответе 429.
+
+    Bot API передаёт её в поле parameters.retry_after тела ответа.
+    """
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    if (retry_after is not None
+            or response.status != HTTPStatus.TOO_MANY_REQUESTS):
+        return retry_after
+    try:
+        return float(loads(await response.read())['parameters']
+                     ['retry_after'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def telegram_api_url(token):
+    """Адрес sendMessage с учётом текущего TELEGRAM_BASE_URL.
+
+    Адрес собирается при каждой отправке, поэтому TELEGRAM_BASE_URL из
+    .env, файла настроек и перезагрузки действует так же, как в
+    синхронном боте.
+    """
+    base_url = homework.TELEGRAM_BASE_URL or TELEGRAM_DEFAULT_URL
+    return f'{base_url}{token}/sendMessage'
+
+
+async def async_post_message(session, token, chat_id, message):
+    """Одна попытка отправить сообщение в Telegram."""
+    try:
+        async with session.post(
+            telegram_api_url(token),
+            json={'chat_id': chat_id, 'text': message},
+        ) as response:
+            if response.status != HTTPStatus.OK:
+                raise WrongStatusCode(
+                    f'Ошибка {response.status} от Telegram',
+                    response.status, await telegram_retry_after(response),
+                )
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        raise RequestError('Ошибка запроса к Telegram')
+
+
+async def async_send_message(session, token, chat_id, message):
+    """Асинхронная отправка сообщения в Telegram.
+
+    Сетевые сбои, 429 и 5xx повторяются по политике telegram_retry
+    с учётом retry_after, как в send_chat_message.
+    """
+    started = time.perf_counter()
+    try:
+        logger.debug('Пытаемся отправить сообщение: %s', message,
+                     extra={'tenant': chat_id})
+        await telegram_retry.call(async_post_message, session, token,
+                                  chat_id, message)
+    except ShutdownRequested:
+        logger.warning('Отправка прервана остановкой: %s', message,
+                       extra={'tenant': chat_id})
+        raise
+    except Exception:
+        TELEGRAM_FAILURES.inc()
+        logger.error('Отправка сообщения не удалась: %s', message,
+                     extra={'tenant': chat_id})
+    else:
+        HEALTH.success(DELIVERY)
+        logger.debug('Сообщение отправлено успешно: %s', message,
+                     extra={'tenant': chat_id})
+    finally:
+        TELEGRAM_LATENCY.observe(time.perf_counter() - started)
+
+
+class AsyncPollingEngine:
+    """Асинхронный опрос подписок с ограничением параллельности.
+
+    Каждый тенант опрашивается своей корутиной, а семафоры ограничивают
+    число одновременных запросов к Практикуму и отправок в Telegram.
+    """
+
+    def __init__(self, session, token, tenants,
+                 retry_period=None, api_concurrency=API_CONCURRENCY,
+                 telegram_concurrency=TELEGRAM_CONCURRENCY,
+                 clock=time.time, sleep=asyncio.sleep, rng=None,
+                 policy=None, store=None, history=None):
+        """Готовим состояние, фазы опроса и семафоры."""
+        self.session = session
+        self.token = token
+        self.tenants = dict(tenants)
+        self.retry_period = retry_period
+        self.clock = clock
+        self.sleep = sleep
+        self.stopped = asyncio.Event()
+        self.sleeping = set()
+        self.policy = policy or FixedInterval()
+        self.store = store or MemoryStateStore()
+        self.api_semaphore = asyncio.Semaphore(api_concurrency)
+        self.telegram_semaphore = asyncio.Semaphore(telegram_concurrency)
+        rng = rng or random.Random()
+        now = clock()
+        self.configs = {
+            tenant.key: homework.settings.for_tenant(
+                retry_period=tenant.retry_period or retry_period
+            )
+            for tenant in self.tenants.values()
+        }
+        self.states = {
+            key: restore_state(
+                self.store, key, now,
+                now + rng.uniform(0, self.period(tenant)), history
+            )
+            for key, tenant in self.tenants.items()
+        }
+
+    def period(self, tenant):
+        """Интервал опроса тенанта."""
+        return self.configs[tenant.key].retry_period
+
+    def next_period(self, tenant, state):
+        """Интервал до следующего опроса по политике опроса."""
+        return self.policy.interval(state.status, state.idle_polls,
+                                    self.period(tenant))
+
+    async def notify(self, tenant, message):
+        """Отправляем сообщение в чат тенанта."""
+        async with self.telegram_semaphore:
+            await async_send_message(self.session, self.token,
+                                     tenant.chat_id, message)
+
+    async def poll(self, tenant, state):
+        """Один цикл опроса API для тенанта."""
+        if state.paused:
+            logger.debug('Опрос для чата %s приостановлен.', tenant.chat_id,
+                         extra={'tenant': tenant.key})
+            return
+        try:
+            async with self.api_semaphore:
+                response = await async_get_api_answer(
+                    self.session, state.timestamp, tenant.headers,
+                    state.response_cache
+                )
+            homeworks, state.timestamp = homework.check_response(response)
+            messages = homework.parse_changes(state, homeworks)
+            if not messages:
+                logger.debug('Статус без изменений.')
+            for message in messages + homework.clear_errors(state):
+                await self.notify(tenant, message)
+        except Exception as error:
+            logger.error('Сбой опроса для чата %s: %s', tenant.chat_id, error,
+                         extra={'tenant': tenant.key})
+            message = homework.error_message(state, error)
+            if message:
+                await self.notify(tenant, message)
+        finally:
+            checkpoint_state(self.store, tenant.key, state)
+
+    async def wait(self, delay):
+        """Пауза до опроса или повтора; False, если её прервал stop()."""
+        task = asyncio.current_task()
+        self.sleeping.add(task)
+        try:
+            await self.sleep(delay)
+        except asyncio.CancelledError:
+            if not self.stopped.is_set():
+                raise
+        finally:
+            self.sleeping.discard(task)
+        return not self.stopped.is_set()
+
+    def stop(self):
+        """Останавливаем опрос: начатые запросы доводятся до конца.
+
+        Прерываются и паузы до опроса, и паузы перед повтором запроса
+        или отправки: после остановки повторов нет.
+        """
+        self.stopped.set()
+        for task in self.sleeping:
+            task.cancel()
+
+    async def run_tenant(self, key):
+        """Цикл опроса одного тенанта по дедлайнам до вызова stop()."""
+        tenant, state = self.tenants[key], self.states[key]
+        while not self.stopped.is_set():
+            if not await self.wait(max(0.0, state.next_poll - self.clock())):
+                return
+            LOOP_LAG.observe(max(0.0, self.clock() - state.next_poll))
+            homework.sync_config()
+            try:
+                await self.poll(tenant, state)
+            except ShutdownRequested:
+                return
+            self.store.maybe_flush()
+            state.next_poll = next_deadline(
+                state.next_poll, self.next_period(tenant, state),
+                self.clock()
+            )
+            HEALTH.beat(self.next_wake() - self.clock())
+
+    def next_wake(self):
+        """Ближайший срок опроса среди всех тенантов.
+
+        Срок тенанта, чей опрос ещё идёт, уже наступил, поэтому
+        зависший запрос делает цикл просроченным.
+        """
+        return min(state.next_poll for state in self.states.values())
+
+    async def run_forever(self):
+        """Запускаем корутины опроса всех тенантов.
+
+        Паузы перед повторами запросов и отправок идут через wait(),
+        поэтому stop() прерывает и их.
+        """
+        for policy in (api_retry, telegram_retry):
+            policy.stop_on(self.stopped, self.wait)
+        await asyncio.gather(*(self.run_tenant(key) for key in self.tenants))
+
+
+async def serve(tenants_path):
+    """Создаём HTTP-сессию и опрашиваем подписки из реестра."""
+    tenants = load_tenants(tenants_path)
+    logger.debug('Загружено подписок: %d', len(tenants))
+    timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT,
+                                    sock_read=READ_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=API_CONCURRENCY)
+    async with aiohttp.ClientSession(timeout=timeout,
+                                     connector=connector) as session:
+        engine = AsyncPollingEngine(
+            session, homework.TELEGRAM_TOKEN, tenants,
+            policy=polling_policy(
+                homework.settings.current.adaptive_polling
+            ),
+            store=open_state_store(homework.STATE_PATH),
+            history=homework.history_log,
+        )
+        homework.start_services(
+            homework.configure_bot(
+                telegram.Bot(token=homework.TELEGRAM_TOKEN)
+            ),
+            chat_states(engine.tenants, engine.states),
+        )
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, engine.stop)
+        try:
+            await engine.run_forever()
+        finally:
+            engine.store.close()
+
+
+def main():
+    """Запуск асинхронного опроса всех подписок из TENANTS_PATH."""
+    asyncio.run(serve(homework.require_tenants()))
+
+
+if __name__ == '__main__':
+    homework.create_app()
+    main()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+FAILURE_THRESHOLD = 5
+PROBE_INTERVAL = 60
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    """Автоматический выключатель запросов к одному адресу.
+
+    После failure_threshold сбоев подряд выключатель размыкается, и
+    запросы не выполняются. Через reset_timeout один вызов становится
+    пробным: успех замыкает выключатель, сбой снова размыкает его на
+    reset_timeout. О каждой смене состояния сообщается listener.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=PROBE_INTERVAL, clock=time.monotonic,
+                 listener=None):
+        """Создаём замкнутый выключатель."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.listener = listener
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        old, self.state = self.state, state
+        if old != state and self.listener is not None:
+            self.listener(self, old, state)
+
+    def allow(self):
+        """Можно ли выполнить запрос сейчас.
+
+        В полуоткрытом состоянии разрешён только один пробный запрос
+        за reset_timeout, остальные вызовы получают отказ.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = self.clock()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            # Пробный запрос: следующий разрешим не раньше, чем через
+            # reset_timeout, даже если результат пробы не придёт.
+            self.opened_at = now
+            self._set_state(HALF_OPEN)
+            return True
+
+    def record_success(self):
+        """Запрос удался: замыкаем выключатель."""
+        with self._lock:
+            self.failures = 0
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        """Запрос не удался: размыкаем выключатель, если пора."""
+        with self._lock:
+            self.failures += 1
+            if (self.state == HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                self._set_state(OPEN)
+
+    def reset(self):
+        """Возвращаем выключатель в исходное замкнутое состояние."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = 0.0
+            self.state = CLOSED
+
+
+BREAKERS = {}
+
+
+def breaker_for(endpoint, **settings):
+    """Общий для всех тенантов выключатель адреса endpoint.
+
+    Порог сбоев и интервал проб задаются при первом обращении
+    к адресу, последующие вызовы возвращают тот же выключатель.
+    """
+    breaker = BREAKERS.get(endpoint)
+    if breaker is None:
+        breaker = BREAKERS.setdefault(
+            endpoint, CircuitBreaker(endpoint, **settings)
+        )
+    return breaker
@@ -0,0 +1,122 @@
+import time
+
+WEBHOOK_PORT = 8443
+COMMAND_WORKERS = 2
+HISTORY_LIMIT = 10
+TIME_FORMAT = '%d.%m.%Y %H:%M'
+
+
+def chat_states(tenants, states):
+    """Состояния опроса, сгруппированные по чатам тенантов."""
+    chats = {}
+    for key, tenant in tenants.items():
+        chats.setdefault(str(tenant.chat_id), []).append(states[key])
+    return chats
+
+
+class CommandService:
+    """Ответы на команды чата по уже известному состоянию опроса.
+
+    Команды не обращаются к API Практикума: статусы и история берутся
+    из TenantState, которые обновляет цикл опроса. Статусы выводятся
+    теми же словами verdicts, что и в уведомлениях. Пауза только
+    выставляет флаг, а цикл опроса пропускает тенанта, пока он стоит.
+    """
+
+    def __init__(self, chats, verdicts):
+        """Запоминаем состояния опроса по идентификатору чата."""
+        self.chats = chats
+        self.verdicts = verdicts
+
+    def states(self, chat_id):
+        """Состояния опроса тенантов чата."""
+        return self.chats.get(str(chat_id), [])
+
+    def verdict(self, status):
+        """Статус работы словами уведомления."""
+        return self.verdicts.get(status, status)
+
+    def status(self, chat_id):
+        """Последние известные статусы работ."""
+        states = self.states(chat_id)
+        if not states:
+            return 'Чат не подписан на уведомления.'
+        lines = []
+        for state in states:
+            checked = time.strftime(TIME_FORMAT,
+                                    time.localtime(state.timestamp))
+            paused = ', опрос на паузе' if state.paused else ''
+            lines.append(f'Проверено {checked}{paused}.')
+            # Имена работ, неизвестные индексу, берём из истории.
+            names = {key: name for _, key, name, _ in list(state.history)}
+            names.update(state.homeworks.names)
+            statuses = dict(state.homeworks.statuses)
+            lines.extend(f'{names.get(key, key)}: {self.verdict(status)}'
+                         for key, status in statuses.items())
+        return '\n'.join(lines)
+
+    def history(self, chat_id):
+        """Последние изменения статусов работ."""
+        changes = sorted(
+            change for state in self.states(chat_id)
+            for change in list(state.history)
+        )[-HISTORY_LIMIT:]
+        if not changes:
+            return 'Изменений статусов пока не было.'
+        return '\n'.join(
+            f'{time.strftime(TIME_FORMAT, time.localtime(moment))} '
+            f'{name}: {self.verdict(status)}'
+            for moment, _, name, status in changes
+        )
+
+    def pause(self, chat_id, paused=True):
+        """Приостанавливаем или возобновляем опрос для чата."""
+        states = self.states(chat_id)
+        if not states:
+            return 'Чат не подписан на уведомления.'
+        for state in states:
+            state.paused = paused
+        return 'Опрос приостановлен.' if paused else 'Опрос возобновлён.'
+
+    def resume(self, chat_id):
+        """Возобновляем опрос для чата."""
+        return self.pause(chat_id, paused=False)
+
+    def handler(self, command):
+        """Обработчик команды для диспетчера python-telegram-bot."""
+        from telegram.ext import CommandHandler
+
+        method = getattr(self, command)
+
+        def callback(update, context):
+            update.effective_message.reply_text(
+                method(update.effective_chat.id)
+            )
+        return CommandHandler(command, callback, run_async=True)
+
+    def register(self, dispatcher):
+        """Подключаем команды к диспетчеру."""
+        for command in ('status', 'history', 'pause', 'resume'):
+            dispatcher.add_handler(self.handler(command))
+
+
+def start_commands(bot, service, workers=COMMAND_WORKERS, webhook_url=None,
+                   webhook_port=WEBHOOK_PORT):
+    """Запускаем приём команд в отдельных потоках Updater.
+
+    Обновления получаются через webhook, если задан webhook_url, иначе
+    долгим опросом. Обработчики выполняются в пуле из workers потоков,
+    поэтому наплыв команд не задерживает цикл опроса API.
+    """
+    from telegram.ext import Updater
+
+    updater = Updater(bot=bot, workers=workers, use_context=True)
+    service.register(updater.dispatcher)
+    if webhook_url:
+        updater.start_webhook(listen='0.0.0.0', port=webhook_port,
+                              url_path=bot.token,
+                              webhook_url=f'{webhook_url}/{bot.token}',
+                              drop_pending_updates=True)
+    else:
+        updater.start_polling(drop_pending_updates=True)
+    return updater
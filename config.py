@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import signal
+import threading
+from dataclasses import dataclass, fields
+from typing import Optional
+
+from commands import WEBHOOK_PORT
+from health import STALE_FACTOR
+from logs import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLING, register_logger
+from shutdown import SHUTDOWN_TIMEOUT
+
+logger = logging.getLogger(__name__)
+register_logger(logger)
+
+RELOAD_INTERVAL = 5
+DEFAULT_ENDPOINT = (
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
+API_WORKERS = 32
+TELEGRAM_WORKERS = 4
+LEASES_PATH = 'leases.sqlite3'
+# Поля, для которых имя переменной окружения не совпадает с именем поля.
+ENV_NAMES = {'endpoint': 'PRACTICUM_ENDPOINT'}
+REQUIRED = ('practicum_token', 'telegram_token', 'telegram_chat_id')
+# С реестром подписок токены Практикума и чаты берутся из него.
+TENANTS_REQUIRED = ('telegram_token', 'tenants_path')
+# Поля, которые применяются между опросами; остальные — при запуске.
+RELOADABLE = ('practicum_token', 'telegram_chat_id', 'retry_period',
+              'endpoint', 'telegram_base_url')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def flag(value):
+    """Флаг из строки: выключен только явным 0, false, no или off."""
+    return value.strip().lower() not in FALSE_VALUES
+
+
+# Приведение значений из окружения к типам полей; строки как есть.
+CONVERTERS = {int: int, Optional[int]: int, float: float, bool: flag}
+
+
+def env_name(name):
+    """Имя переменной окружения для поля конфигурации."""
+    return ENV_NAMES.get(name, name.upper())
+
+
+@dataclass(frozen=True)
+class Config:
+    """Настройки бота и его точек входа.
+
+    Объект неизменяемый: перезагрузка создаёт новый Config, поэтому
+    опрос, уже взявший значения, доводится до конца со старыми. Поля
+    вне RELOADABLE читаются только при запуске.
+    """
+
+    practicum_token: Optional[str] = None
+    telegram_token: Optional[str] = None
+    telegram_chat_id: Optional[str] = None
+    retry_period: int = 600
+    endpoint: str = DEFAULT_ENDPOINT
+    telegram_base_url: Optional[str] = None
+    state_path: Optional[str] = None
+    history_path: Optional[str] = None
+    tenants_path: Optional[str] = None
+    adaptive_polling: bool = False
+    log_level: str = LOG_LEVEL
+    log_format: str = LOG_FORMAT
+    log_sampling: str = LOG_SAMPLING
+    metrics_port: Optional[int] = None
+    health_port: Optional[int] = None
+    health_stale_factor: float = STALE_FACTOR
+    telegram_commands: bool = False
+    webhook_url: Optional[str] = None
+    webhook_port: int = WEBHOOK_PORT
+    api_workers: int = API_WORKERS
+    telegram_workers: int = TELEGRAM_WORKERS
+    shard_workers: Optional[int] = None
+    shard_id: Optional[str] = None
+    leases_path: str = LEASES_PATH
+    shutdown_timeout: float = SHUTDOWN_TIMEOUT
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API Практикума."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+    def problems(self):
+        """Список ошибок конфигурации; пустой, если всё в порядке.
+
+        Если задан TENANTS_PATH, обязательны только токен Telegram и
+        путь к реестру: остальное задаётся для каждой подписки.
+        """
+        required = TENANTS_REQUIRED if self.tenants_path else REQUIRED
+        errors = [f'не задан {env_name(name)}' for name in required
+                  if not getattr(self, name)]
+        if self.retry_period <= 0:
+            errors.append('RETRY_PERIOD должен быть положительным')
+        return errors
+
+    @classmethod
+    def from_mapping(cls, values):
+        """Config из словаря в формате переменных окружения.
+
+        Отсутствующие и пустые значения заменяются значениями по
+        умолчанию, остальные приводятся к типу поля. Для значения,
+        которое не приводится, выбрасывается ValueError с именем
+        переменной.
+        """
+        settings = {}
+        for field in fields(cls):
+            name = env_name(field.name)
+            value = values.get(name)
+            if value in (None, ''):
+                continue
+            try:
+                settings[field.name] = CONVERTERS.get(field.type, str)(value)
+            except ValueError:
+                raise ValueError(f'некорректное значение {name}: {value!r}')
+        return cls(**settings)
+
+    def restart_required(self, other):
+        """Имена переменных, изменения которых применятся при запуске."""
+        return [env_name(field.name) for field in fields(self)
+                if field.name not in RELOADABLE
+                and getattr(self, field.name) != getattr(other, field.name)]
+
+
+def read_config_file(path):
+    """Настройки из JSON-файла в формате переменных окружения."""
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, dict):
+        raise TypeError('Файл настроек должен содержать объект JSON')
+    return {key: str(value) for key, value in data.items()
+            if value is not None}
+
+
+def load_config(environ, path=None):
+    """Config из переменных окружения и файла настроек path.
+
+    Значения из файла имеют приоритет: файл можно поменять без
+    перезапуска процесса, а окружение — нет.
+    """
+    values = dict(environ)
+    if path:
+        values.update(read_config_file(path))
+    return Config.from_mapping(values)
+
+
+class TenantConfig:
+    """Настройки тенанта: свои значения поверх общей конфигурации.
+
+    Хранятся только переопределённые поля, остальные читаются из
+    текущего Config менеджера, поэтому перезагрузка общей конфигурации
+    сразу видна всем тенантам без копирования.
+    """
+
+    __slots__ = ('manager', 'overrides')
+
+    def __init__(self, manager, **overrides):
+        """Запоминаем менеджер и заданные значения."""
+        self.manager = manager
+        self.overrides = {name: value for name, value in overrides.items()
+                          if value is not None}
+
+    def __getattr__(self, name):
+        """Переопределённое значение или значение общей конфигурации."""
+        if name in self.overrides:
+            return self.overrides[name]
+        return getattr(self.manager.current, name)
+
+
+class ConfigManager:
+    """Текущая конфигурация и её перезагрузка без перезапуска.
+
+    Перезагрузка запускается сигналом SIGHUP или изменением файла
+    настроек и выполняется в отдельном потоке. Новый Config подменяет
+    current одним присваиванием и только если прошёл проверку; при
+    ошибке остаётся прежняя конфигурация.
+    """
+
+    def __init__(self, loader, path=None, interval=RELOAD_INTERVAL):
+        """Загружаем конфигурацию функцией loader без аргументов."""
+        self.loader = loader
+        self.path = path
+        self.interval = interval
+        self.requested = threading.Event()
+        self.stopped = False
+        self.thread = None
+        self.mtime = self.stat()
+        self.current = loader()
+
+    def stat(self):
+        """Время изменения файла настроек или None."""
+        if not self.path:
+            return None
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def for_tenant(self, **overrides):
+        """Настройки тенанта поверх текущей конфигурации."""
+        return TenantConfig(self, **overrides)
+
+    def reload(self):
+        """Перечитываем конфигурацию; возвращаем True, если она сменилась."""
+        try:
+            config = self.loader()
+        except (OSError, TypeError, ValueError) as error:
+            logger.error('Не удалось перечитать настройки: %s', error)
+            return False
+        problems = config.problems()
+        if problems:
+            logger.error('Настройки не применены: %s', ', '.join(problems))
+            return False
+        if config == self.current:
+            return False
+        self.current = config
+        logger.info('Настройки перечитаны.')
+        return True
+
+    def check(self):
+        """Перезагрузка по запросу или по изменению файла настроек."""
+        mtime = self.stat()
+        if not self.requested.is_set() and mtime == self.mtime:
+            return False
+        self.requested.clear()
+        self.mtime = mtime
+        return self.reload()
+
+    def request_reload(self, signum=None, frame=None):
+        """Обработчик SIGHUP: только будит поток перезагрузки."""
+        self.requested.set()
+
+    def watch(self):
+        """Цикл потока перезагрузки."""
+        while not self.stopped:
+            self.requested.wait(self.interval)
+            if not self.stopped:
+                self.check()
+
+    def start(self):
+        """Подключаем SIGHUP и запускаем поток перезагрузки."""
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self.request_reload)
+        self.thread = threading.Thread(target=self.watch, daemon=True,
+                                       name='config-reload')
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем поток перезагрузки."""
+        self.stopped = True
+        self.requested.set()
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+
+MAXSIZE = 64
+TTL = 24 * 60 * 60
+
+
+class DedupeCache:
+    """Ограниченный LRU-кэш уже отправленных уведомлений с TTL.
+
+    Хранит не больше maxsize ключей, поэтому память на тенанта
+    не растёт со временем работы, а ключ забывается через ttl секунд.
+    С ключом можно хранить значение, например последний отправленный
+    статус работы: повтором считается только то же значение.
+    """
+
+    __slots__ = ('maxsize', 'ttl', 'clock', '_entries')
+
+    def __init__(self, maxsize=MAXSIZE, ttl=TTL, clock=time.monotonic):
+        """Создаём пустой кэш."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """Число ключей в кэше, включая ещё не вытесненные просроченные."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Отправлялось ли уведомление с этим ключом в пределах ttl."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self.clock()
+
+    def add(self, key, value=None):
+        """Запоминаем ключ со значением; True, если это не повтор."""
+        is_new = key not in self or self._entries[key][1] != value
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return is_new
+
+    def clear(self):
+        """Забываем все ключи."""
+        self._entries.clear()
@@ -0,0 +1,242 @@
+import logging
+import signal
+import threading
+import time
+
+import telegram
+
+import homework
+from adaptive import FixedInterval, polling_policy
+from commands import chat_states
+from exceptions import ShutdownRequested
+from health import HEALTH
+from logs import register_logger
+from metrics import LOOP_LAG
+from outbox import Outbox
+from scheduler import JITTER, Scheduler
+from state_store import (MemoryStateStore, checkpoint_state,
+                         open_state_store, restore_state)
+from tenants import load_tenants
+
+logger = logging.getLogger(__name__)
+register_logger(logger)
+
+
+class PollingEngine:
+    """Опрос всех подписок из одного процесса.
+
+    Для каждого тенанта хранится только TenantState, поэтому расход
+    памяти на подписку не растёт со временем работы. Опросы запускаются
+    по дедлайнам из Scheduler, а не через фиксированную паузу.
+    """
+
+    def __init__(self, bot, tenants, retry_period=None,
+                 clock=time.time, sleep=None, jitter=JITTER,
+                 rng=None, policy=None, store=None, outbox=None,
+                 history=None, guard=None):
+        """Готовим состояние опроса и расписание для каждого тенанта.
+
+        По умолчанию пауза между опросами — ожидание события stopped,
+        которое stop() прерывает сразу. guard(key) проверяет, что тенант
+        всё ещё принадлежит процессу; без него опрашиваются все тенанты.
+        """
+        self.bot = bot
+        self.guard = guard
+        self.retry_period = retry_period
+        self.clock = clock
+        self.stopped = threading.Event()
+        self.sleep = sleep or self.stopped.wait
+        self.policy = policy or FixedInterval()
+        self.store = store or MemoryStateStore()
+        self.outbox = outbox
+        self.history = history
+        self.tenants = {}
+        self.configs = {}
+        self.states = {}
+        self.scheduler = Scheduler(jitter=jitter, rng=rng)
+        now = clock()
+        for key, tenant in tenants.items():
+            self.add_tenant(key, tenant, now)
+
+    def add_tenant(self, key, tenant, now=None):
+        """Добавляем тенанта в опрос, восстанавливая его состояние."""
+        now = self.clock() if now is None else now
+        self.tenants[key] = tenant
+        self.configs[tenant.key] = homework.settings.for_tenant(
+            retry_period=tenant.retry_period or self.retry_period
+        )
+        next_poll = self.scheduler.add(key, self.period(tenant), now)
+        self.states[key] = restore_state(self.store, key, now, next_poll,
+                                         self.history)
+
+    def remove_tenant(self, key):
+        """Убираем тенанта из опроса и возвращаем его состояние."""
+        self.scheduler.remove(key)
+        self.configs.pop(self.tenants.pop(key).key, None)
+        return self.states.pop(key)
+
+    def period(self, tenant):
+        """Интервал опроса тенанта."""
+        return self.configs[tenant.key].retry_period
+
+    def next_period(self, tenant, state):
+        """Интервал до следующего опроса по политике опроса."""
+        return self.policy.interval(state.status, state.idle_polls,
+                                    self.period(tenant))
+
+    def send(self, tenant, message):
+        """Отправляем сообщение через очередь или напрямую."""
+        if self.outbox is None:
+            homework.send_chat_message(self.bot, tenant.chat_id, message)
+        else:
+            self.outbox.put(tenant.chat_id, message)
+
+    def deliver(self, tenant, messages):
+        """Отправляем сообщения тенанта по порядку."""
+        for message in messages:
+            self.send(tenant, message)
+
+    def fetch(self, tenant, state):
+        """Запрос к API Практикума для тенанта."""
+        return homework.request_api_answer(
+            state.timestamp, tenant.headers, state.response_cache
+        )
+
+    def poll(self, tenant, state):
+        """Один цикл опроса API для тенанта."""
+        if state.paused:
+            logger.debug('Опрос для чата %s приостановлен.', tenant.chat_id,
+                         extra={'tenant': tenant.key})
+            return
+        self.complete(tenant, state, self.fetch, tenant, state)
+
+    def holds(self, key):
+        """Можно ли сохранять состояние тенанта и слать ему сообщения."""
+        return self.guard is None or self.guard(key)
+
+    def complete(self, tenant, state, fetch, *args):
+        """Обрабатываем ответ API, который возвращает fetch(*args).
+
+        Принадлежность тенанта проверяется после запроса, который может
+        быть долгим: если тенант ушёл другому процессу, ответ
+        отбрасывается без отправки сообщений и записи состояния.
+        """
+        try:
+            response = fetch(*args)
+        except Exception as error:
+            response = error
+        if not self.holds(tenant.key):
+            logger.warning('Тенант ушёл во время опроса, ответ отброшен.',
+                           extra={'tenant': tenant.key})
+            return
+        try:
+            if isinstance(response, Exception):
+                raise response
+            homeworks, state.timestamp = homework.check_response(response)
+            messages = homework.parse_changes(state, homeworks)
+            if not messages:
+                logger.debug('Статус без изменений.')
+            self.deliver(tenant, messages + homework.clear_errors(state))
+        except Exception as error:
+            logger.error('Сбой опроса для чата %s: %s', tenant.chat_id, error,
+                         extra={'tenant': tenant.key})
+            message = homework.error_message(state, error)
+            if message:
+                self.deliver(tenant, [message])
+        finally:
+            checkpoint_state(self.store, tenant.key, state)
+
+    def reschedule(self, key):
+        """Планируем следующий опрос тенанта после завершения текущего."""
+        state = self.states[key]
+        state.next_poll = self.scheduler.reschedule(
+            key, self.clock(), self.next_period(self.tenants[key], state)
+        )
+
+    def poll_due(self, keys):
+        """Опрашиваем тенантов keys по очереди.
+
+        После stop() оставшиеся тенанты не опрашиваются: их опросят
+        после следующего запуска.
+        """
+        for key in keys:
+            if self.stopped.is_set():
+                break
+            state = self.states[key]
+            LOOP_LAG.observe(max(0.0, self.clock() - state.next_poll))
+            self.poll(self.tenants[key], state)
+            self.reschedule(key)
+
+    def run_pending(self):
+        """Опрашиваем тенантов, у которых подошёл срок.
+
+        Возвращает число секунд до следующего опроса.
+        """
+        homework.sync_config()
+        try:
+            self.poll_due(self.scheduler.pop_due(self.clock()))
+        except ShutdownRequested:
+            logger.info('Опрос прерван остановкой.')
+        self.store.maybe_flush()
+        next_fire = self.scheduler.next_fire()
+        if next_fire is None:
+            delay = self.retry_period or homework.RETRY_PERIOD
+        else:
+            delay = max(0.0, next_fire - self.clock())
+        HEALTH.beat(delay)
+        return delay
+
+    def run_forever(self):
+        """Цикл опроса до вызова stop(), затем аккуратная остановка."""
+        try:
+            while not self.stopped.is_set():
+                self.sleep(self.run_pending())
+        finally:
+            self.close()
+
+    def stop(self, signum=None, frame=None):
+        """Просим цикл опроса остановиться; годится как обработчик сигнала."""
+        if signum is not None:
+            logger.info('Получен сигнал %s, останавливаемся.',
+                        signal.Signals(signum).name)
+        self.stopped.set()
+
+    def close(self, timeout=None):
+        """Досылаем очередь сообщений и сохраняем состояние.
+
+        Без timeout очередь досылается не дольше SHUTDOWN_TIMEOUT из
+        настроек.
+        """
+        if timeout is None:
+            timeout = homework.settings.current.shutdown_timeout
+        if self.outbox is not None:
+            self.outbox.drain(timeout)
+        self.store.close()
+        logger.debug('Опрос остановлен.')
+
+
+def main():
+    """Запуск опроса всех подписок из реестра TENANTS_PATH."""
+    tenants = load_tenants(homework.require_tenants())
+    logger.debug('Загружено подписок: %d', len(tenants))
+    bot = homework.configure_bot(
+        telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    )
+    store = open_state_store(homework.STATE_PATH)
+    outbox = Outbox(bot)
+    outbox.start()
+    HEALTH.register('queue', outbox.__len__)
+    adaptive = homework.settings.current.adaptive_polling
+    engine = PollingEngine(bot, tenants, policy=polling_policy(adaptive),
+                           store=store, outbox=outbox,
+                           history=homework.history_log)
+    homework.start_services(bot, chat_states(engine.tenants, engine.states))
+    homework.interrupt_retries(engine.stopped)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, engine.stop)
+    engine.run_forever()
+
+
+if __name__ == '__main__':
+    homework.create_app()
+    main()
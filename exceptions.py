@@ -3,4 +3,15 @@ class RequestError(Exception):
 
 
 class WrongStatusCode(Exception):
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class ShutdownRequested(BaseException):
     pass
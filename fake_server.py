@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+from aiohttp import web
+
+from outbox import TokenBucket
+
+HOMEWORKS_PATH = '/api/user_api/homework_statuses/'
+STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+
+@dataclass(frozen=True)
+class FakeServerConfig:
+    """Параметры поддельных API: задержки, сбои и лимиты Telegram."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    api_failure_rate: float = 0.0
+    telegram_failure_rate: float = 0.0
+    homeworks: int = 3
+    change_interval: int = 600
+    chat_interval: float = 1.0
+    global_rate: float = 30.0
+    seed: int = 0
+
+
+class FakeBackend:
+    """Поддельные API Практикума и Telegram Bot API в одном приложении.
+
+    Статусы работ каждого токена меняются по детерминированному
+    расписанию от момента запуска, а ответ содержит только работы,
+    обновлённые не раньше from_date. sendMessage соблюдает лимиты
+    Telegram и при их превышении отвечает 429 с retry_after.
+    """
+
+    def __init__(self, config=None, clock=time.time):
+        """Готовим счётчики и лимиты."""
+        self.config = config or FakeServerConfig()
+        self.clock = clock
+        self.started = clock()
+        self.rng = random.Random(self.config.seed)
+        self.bucket = TokenBucket(self.config.global_rate, now=self.started)
+        self.last_sent = {}
+        self.messages = []
+        self.stats = {'api_requests': 0, 'api_failures': 0,
+                      'telegram_requests': 0, 'telegram_throttled': 0,
+                      'telegram_failures': 0}
+
+    def homeworks(self, token, from_date):
+        """Работы токена, обновлённые начиная с from_date."""
+        now = self.clock()
+        seed = int.from_bytes(hashlib.blake2b(token.encode(),
+                                              digest_size=4).digest(), 'big')
+        interval = self.config.change_interval
+        result = []
+        for number in range(self.config.homeworks):
+            offset = (seed + number * 7919) % interval
+            step = min(len(STATUSES) - 1,
+                       int((now - self.started - offset) // interval))
+            if step < 0:
+                continue
+            updated = int(self.started + offset + step * interval)
+            if updated < from_date:
+                continue
+            result.append({
+                'id': number,
+                'status': STATUSES[step],
+                'homework_name': f'{token[:8]}__hw{number:02d}.zip',
+                'reviewer_comment': 'Проверено поддельным ревьюером.',
+                'date_updated': datetime.fromtimestamp(
+                    updated, timezone.utc
+                ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'lesson_name': f'Спринт {number}',
+            })
+        return result
+
+    async def delay(self):
+        """Задержка ответа по настройкам."""
+        latency = self.config.latency + self.rng.uniform(
+            0, self.config.jitter
+        )
+        if latency:
+            await asyncio.sleep(latency)
+
+    async def homework_statuses(self, request):
+        """GET homework_statuses с семантикой from_date."""
+        self.stats['api_requests'] += 1
+        await self.delay()
+        authorization = request.headers.get('Authorization', '')
+        if not authorization.startswith('OAuth ') or len(authorization) < 7:
+            return web.json_response(
+                {'code': 'not_authenticated',
+                 'message': 'Учетные данные не были предоставлены.'},
+                status=HTTPStatus.UNAUTHORIZED,
+            )
+        try:
+            from_date = int(request.query['from_date'])
+        except (KeyError, ValueError):
+            return web.json_response(
+                {'code': 'UnknownError',
+                 'error': {'error': 'Wrong from_date format'}},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        if self.rng.random() < self.config.api_failure_rate:
+            self.stats['api_failures'] += 1
+            return web.json_response(
+                {'code': 'service_unavailable'},
+                status=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'},
+            )
+        return web.json_response({
+            'homeworks': self.homeworks(authorization[6:], from_date),
+            'current_date': int(self.clock()),
+        })
+
+    def throttle(self, chat_id):
+        """Секунды до разрешённой отправки в чат или 0."""
+        now = self.clock()
+        wait = max(self.bucket.delay(now),
+                   self.last_sent.get(chat_id, -math.inf)
+                   + self.config.chat_interval - now)
+        if wait > 0:
+            return math.ceil(wait)
+        self.bucket.consume(now)
+        self.last_sent[chat_id] = now
+        return 0
+
+    async def send_message(self, request, data):
+        """Ответ на sendMessage с учётом лимитов Telegram."""
+        chat_id = str(data.get('chat_id'))
+        if self.rng.random() < self.config.telegram_failure_rate:
+            self.stats['telegram_failures'] += 1
+            return web.json_response(
+                {'ok': False, 'error_code': 502,
+                 'description': 'Bad Gateway'},
+                status=HTTPStatus.BAD_GATEWAY,
+            )
+        retry_after = self.throttle(chat_id)
+        if retry_after:
+            self.stats['telegram_throttled'] += 1
+            return web.json_response(
+                {'ok': False, 'error_code': 429,
+                 'description': f'Too Many Requests: retry after '
+                                f'{retry_after}',
+                 'parameters': {'retry_after': retry_after}},
+                status=HTTPStatus.TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(retry_after)},
+            )
+        self.messages.append((chat_id, data.get('text')))
+        return web.json_response({'ok': True, 'result': {
+            'message_id': len(self.messages),
+            'date': int(self.clock()),
+            'chat': {'id': int(chat_id) if chat_id.lstrip('-').isdigit()
+                     else chat_id, 'type': 'private'},
+            'text': data.get('text'),
+        }})
+
+    async def bot_method(self, request):
+        """Методы Bot API: sendMessage, getMe, остальные — заглушки."""
+        self.stats['telegram_requests'] += 1
+        await self.delay()
+        if request.content_type == 'application/json':
+            data = await request.json()
+        else:
+            data = dict(await request.post())
+        method = request.match_info['method']
+        if method == 'sendMessage':
+            return await self.send_message(request, data)
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': {
+                'id': 1, 'is_bot': True, 'first_name': 'FakeBot',
+                'username': 'fake_bot',
+            }})
+        if method == 'getUpdates':
+            return web.json_response({'ok': True, 'result': []})
+        return web.json_response({'ok': True, 'result': True})
+
+    async def get_stats(self, request):
+        """Счётчики запросов для оценки нагрузки."""
+        return web.json_response(
+            dict(self.stats, telegram_messages=len(self.messages))
+        )
+
+    def app(self):
+        """aiohttp-приложение с маршрутами обоих API."""
+        app = web.Application()
+        app.router.add_get(HOMEWORKS_PATH, self.homework_statuses)
+        app.router.add_route('*', '/bot{token}/{method}', self.bot_method)
+        app.router.add_get('/stats', self.get_stats)
+        return app
+
+
+class ServerThread:
+    """Поддельный сервер в фоновом потоке со своим циклом событий."""
+
+    def __init__(self, backend, host='127.0.0.1', port=0):
+        """Сервер ещё не запущен."""
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='fake-server',
+                                        daemon=True)
+
+    @property
+    def url(self):
+        """Базовый адрес сервера."""
+        return f'http://{self.host}:{self.port}'
+
+    async def _start(self):
+        self.runner = web.AppRunner(self.backend.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._start())
+        self._ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.runner.cleanup())
+        self.loop.close()
+
+    def start(self):
+        """Запускаем сервер и ждём, пока он начнёт принимать запросы."""
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        """Останавливаем сервер."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+def write_tenants(path, count, chat_base=100000):
+    """Файл подписок для нагрузочного прогона движка."""
+    tenants = [{'practicum_token': f'load-token-{number:06d}',
+                'chat_id': str(chat_base + number)}
+               for number in range(count)]
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(tenants, file)
+
+
+def parse_args(argv=None):
+    """Параметры запуска из командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Поддельные API Практикума и Telegram.'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--api-failure-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-failure-rate', type=float, default=0.0)
+    parser.add_argument('--homeworks', type=int, default=3)
+    parser.add_argument('--change-interval', type=int, default=600)
+    parser.add_argument('--tenants', type=int, default=0,
+                        help='записать файл подписок для нагрузки')
+    parser.add_argument('--tenants-path', default='tenants.json')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Запуск поддельного сервера."""
+    args = parse_args(argv)
+    if args.tenants:
+        write_tenants(args.tenants_path, args.tenants)
+    config = FakeServerConfig(
+        latency=args.latency, jitter=args.jitter,
+        api_failure_rate=args.api_failure_rate,
+        telegram_failure_rate=args.telegram_failure_rate,
+        homeworks=args.homeworks, change_interval=args.change_interval,
+    )
+    web.run_app(FakeBackend(config).app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Сколько RETRY_PERIOD цикл может опаздывать, прежде чем считаться зависшим.
+STALE_FACTOR = 1
+CONTENT_TYPE = 'application/json; charset=utf-8'
+POLL = 'poll'
+DELIVERY = 'delivery'
+
+
+class Health:
+    """Признаки жизни цикла опроса для проверки снаружи.
+
+    Цикл отмечается на каждом такте через beat() и сообщает, когда
+    ждать следующего. Если такт опаздывает больше чем на
+    factor * period, цикл считается зависшим, например на запросе
+    без ответа. Кроме этого запоминаются моменты последнего успешного
+    опроса и отправки, запланированные повторы и значения
+    зарегистрированных источников: состояние выключателя, длина
+    очереди сообщений.
+    """
+
+    def __init__(self, clock=time.time):
+        """До первого такта цикл ждём с момента создания."""
+        self.clock = clock
+        self.started = self.due = clock()
+        self.beaten = None
+        self.last = {}
+        self.retries = {}
+        self.sources = {}
+        self._lock = threading.Lock()
+
+    def beat(self, next_in):
+        """Цикл жив; следующий такт — через next_in секунд.
+
+        next_in — время до ближайшего запланированного опроса, поэтому
+        каждый такт заменяет прежний срок, а не отодвигает его.
+        """
+        now = self.clock()
+        with self._lock:
+            self.beaten = now
+            self.due = now + next_in
+
+    def success(self, name):
+        """Успешный опрос API (POLL) или отправка в Telegram (DELIVERY)."""
+        with self._lock:
+            self.last[name] = self.clock()
+            self.retries.pop(name, None)
+
+    def retrying(self, name, attempt, delay, error):
+        """Запланирован повтор опроса или отправки после сбоя."""
+        with self._lock:
+            self.retries[name] = {'attempt': attempt, 'delay': delay,
+                                  'error': str(error)}
+
+    def register(self, name, source):
+        """Добавляем в отчёт значение source() под именем name."""
+        self.sources[name] = source
+
+    def report(self, period, factor=STALE_FACTOR):
+        """Отчёт о состоянии; status — 'ok' или 'stale'."""
+        now = self.clock()
+        with self._lock:
+            overdue = now - self.due
+            report = {
+                'status': 'stale' if overdue > factor * period else 'ok',
+                'uptime': round(now - self.started, 3),
+                'last_loop': self.beaten,
+                'overdue': round(max(0.0, overdue), 3),
+                'last_poll': self.last.get(POLL),
+                'last_delivery': self.last.get(DELIVERY),
+                'retrying': dict(self.retries),
+            }
+        for name, source in self.sources.items():
+            report[name] = source()
+        return report
+
+
+HEALTH = Health()
+
+
+def start_health_server(port, period, factor=STALE_FACTOR, health=HEALTH,
+                        host=''):
+    """Отдаём отчёт о состоянии по HTTP из отдельного потока.
+
+    period — функция, возвращающая текущий RETRY_PERIOD. Зависший
+    цикл отвечает кодом 503.
+    """
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            report = health.report(period(), factor)
+            body = json.dumps(report, ensure_ascii=False).encode('utf-8')
+            self.send_response(HTTPStatus.OK if report['status'] == 'ok'
+                               else HTTPStatus.SERVICE_UNAVAILABLE)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), HealthHandler)
+    threading.Thread(target=server.serve_forever, name='health',
+                     daemon=True).start()
+    return server
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import namedtuple
+from itertools import islice
+from pathlib import Path
+
+HISTORY_KEEP = 100
+COMPACT_EVERY = 100_000
+# Запись индекса: хеш работы, хеш тенанта, смещение и длина строки
+# журнала, номера предыдущих записей той же работы и того же тенанта.
+ENTRY = struct.Struct('<QQQIqq')
+HEAD = struct.Struct('<Qq')
+SNAPSHOT = struct.Struct('<qq')
+
+HistoryEvent = namedtuple('HistoryEvent',
+                          ('moment', 'tenant', 'key', 'name', 'status'))
+
+
+def event_hash(*parts):
+    """64-битный хеш тенанта или пары тенант и работа."""
+    return int.from_bytes(hashlib.blake2b(
+        '\0'.join(parts).encode(), digest_size=8
+    ).digest(), 'little')
+
+
+class HistoryLog:
+    """Журнал смен статусов работ всех тенантов.
+
+    Каждая смена дописывается строкой JSON в журнал path и записью
+    фиксированной длины в индекс path.idx, поэтому добавление стоит
+    O(1). Записи индекса связаны в цепочки по работе и по тенанту, а
+    индекс читается через mmap: история работы или последние статусы
+    тенанта читаются без просмотра всего журнала. Номера последних
+    записей цепочек сохраняются в path.heads при сжатии и закрытии,
+    а после сбоя досчитываются по хвосту индекса. Раз в compact_every
+    добавлений журнал сжимается до keep последних смен каждой работы.
+    """
+
+    def __init__(self, path, keep=HISTORY_KEEP, compact_every=COMPACT_EVERY):
+        """Открываем журнал и восстанавливаем цепочки."""
+        self.path = Path(path)
+        self.index_path = Path(f'{path}.idx')
+        self.heads_path = Path(f'{path}.heads')
+        self.keep = keep
+        self.compact_every = compact_every
+        self.lock = threading.RLock()
+        self._open()
+
+    def _open(self):
+        self.log = open(self.path, 'a+b', buffering=0)
+        self.index = open(self.index_path, 'a+b', buffering=0)
+        self.size = self.log.tell()
+        self.count, tail = divmod(self.index.tell(), ENTRY.size)
+        if tail:
+            # Недописанная при сбое запись индекса.
+            self.index.truncate(self.count * ENTRY.size)
+        self._mapped = None
+        self._mapped_count = 0
+        self.appended = 0
+        if self.count and sum(self._entry(self.count - 1)[2:4]) > self.size:
+            # Сжатие прервалось между заменой журнала и индекса.
+            self._rebuild_index()
+        covered = self._read_heads()
+        for number in range(covered, self.count):
+            self._link(number, self._entry(number))
+
+    def _rebuild_index(self):
+        self._mapped.close()
+        self._mapped = None
+        self._mapped_count = 0
+        self.heads_path.unlink(missing_ok=True)
+        self.index.truncate(0)
+        homeworks, owners = {}, {}
+        offset = 0
+        with open(self.path, 'rb') as log:
+            for number, line in enumerate(log):
+                event = HistoryEvent(*json.loads(line))
+                entry = (event_hash(event.tenant, event.key),
+                         event_hash(event.tenant), offset, len(line))
+                self.index.write(ENTRY.pack(
+                    *entry, homeworks.get(entry[0], -1),
+                    owners.get(entry[1], -1),
+                ))
+                homeworks[entry[0]], owners[entry[1]] = number, number
+                offset += len(line)
+        self.count = self.index.tell() // ENTRY.size
+
+    def _read_heads(self):
+        self.homework_heads, self.tenant_heads = {}, {}
+        if not self.heads_path.exists():
+            return 0
+        data = self.heads_path.read_bytes()
+        covered, homeworks = SNAPSHOT.unpack_from(data)
+        if covered > self.count:
+            return 0
+        heads = [HEAD.unpack_from(data, SNAPSHOT.size + number * HEAD.size)
+                 for number in range((len(data) - SNAPSHOT.size)
+                                     // HEAD.size)]
+        self.homework_heads = dict(heads[:homeworks])
+        self.tenant_heads = dict(heads[homeworks:])
+        return covered
+
+    def _write_heads(self):
+        heads = list(self.homework_heads.items())
+        heads.extend(self.tenant_heads.items())
+        data = SNAPSHOT.pack(self.count, len(self.homework_heads))
+        data += b''.join(HEAD.pack(*head) for head in heads)
+        tmp_path = self.heads_path.with_name(f'.{self.heads_path.name}')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self.heads_path)
+
+    def _link(self, number, entry):
+        self.homework_heads[entry[0]] = number
+        self.tenant_heads[entry[1]] = number
+
+    def _entry(self, number):
+        if number >= self._mapped_count:
+            if self._mapped is not None:
+                self._mapped.close()
+            self._mapped = mmap.mmap(self.index.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+            self._mapped_count = self.count
+        return ENTRY.unpack_from(self._mapped, number * ENTRY.size)
+
+    def _event(self, entry):
+        line = os.pread(self.log.fileno(), entry[3], entry[2])
+        return HistoryEvent(*json.loads(line))
+
+    def __len__(self):
+        """Число смен статусов в журнале."""
+        return self.count
+
+    def append(self, moment, tenant, key, name, status):
+        """Дописываем смену статуса работы key тенанта tenant."""
+        line = json.dumps([moment, tenant, key, name, status],
+                          ensure_ascii=False, separators=(',', ':'))
+        line = line.encode('utf-8') + b'\n'
+        homework, owner = event_hash(tenant, key), event_hash(tenant)
+        with self.lock:
+            entry = (homework, owner, self.size, len(line),
+                     self.homework_heads.get(homework, -1),
+                     self.tenant_heads.get(owner, -1))
+            self.log.write(line)
+            self.index.write(ENTRY.pack(*entry))
+            self.size += len(line)
+            self._link(self.count, entry)
+            self.count += 1
+            self.appended += 1
+            if self.appended >= self.compact_every:
+                self.compact()
+
+    def _chain(self, number, link):
+        while number >= 0:
+            entry = self._entry(number)
+            yield number, entry
+            number = entry[link]
+
+    def events(self, tenant, key=None, limit=None):
+        """Смены статусов тенанта или одной его работы, от новых к старым."""
+        if key is None:
+            start, link = self.tenant_heads, 5
+            head = event_hash(tenant)
+        else:
+            start, link = self.homework_heads, 4
+            head = event_hash(tenant, key)
+        result = []
+        with self.lock:
+            for _, entry in self._chain(start.get(head, -1), link):
+                event = self._event(entry)
+                # При совпадении хешей в цепочку попадают чужие записи.
+                if event.tenant != tenant or key not in (None, event.key):
+                    continue
+                result.append(event)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def statuses(self, tenant):
+        """Последние известные статусы работ тенанта."""
+        statuses = {}
+        for event in self.events(tenant):
+            statuses.setdefault(event.key, event.status)
+        return statuses
+
+    def compact(self):
+        """Оставляем в журнале keep последних смен каждой работы."""
+        with self.lock:
+            kept = sorted(
+                number for head in self.homework_heads.values()
+                for number, _ in islice(self._chain(head, 4), self.keep)
+            )
+            log_tmp = self.path.with_name(f'.{self.path.name}.tmp')
+            index_tmp = self.index_path.with_name(
+                f'.{self.index_path.name}.tmp'
+            )
+            with open(log_tmp, 'wb') as log, open(index_tmp, 'wb') as index:
+                homeworks, owners = {}, {}
+                for new, number in enumerate(kept):
+                    entry = self._entry(number)
+                    line = os.pread(self.log.fileno(), entry[3], entry[2])
+                    index.write(ENTRY.pack(
+                        entry[0], entry[1], log.tell(), entry[3],
+                        homeworks.get(entry[0], -1), owners.get(entry[1], -1),
+                    ))
+                    log.write(line)
+                    homeworks[entry[0]], owners[entry[1]] = new, new
+                log.flush()
+                index.flush()
+                os.fsync(log.fileno())
+                os.fsync(index.fileno())
+            self._close_files()
+            # Журнал заменяется первым: если процесс упадёт до замены
+            # индекса, старый индекс укажет за конец журнала и будет
+            # перестроен при открытии.
+            os.replace(log_tmp, self.path)
+            os.replace(index_tmp, self.index_path)
+            self.heads_path.unlink(missing_ok=True)
+            self._open()
+            self._write_heads()
+
+    def _close_files(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        self.log.close()
+        self.index.close()
+
+    def close(self):
+        """Сохраняем начала цепочек и закрываем файлы."""
+        with self.lock:
+            if self.log.closed:
+                return
+            self._write_heads()
+            self._close_files()
+
+
+class TenantHistory:
+    """История тенанта в журнале с интерфейсом TenantState.history.
+
+    Элементы — кортежи (время, ключ работы, название, статус), при
+    обходе выдаются size последних смен от старых к новым.
+    """
+
+    __slots__ = ('log', 'tenant', 'size')
+
+    def __init__(self, log, tenant, size):
+        """История тенанта tenant в журнале log."""
+        self.log = log
+        self.tenant = tenant
+        self.size = size
+
+    def extend(self, changes):
+        """Дописываем смены статусов в журнал."""
+        for moment, key, name, status in changes:
+            self.log.append(moment, self.tenant, key, name, status)
+
+    def __iter__(self):
+        """Последние смены статусов от старых к новым."""
+        events = self.log.events(self.tenant, limit=self.size)
+        return iter([(event.moment, event.key, event.name, event.status)
+                     for event in reversed(events)])
@@ -1,33 +1,39 @@
+import atexit
 import logging
+import os
 import sys
 import time
 from http import HTTPStatus
-from logging import StreamHandler
 from os import getenv
 
-import requests
-import telegram
-from dotenv import load_dotenv
-
-from exceptions import RequestError, WrongStatusCode
+from api_client import PracticumClient
+from breaker import OPEN, breaker_for
+from commands import CommandService, start_commands
+from config import DEFAULT_ENDPOINT, Config, ConfigManager, load_config
+from exceptions import (CircuitOpen, RequestError, ShutdownRequested,
+                        WrongStatusCode)
+from health import DELIVERY, HEALTH, POLL, start_health_server
+from history_log import HistoryLog
+from logs import configure_logging, register_logger
+from metrics import (API_ERRORS, API_LATENCY, LOOP_LAG, TELEGRAM_FAILURES,
+                     TELEGRAM_LATENCY, VALIDATION_FAILURES, api_response,
+                     count_exceptions, start_http_server)
+from retry import RetryPolicy, parse_retry_after
+from shutdown import GracefulShutdown
+from state_store import checkpoint_state, open_state_store, restore_state
+from validation import HomeworkRecord, ResponseValidator, loads
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter(
-    '%(asctime)s [%(levelname)s] %(message)s'
-)
-handler = StreamHandler(stream=sys.stdout)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-
-load_dotenv()
+register_logger(logger)
 
 PRACTICUM_TOKEN = getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = getenv('TELEGRAM_CHAT_ID')
+STATE_PATH = getenv('STATE_PATH')
 
 RETRY_PERIOD = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+ENDPOINT = getenv('PRACTICUM_ENDPOINT', DEFAULT_ENDPOINT)
+TELEGRAM_BASE_URL = getenv('TELEGRAM_BASE_URL')
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 HOMEWORK_VERDICTS = {
@@ -36,114 +42,425 @@ HOMEWORK_VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+RECOVERED_MESSAGE = 'API Практикума снова доступен.'
+
+
+def breaker_changed(breaker, old, new):
+    """Записываем в лог смену состояния выключателя."""
+    log = logger.warning if new == OPEN else logger.info
+    log('Выключатель %s: %s -> %s', breaker.name, old, new)
+
+
+def retry_scheduled(policy, error, attempt, delay):
+    """Записываем в лог предстоящий повтор запроса к API."""
+    logger.warning('Повтор через %.1f с после сбоя: %s', delay, error)
+    HEALTH.retrying(POLL, attempt, delay, error)
+
+
+def delivery_retry_scheduled(policy, error, attempt, delay):
+    """Записываем в лог предстоящий повтор отправки в Telegram."""
+    logger.warning('Повтор отправки через %.1f с после сбоя: %s',
+                   delay, error)
+    HEALTH.retrying(DELIVERY, attempt, delay, error)
+
+
+def telegram_transient_errors():
+    """Ошибки Telegram, которые стоит повторить."""
+    from telegram.error import NetworkError, RetryAfter
+    return NetworkError, RetryAfter
+
+
+def telegram_permanent_errors():
+    """Ошибки Telegram, которые не исправятся повтором."""
+    from telegram.error import BadRequest, Unauthorized
+    return BadRequest, Unauthorized
+
+
+api_client = PracticumClient(ENDPOINT, HEADERS)
+api_breaker = breaker_for(ENDPOINT, listener=breaker_changed)
+api_retry = RetryPolicy((RequestError, WrongStatusCode),
+                        listener=retry_scheduled)
+telegram_retry = RetryPolicy(
+    telegram_transient_errors, give_up_on=telegram_permanent_errors,
+    max_attempts=3, max_delay=10, max_elapsed=30,
+    listener=delivery_retry_scheduled,
+)
+validator = ResponseValidator(HOMEWORK_VERDICTS)
+history_log = None
+HEALTH.register('api_breaker', lambda: api_breaker.state)
+
+
+def current_config():
+    """Config из текущих значений констант модуля."""
+    return Config(PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID,
+                  RETRY_PERIOD, ENDPOINT, TELEGRAM_BASE_URL, STATE_PATH)
+
+
+# До create_app настройки собраны из констант модуля: разбор окружения
+# и файла настроек, который может завершиться ошибкой, выполняет она.
+settings = ConfigManager(current_config)
+applied = settings.current
+
 
 def check_tokens():
     """Проверка наличия всех необходимых токенов."""
-    tokens = (PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
-    return all(tokens)
+    problems = current_config().problems()
+    for problem in problems:
+        logger.critical('Ошибка настроек: %s', problem)
+    return not problems
+
+
+def apply_config(config):
+    """Подставляем значения config в константы модуля и клиент API.
+
+    Токен Telegram, путь к состоянию и другие поля вне RELOADABLE
+    используются только при запуске, поэтому их смена вступает в силу
+    после перезапуска.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, STATE_PATH
+    global RETRY_PERIOD, ENDPOINT, TELEGRAM_BASE_URL, HEADERS
+    global api_breaker, applied
+    restart = applied.restart_required(config) if applied else []
+    if restart:
+        logger.warning('Применятся после перезапуска: %s',
+                       ', '.join(restart))
+    PRACTICUM_TOKEN = config.practicum_token
+    TELEGRAM_TOKEN = config.telegram_token
+    TELEGRAM_CHAT_ID = config.telegram_chat_id
+    STATE_PATH = config.state_path
+    RETRY_PERIOD = config.retry_period
+    ENDPOINT = config.endpoint
+    TELEGRAM_BASE_URL = config.telegram_base_url
+    HEADERS = config.headers
+    api_client.endpoint = ENDPOINT
+    api_client.headers = HEADERS
+    api_breaker = breaker_for(ENDPOINT, listener=breaker_changed)
+    applied = config
+
+
+def sync_config():
+    """Применяем перечитанную конфигурацию между опросами.
+
+    Поток перезагрузки только подменяет settings.current, а константы
+    модуля обновляются здесь, в цикле опроса, поэтому запрос, который
+    уже выполняется, не видит половину старых и половину новых значений.
+    """
+    if settings.current is not applied:
+        apply_config(settings.current)
+
+
+def configure_bot(bot):
+    """Направляем бота на адрес Bot API из TELEGRAM_BASE_URL, если задан."""
+    if TELEGRAM_BASE_URL:
+        bot.base_url = f'{TELEGRAM_BASE_URL}{bot.token}'
+    return bot
 
 
 def send_message(bot, message):
     """Отправка сообщения в Telegram."""
+    send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправка сообщения в указанный чат Telegram.
+
+    Сетевые сбои и RetryAfter повторяются по политике telegram_retry.
+    """
+    started = time.perf_counter()
+    fields = {'tenant': chat_id}
     try:
-        logger.debug(f'Пытаемся отправить сообщение: {message}')
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        logger.debug('Пытаемся отправить сообщение: %s', message,
+                     extra=fields)
+        telegram_retry.call(bot.send_message, chat_id, message)
+    except ShutdownRequested:
+        logger.warning('Отправка прервана остановкой: %s', message,
+                       extra=fields)
+        raise
     except Exception:
-        logger.error(f'Отправка сообщения не удалась: {message}')
+        TELEGRAM_FAILURES.inc()
+        logger.error('Отправка сообщения не удалась: %s', message,
+                     extra=fields)
     else:
-        logger.debug(f'Сообщение отправлено успешно: {message}')
+        HEALTH.success(DELIVERY)
+        fields['latency'] = round(time.perf_counter() - started, 4)
+        logger.debug('Сообщение отправлено успешно: %s', message,
+                     extra=fields)
+    finally:
+        TELEGRAM_LATENCY.observe(time.perf_counter() - started)
 
 
 def get_api_answer(timestamp):
     """Запрашиваем информацию от API Практикума."""
+    return request_api_answer(timestamp)
+
+
+def request_api_answer(timestamp, headers=None, cache=None):
+    """Запрашиваем API Практикума, повторяя запрос при временных сбоях.
+
+    Сбои соединения, ответы 429 и 5xx повторяются по политике
+    api_retry с учётом заголовка Retry-After.
+    """
+    return api_retry.call(fetch_api_answer, timestamp, headers, cache)
+
+
+def fetch_api_answer(timestamp, headers=None, cache=None):
+    """Один запрос к API Практикума с заголовками конкретного тенанта.
+
+    С кэшем ответа cache запрос становится условным, а ответ,
+    совпадающий с предыдущим, не разбирается. Пока API недоступен,
+    запросы не выполняются, а выбрасывается CircuitOpen.
+    """
+    if not api_breaker.allow():
+        raise CircuitOpen('API Практикума недоступен, опрос приостановлен')
+    import requests
+
     logger.debug('Запрашиваем информацию по API')
-    kwargs = {
-        'url': ENDPOINT,
-        'headers': HEADERS,
-        'params': {'from_date': timestamp}
-    }
+    started = time.perf_counter()
     try:
-        response = requests.get(**kwargs)
+        response = api_client.get(timestamp, headers, cache)
     except requests.RequestException:
+        API_ERRORS.inc()
+        api_breaker.record_failure()
         raise RequestError('Ошибка запроса к API Практикума')
     else:
-        if response.status_code != HTTPStatus.OK:
-            raise WrongStatusCode(f'Ошибка {response.status_code} '
-                                  'при получении ответа от API Практикума')
-        else:
-            logger.debug('Ответ от API получен')
-            return response.json()
+        api_response(response.status_code).inc()
+        record_api_status(response.status_code)
+        return decode_api_answer(response, timestamp, cache)
+    finally:
+        API_LATENCY.observe(time.perf_counter() - started)
+
+
+def record_api_status(status_code):
+    """Учитываем код ответа в выключателе API.
+
+    Сбоем сервера считаются только ответы 5xx: ошибки авторизации
+    одного тенанта не должны останавливать опрос остальных.
+    """
+    if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        api_breaker.record_failure()
+    else:
+        api_breaker.record_success()
 
 
+def decode_api_answer(response, timestamp, cache=None):
+    """Разбираем ответ API, если он изменился с прошлого опроса.
+
+    Для неизменившегося ответа возвращается ответ без работ, так что
+    проверка и разбор статусов ничего не делают.
+    """
+    if cache is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+        logger.debug('Ответ API не изменился')
+        return {'homeworks': [], 'current_date': timestamp}
+    if response.status_code != HTTPStatus.OK:
+        raise WrongStatusCode(
+            f'Ошибка {response.status_code} '
+            'при получении ответа от API Практикума',
+            response.status_code,
+            parse_retry_after(response.headers.get('Retry-After')),
+        )
+    if cache is not None:
+        current_date = cache.unchanged(response.headers, response.content)
+        if current_date is not None:
+            logger.debug('Ответ API не изменился')
+            return {'homeworks': [], 'current_date': current_date}
+    logger.debug('Ответ от API получен')
+    return response.json() if cache is None else loads(response.content)
+
+
+@count_exceptions(VALIDATION_FAILURES.labels('check_response'))
 def check_response(response):
     """Проверяем ответ от API Практикума."""
     logger.debug('Проверяем ответ')
-    if not isinstance(response, dict):
-        raise TypeError('Ответ API не является словарём')
-    if 'current_date' in response and 'homeworks' in response:
-        timestamp = response['current_date']
-        homeworks = response['homeworks']
-        if not isinstance(homeworks, list):
-            raise TypeError('В ответе API homeworks не является списком')
-        last_homework = None if len(homeworks) == 0 else homeworks[0]
-        return last_homework, timestamp
-    else:
-        raise KeyError('Содержание ответа от API не '
-                       'соответствует ожидаемому.')
+    result = validator.validate(response)
+    HEALTH.success(POLL)
+    return result
 
 
+@count_exceptions(VALIDATION_FAILURES.labels('parse_status'))
 def parse_status(homework):
     """Парсим статус домашней работы."""
     logger.debug('Парсим статус')
-    if 'homework_name' in homework and 'status' in homework:
-        homework_name = homework['homework_name']
-        homework_status = homework['status']
-        try:
-            verdict = HOMEWORK_VERDICTS[homework_status]
-        except KeyError:
-            raise KeyError('Hеожиданный статус домашней '
-                           f'работы, {homework_status}')
+    if not isinstance(homework, HomeworkRecord):
+        homework = validator.record(homework)
+    return validator.message(homework)
+
+
+def parse_changes(state, homeworks):
+    """Сообщения обо всех изменившихся работах из ответа API.
+
+    Индекс работ тенанта обновляется, только если все изменения
+    удалось разобрать. Статус, совпадающий с последним недавно
+    отправленным для этой работы, отбрасывается: так индекс, потерянный
+    при перезапуске, не повторяет уведомлений, а новый круг проверки
+    доходит до студента.
+    """
+    changes = state.homeworks.diff(homeworks)
+    messages = [parse_status(change.homework) for change in changes]
+    state.homeworks.commit(changes)
+    state.observe(changes[-1].new if changes else None)
+    now = time.time()
+    state.history.extend(
+        (now, change.key, change.homework.name, change.new)
+        for change in changes
+    )
+    fresh = []
+    for change, message in zip(changes, messages):
+        if state.sent.add(change.key, change.new):
+            fresh.append(message)
         else:
-            return ('Изменился статус проверки '
-                    f'работы "{homework_name}". {verdict}')
-    else:
-        raise KeyError('Не найден необходимый ключ в ответе API.')
+            logger.debug('Сообщение не изменилось.',
+                         extra={'homework': change.homework.name})
+    return fresh
+
+
+def error_message(state, error):
+    """Сообщение о сбое, если о сбое этого типа ещё не сообщали."""
+    if state.errors.add(type(error).__name__):
+        return f'Сбой в работе программы: {error}'
+    logger.debug('Сообщение не изменилось.')
+
+
+def clear_errors(state):
+    """Сбрасываем учтённые сбои после успешного опроса.
+
+    Если до этого тенанту сообщили о недоступности API, возвращается
+    сообщение о восстановлении.
+    """
+    recovered = CircuitOpen.__name__ in state.errors
+    state.errors.clear()
+    return [RECOVERED_MESSAGE] if recovered else []
+
+
+def interrupt_retries(stop):
+    """Паузы повторов запросов и отправок прерываются событием stop.
+
+    После остановки повторов нет, поэтому SIGTERM во время паузы не
+    ждёт исчерпания бюджета повторов.
+    """
+    for policy in (api_retry, telegram_retry):
+        policy.stop_on(stop)
+
+
+def require_tenants():
+    """Путь к реестру подписок; без него или без токена Telegram — выход.
+
+    Общая проверка точек входа, опрашивающих подписки.
+    """
+    path = settings.current.tenants_path
+    if not path or not TELEGRAM_TOKEN:
+        logger.critical('Не задан TENANTS_PATH или TELEGRAM_TOKEN.')
+        sys.exit('Не задан TENANTS_PATH или TELEGRAM_TOKEN')
+    return path
+
+
+def start_services(bot, chats):
+    """Запускаем перезагрузку настроек, метрики, проверку и команды чата.
+
+    Общий запуск для всех точек входа; chats — словарь chat_id → список
+    состояний тенантов этого чата для команд.
+    """
+    config = settings.current
+    if settings.path and settings.thread is None:
+        settings.start()
+    if config.metrics_port:
+        start_http_server(config.metrics_port)
+    if config.health_port:
+        start_health_server(config.health_port, lambda: RETRY_PERIOD,
+                            config.health_stale_factor)
+    if config.telegram_commands:
+        start_commands(bot, CommandService(chats, HOMEWORK_VERDICTS),
+                       webhook_url=config.webhook_url,
+                       webhook_port=config.webhook_port)
+
+
+def create_app(config=None):
+    """Готовим бота к запуску и возвращаем main.
+
+    Все побочные эффекты собраны здесь, а не в импорте модуля: чтение
+    .env, загрузка настроек из config (словарь в формате переменных
+    окружения, по умолчанию os.environ) и файла CONFIG_PATH, открытие
+    журнала истории HISTORY_PATH и запуск записи логов. Если настройки
+    не разбираются, работа завершается с описанием ошибки.
+    """
+    global applied, history_log, settings
+    if config is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        config = os.environ
+    path = config.get('CONFIG_PATH')
+    try:
+        settings = ConfigManager(lambda: load_config(config, path), path)
+    except (OSError, TypeError, ValueError) as error:
+        logger.critical('Не удалось загрузить настройки: %s', error)
+        sys.exit(f'Не удалось загрузить настройки: {error}')
+    current = settings.current
+    applied = None
+    apply_config(current)
+    if current.history_path and history_log is None:
+        history_log = HistoryLog(current.history_path)
+        atexit.register(history_log.close)
+    configure_logging(level=current.log_level, log_format=current.log_format,
+                      sampling=current.log_sampling)
+    return main
+
+
+def poll_once(bot, state):
+    """Один опрос API с отправкой новых статусов и ошибок."""
+    LOOP_LAG.observe(max(0.0, time.monotonic() - state.next_poll))
+    state.next_poll = time.monotonic() + RETRY_PERIOD
+    HEALTH.beat(RETRY_PERIOD)
+    if state.paused:
+        logger.debug('Опрос приостановлен командой /pause.')
+        return
+    try:
+        response = get_api_answer(state.timestamp)
+        homeworks, state.timestamp = check_response(response)
+        messages = parse_changes(state, homeworks)
+        if not messages:
+            logger.debug('Статус без изменений.')
+        for message in messages + clear_errors(state):
+            send_message(bot, message)
+
+    except Exception as error:
+        logger.error(error)
+        message = error_message(state, error)
+        if message:
+            send_message(bot, message)
 
 
 def main():
     """Основная логика работы бота."""
+    import telegram
+
     logger.debug('Бот запущен')
     if not check_tokens():
         logger.critical('Необходимый токен не найден.')
         sys.exit('Необходимый токен не найден, завершение работы')
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    last_message = ''
+    configure_bot(bot)
+    store = open_state_store(STATE_PATH)
+    state = restore_state(store, TELEGRAM_CHAT_ID, time.time(), 0,
+                          history_log)
+    state.next_poll = time.monotonic()
+    start_services(bot, {str(TELEGRAM_CHAT_ID): [state]})
 
-    while True:
+    with GracefulShutdown() as shutdown:
+        interrupt_retries(shutdown.requested)
         try:
-            response = get_api_answer(timestamp)
-            homework, timestamp = check_response(response)
-            if homework:
-                message = parse_status(homework)
-                if last_message != message:
-                    send_message(bot, message)
-                    last_message = message
-                else:
-                    logger.debug('Сообщение не изменилось.')
-            else:
-                logger.debug('Статус без изменений.')
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(error)
-            if last_message != message:
-                send_message(bot, message)
-                last_message = message
-
+            while True:
+                sync_config()
+                poll_once(bot, state)
+                checkpoint_state(store, TELEGRAM_CHAT_ID, state)
+                store.maybe_flush()
+                with shutdown.waiting():
+                    time.sleep(RETRY_PERIOD)
+        except ShutdownRequested:
+            logger.info('Бот остановлен.')
         finally:
-            time.sleep(RETRY_PERIOD)
+            store.close()
 
 
 if __name__ == '__main__':
-    main()
+    run = create_app()
+    run()
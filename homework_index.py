@@ -0,0 +1,47 @@
+from collections import namedtuple
+
+StatusChange = namedtuple('StatusChange', ('key', 'old', 'new', 'homework'))
+
+
+class HomeworkIndex:
+    """Последние известные статусы всех работ тенанта.
+
+    Работы приходят записями HomeworkRecord из check_response, ключ
+    работы — её id, а если его нет, название. diff сравнивает ответ
+    API с индексом за один проход и не меняет индекс: изменения
+    применяются через commit, когда все сообщения по ним разобраны.
+    """
+
+    __slots__ = ('statuses', 'names')
+
+    def __init__(self, statuses=None, names=None):
+        """Индекс строится из сохранённых словарей ключ -> статус и имя."""
+        self.statuses = dict(statuses or {})
+        self.names = dict(names or {})
+
+    def __len__(self):
+        """Число известных работ."""
+        return len(self.statuses)
+
+    def diff(self, homeworks):
+        """Изменения статусов в порядке от старых работ к новым.
+
+        API отдаёт работы начиная с самой свежей, поэтому список
+        обходится с конца. Если работа встречается несколько раз,
+        учитывается последнее по времени вхождение.
+        """
+        latest = {}
+        for homework in reversed(homeworks):
+            latest[homework.key] = homework
+        statuses = self.statuses
+        return [
+            StatusChange(key, statuses.get(key), homework.status, homework)
+            for key, homework in latest.items()
+            if homework.status != statuses.get(key)
+        ]
+
+    def commit(self, changes):
+        """Применяем изменения к индексу."""
+        for change in changes:
+            self.statuses[change.key] = change.new
+            self.names[change.key] = change.homework.name
@@ -0,0 +1,118 @@
+import atexit
+import json
+import logging
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+LOG_LEVEL = 'DEBUG'
+LOG_FORMAT = 'text'
+LOG_SAMPLING = ''
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+FIELDS = ('tenant', 'homework', 'latency')
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON со структурными полями.
+
+    Поля tenant, homework и latency передаются через extra и попадают
+    в запись, только если заданы.
+    """
+
+    def format(self, record):
+        """Строка JSON для записи."""
+        data = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def parse_sampling(value):
+    """Доли сохраняемых записей по уровням из строки 'DEBUG=0.1,INFO=1'."""
+    rates = {}
+    for item in filter(None, value.replace(' ', '').split(',')):
+        level, rate = item.split('=')
+        rates[logging.getLevelName(level.upper())] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускаем только долю записей каждого уровня."""
+
+    def __init__(self, rates, rng=None):
+        """Доли задаются словарём уровень -> число от 0 до 1."""
+        super().__init__()
+        self.rates = rates
+        self.rng = rng or random.Random()
+
+    def filter(self, record):
+        """Оставляем запись с вероятностью, заданной для её уровня."""
+        rate = self.rates.get(record.levelno, 1)
+        return rate >= 1 or self.rng.random() < rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler, который не форматирует запись в вызывающем потоке.
+
+    Аргументы сообщения подставляются уже в потоке QueueListener,
+    поэтому опрос платит только за постановку записи в очередь.
+    """
+
+    def prepare(self, record):
+        """Запись уходит в очередь как есть."""
+        return record
+
+
+def build_handler(stream=None, log_format=LOG_FORMAT, sampling=LOG_SAMPLING):
+    """Обработчик для логгеров и поток, который пишет записи в stream."""
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == 'json'
+                        else logging.Formatter(TEXT_FORMAT))
+    queue = SimpleQueue()
+    handler = DeferredQueueHandler(queue)
+    rates = parse_sampling(sampling)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    return handler, QueueListener(queue, output)
+
+
+_listener = None
+_loggers = []
+
+
+def register_logger(logger):
+    """Логгер модуля: до configure_logging пишет с уровня LOG_LEVEL."""
+    logger.setLevel(LOG_LEVEL)
+    _loggers.append(logger)
+
+
+def configure_logging(stream=None, level=LOG_LEVEL, log_format=LOG_FORMAT,
+                      sampling=LOG_SAMPLING):
+    """Подключаем запись логов к корневому логгеру.
+
+    Вызывается точкой входа после чтения настроек, а не при импорте:
+    уровень level получают логгеры модулей бота. Повторный вызов
+    ничего не меняет. Возвращает запущенный QueueListener.
+    """
+    global _listener
+    if _listener is None:
+        for logger in _loggers:
+            logger.setLevel(level.upper())
+        handler, _listener = build_handler(stream, log_format, sampling)
+        logging.getLogger().addHandler(handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,221 @@
+import bisect
+import threading
+from functools import lru_cache, wraps
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LAG_BUCKETS = (0.1, 1, 5, 15, 60, 300, 600)
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание и дочерние серии по меткам.
+
+    Серия для набора меток создаётся один раз при первом обращении,
+    поэтому запись значения не создаёт новых объектов.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        """Создаём метрику и регистрируем её."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Серия метрики для заданных значений меток."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def collect(self):
+        """Строки метрики в текстовом формате Prometheus."""
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+        for values, child in sorted(self._children.items()):
+            yield from child.collect(self, values)
+
+
+class _CounterChild:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def collect(self, metric, values):
+        labels = _format_labels(metric.labelnames, values)
+        yield f'{metric.name}{labels} {self.value}'
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        """Увеличиваем счётчик без меток."""
+        self._default.inc(amount)
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def collect(self, metric, values):
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            le = '+Inf' if bound == float('inf') else repr(float(bound))
+            labels = _format_labels(metric.labelnames, values, f'le="{le}"')
+            yield f'{metric.name}_bucket{labels} {total}'
+        labels = _format_labels(metric.labelnames, values)
+        yield f'{metric.name}_sum{labels} {self.sum}'
+        yield f'{metric.name}_count{labels} {total}'
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS, registry=None):
+        """Границы корзин задаются один раз при создании."""
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        """Записываем наблюдение в гистограмму без меток."""
+        self._default.observe(value)
+
+
+class Registry:
+    """Набор метрик, отдаваемых одним HTTP-эндпоинтом."""
+
+    def __init__(self):
+        """Пустой реестр."""
+        self.metrics = []
+
+    def register(self, metric):
+        """Добавляем метрику в реестр."""
+        self.metrics.append(metric)
+
+    def exposition(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def count_exceptions(counter):
+    """Декоратор: считаем исключения, выброшенные функцией."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                counter.inc()
+                raise
+        return wrapper
+    return decorator
+
+
+def start_http_server(port, registry=REGISTRY, host=''):
+    """Отдаём метрики по HTTP из отдельного потока."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.exposition().encode('utf-8')
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics',
+                     daemon=True).start()
+    return server
+
+
+API_LATENCY = Histogram(
+    'homework_api_request_seconds', 'Время ответа API Практикума.'
+)
+API_RESPONSES = Counter(
+    'homework_api_responses_total', 'Ответы API Практикума по коду.',
+    ('code',)
+)
+API_ERRORS = API_RESPONSES.labels('error')
+VALIDATION_FAILURES = Counter(
+    'homework_validation_failures_total',
+    'Ответы API, не прошедшие проверку.', ('stage',)
+)
+TELEGRAM_LATENCY = Histogram(
+    'homework_telegram_send_seconds', 'Время отправки сообщения в Telegram.'
+)
+TELEGRAM_FAILURES = Counter(
+    'homework_telegram_failures_total', 'Неудачные отправки в Telegram.'
+)
+LOOP_LAG = Histogram(
+    'homework_loop_lag_seconds',
+    'Опоздание опроса относительно запланированного момента.',
+    buckets=LAG_BUCKETS,
+)
+
+
+@lru_cache(maxsize=None)
+def api_response(status):
+    """Серия API_RESPONSES для кода ответа status.
+
+    Серии кешируются по коду: на каждый запрос не собираются метки и
+    не ищется серия в словаре метрики.
+    """
+    return API_RESPONSES.labels(str(status))
@@ -0,0 +1,270 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from telegram.error import BadRequest, RetryAfter, Unauthorized
+
+from health import DELIVERY, HEALTH
+from logs import register_logger
+from metrics import TELEGRAM_FAILURES, TELEGRAM_LATENCY
+
+logger = logging.getLogger(__name__)
+register_logger(logger)
+
+GLOBAL_RATE = 30
+CHAT_INTERVAL = 1
+MAX_ATTEMPTS = 5
+BACKOFF = 1
+MAX_MESSAGE_LENGTH = 4096
+SEPARATOR = '\n\n'
+# Ошибки, которые не исправятся повтором: неверный запрос или бот
+# заблокирован пользователем.
+PERMANENT_ERRORS = (BadRequest, Unauthorized)
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, запас capacity."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity=None, now=0.0):
+        """Корзина создаётся полной."""
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Сколько секунд ждать до появления токена."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        """Забираем один токен."""
+        self._refill(now)
+        self.tokens -= 1
+
+
+class ChatQueue:
+    """Неотправленные сообщения одного чата."""
+
+    __slots__ = ('messages', 'not_before', 'attempts')
+
+    def __init__(self):
+        """Пустая очередь, готовая к отправке."""
+        self.messages = []
+        self.not_before = 0.0
+        self.attempts = 0
+
+    def batch(self):
+        """Склеиваем накопленные сообщения в одно, не длиннее лимита.
+
+        Возвращает текст и число вошедших в него сообщений.
+        """
+        text, count = self.messages[0][:MAX_MESSAGE_LENGTH], 1
+        for message in self.messages[1:]:
+            candidate = f'{text}{SEPARATOR}{message}'
+            if len(candidate) > MAX_MESSAGE_LENGTH:
+                break
+            text, count = candidate, count + 1
+        return text, count
+
+
+class Outbox:
+    """Очередь исходящих сообщений Telegram с фоновым обработчиком.
+
+    Сообщения для одного чата, накопившиеся до отправки, склеиваются
+    в одно. Частота отправки ограничена глобально и для каждого чата,
+    RetryAfter от Telegram приостанавливает отправку на указанное
+    время, а временные ошибки повторяются с экспоненциальной паузой.
+    """
+
+    def __init__(self, bot, global_rate=GLOBAL_RATE,
+                 chat_interval=CHAT_INTERVAL, max_attempts=MAX_ATTEMPTS,
+                 backoff=BACKOFF, clock=time.monotonic):
+        """Создаём пустую очередь."""
+        self.bot = bot
+        self.chat_interval = chat_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.clock = clock
+        self.bucket = TokenBucket(global_rate, now=clock())
+        self.paused_until = 0.0
+        self.chats = {}
+        # Чаты с сообщениями в куче по времени, когда им можно отправлять,
+        # и опустевшие чаты, которые удалим по истечении интервала.
+        self._ready = []
+        self._idle = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._wakeup = False
+
+    def __len__(self):
+        """Число сообщений, ожидающих отправки."""
+        with self._condition:
+            return sum(len(chat.messages) for chat in self.chats.values())
+
+    def put(self, chat_id, message):
+        """Ставим сообщение в очередь чата."""
+        with self._condition:
+            chat = self.chats.setdefault(chat_id, ChatQueue())
+            chat.messages.append(message)
+            if len(chat.messages) == 1:
+                self._schedule(self._ready, chat_id, chat)
+            self._wakeup = True
+            self._condition.notify()
+
+    def _schedule(self, heap, chat_id, chat):
+        """Кладём чат в кучу с моментом, когда ему можно отправлять."""
+        heapq.heappush(heap, (chat.not_before, next(self._order), chat_id))
+
+    def _forget_idle(self, now):
+        """Удаляем пустые чаты, у которых истёк интервал отправки."""
+        while self._idle and self._idle[0][0] <= now:
+            _, _, chat_id = heapq.heappop(self._idle)
+            chat = self.chats.get(chat_id)
+            if chat is not None and not chat.messages and (
+                chat.not_before <= now
+            ):
+                del self.chats[chat_id]
+
+    def _take_ready(self, now):
+        """Выбираем чат, которому можно отправить сообщение сейчас.
+
+        Возвращает задание на отправку и момент следующей проверки.
+        """
+        self._forget_idle(now)
+        while self._ready:
+            not_before, _, chat_id = self._ready[0]
+            chat = self.chats.get(chat_id)
+            if chat is None or not chat.messages or (
+                chat.not_before != not_before
+            ):
+                # Устаревшая запись: чат уже перепланирован или опустел.
+                heapq.heappop(self._ready)
+                continue
+            ready = max(not_before, self.paused_until)
+            if ready > now:
+                return None, ready
+            delay = self.bucket.delay(now)
+            if delay:
+                return None, now + delay
+            self.bucket.consume(now)
+            heapq.heappop(self._ready)
+            # Пока сообщение в пути, чат не выбирается повторно.
+            chat.not_before = float('inf')
+            return (chat_id, chat) + chat.batch(), None
+        return None, None
+
+    def _deliver(self, chat_id, chat, text, count):
+        """Отправляем пачку; вызывается без блокировки очереди."""
+        retry_after = error = None
+        started = time.perf_counter()
+        try:
+            logger.debug('Пытаемся отправить сообщение: %s', text,
+                         extra={'tenant': chat_id})
+            self.bot.send_message(chat_id, text)
+        except RetryAfter as exc:
+            retry_after = exc.retry_after
+        except Exception as exc:
+            error = exc
+        else:
+            HEALTH.success(DELIVERY)
+            logger.debug('Сообщение отправлено успешно: %s', text,
+                         extra={'tenant': chat_id})
+        TELEGRAM_LATENCY.observe(time.perf_counter() - started)
+        if retry_after is not None or error is not None:
+            TELEGRAM_FAILURES.inc()
+        with self._condition:
+            now = self.clock()
+            if retry_after is not None:
+                logger.warning('Telegram просит подождать %s с', retry_after)
+                self.paused_until = chat.not_before = now + retry_after
+                self._schedule(self._ready, chat_id, chat)
+                return
+            if error is not None and not isinstance(error, PERMANENT_ERRORS):
+                chat.attempts += 1
+                if chat.attempts < self.max_attempts:
+                    chat.not_before = now + self.backoff * 2 ** (
+                        chat.attempts - 1
+                    )
+                    HEALTH.retrying(DELIVERY, chat.attempts,
+                                    chat.not_before - now, error)
+                    self._schedule(self._ready, chat_id, chat)
+                    logger.warning('Повторим отправку в чат %s: %s',
+                                   chat_id, error, extra={'tenant': chat_id})
+                    return
+            if error is not None:
+                logger.error('Отправка сообщения не удалась: %s', text,
+                             extra={'tenant': chat_id})
+            del chat.messages[:count]
+            chat.attempts = 0
+            chat.not_before = now + self.chat_interval
+            self._schedule(self._ready if chat.messages else self._idle,
+                           chat_id, chat)
+
+    def drain_once(self):
+        """Отправляем всё, что разрешают лимиты.
+
+        Возвращает секунды до следующей возможной отправки или None,
+        если отправлять нечего.
+        """
+        while True:
+            with self._condition:
+                job, wake = self._take_ready(self.clock())
+            if job is None:
+                return None if wake is None else max(0.0, wake - self.clock())
+            self._deliver(*job)
+
+    def run(self):
+        """Цикл фонового обработчика до вызова stop()."""
+        while True:
+            delay = self.drain_once()
+            with self._condition:
+                if self._stopped:
+                    return
+                if not self._wakeup:
+                    self._condition.wait(delay)
+                self._wakeup = False
+
+    def start(self):
+        """Запускаем фоновый поток отправки."""
+        self._thread = threading.Thread(target=self.run, name='outbox',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Останавливаем фоновый поток."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self, timeout):
+        """Останавливаем фоновый поток и досылаем очередь за timeout секунд.
+
+        Возвращает число сообщений, которые не успели отправить.
+        """
+        deadline = self.clock() + timeout
+        self.stop(timeout)
+        while len(self):
+            delay = self.drain_once()
+            if delay is None:
+                break
+            if self.clock() + delay > deadline:
+                break
+            time.sleep(delay)
+        left = len(self)
+        if left:
+            logger.error('Не отправлено сообщений при остановке: %d', left)
+        return left
@@ -0,0 +1,134 @@
+import argparse
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import homework
+from api_client import PracticumClient
+from config import API_WORKERS, TELEGRAM_WORKERS
+from engine import PollingEngine
+from fake_server import (HOMEWORKS_PATH, FakeBackend, FakeServerConfig,
+                         ServerThread)
+from pool_engine import ThreadedPollingEngine
+from tenants import Tenant
+
+TENANT_COUNTS = (1, 100, 1000)
+
+BenchmarkRow = namedtuple('BenchmarkRow',
+                          ('tenants', 'serial', 'polling', 'threaded'))
+
+
+class SlowBot:
+    """Подмена telegram.Bot с задержкой на каждую отправку."""
+
+    def __init__(self, latency):
+        """Задержка отправки в секундах."""
+        self.latency = latency
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id, text):
+        """Ждём latency секунд и учитываем сообщение."""
+        time.sleep(self.latency)
+        with self._lock:
+            self.sent += 1
+
+
+def make_tenants(count):
+    """Реестр из count тенантов с разными токенами."""
+    tenants = (Tenant(f'token-{number:05d}', str(number))
+               for number in range(count))
+    return {tenant.key: tenant for tenant in tenants}
+
+
+def poll_round(engine):
+    """Один опрос всех тенантов; возвращает секунды до его окончания.
+
+    Опрос идёт с начала истории, чтобы каждый тенант получил работы.
+    """
+    for state in engine.states.values():
+        state.timestamp = 0
+    started = time.perf_counter()
+    engine.poll_due(list(engine.tenants))
+    return time.perf_counter() - started
+
+
+def compare(count, telegram_latency, api_workers, telegram_workers):
+    """Время одного опроса count тенантов последовательно и в пулах.
+
+    Для пулового опроса возвращается и время самого опроса, и время
+    до окончания всех отправок в Telegram.
+    """
+    tenants = make_tenants(count)
+    serial = poll_round(PollingEngine(SlowBot(telegram_latency), tenants))
+    engine = ThreadedPollingEngine(
+        SlowBot(telegram_latency), tenants, api_workers=api_workers,
+        telegram_workers=telegram_workers,
+    )
+    started = time.perf_counter()
+    polling = poll_round(engine)
+    engine.close()
+    return BenchmarkRow(count, serial, polling,
+                        time.perf_counter() - started)
+
+
+def run_benchmark(counts=TENANT_COUNTS, config=None, telegram_latency=0.02,
+                  api_workers=API_WORKERS,
+                  telegram_workers=TELEGRAM_WORKERS):
+    """Сравниваем PollingEngine и ThreadedPollingEngine на поддельном API.
+
+    Поддельный сервер отвечает с задержкой из config, а статус работы
+    уже известен, поэтому каждый тенант получает сообщение при опросе.
+    """
+    config = config or FakeServerConfig(latency=0.02, homeworks=1,
+                                        change_interval=1)
+    server = ServerThread(FakeBackend(config)).start()
+    saved = homework.api_client
+    homework.api_client = PracticumClient(
+        server.url + HOMEWORKS_PATH, pool_size=api_workers
+    )
+    try:
+        # Ждём, пока все работы поддельного сервера получат статус.
+        time.sleep(config.change_interval)
+        return [compare(count, telegram_latency, api_workers,
+                        telegram_workers) for count in counts]
+    finally:
+        homework.api_client.close()
+        homework.api_client = saved
+        server.stop()
+
+
+def format_rows(rows):
+    """Таблица результатов сравнения."""
+    lines = ['тенантов  подряд, с  пул: опрос, с  пул: всего, с  ускорение']
+    for row in rows:
+        lines.append(
+            f'{row.tenants:>8}  {row.serial:>9.2f}  {row.polling:>12.2f}  '
+            f'{row.threaded:>12.2f}  {row.serial / row.threaded:>8.1f}x'
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    """Сравнение последовательного и пулового опроса."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--tenants', type=int, nargs='+',
+                        default=TENANT_COUNTS)
+    parser.add_argument('--api-latency', type=float, default=0.02)
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--api-workers', type=int, default=API_WORKERS)
+    parser.add_argument('--telegram-workers', type=int,
+                        default=TELEGRAM_WORKERS)
+    args = parser.parse_args()
+    homework.logger.setLevel(logging.WARNING)
+    print(format_rows(run_benchmark(
+        args.tenants,
+        FakeServerConfig(latency=args.api_latency, homeworks=1,
+                         change_interval=1),
+        args.telegram_latency, args.api_workers, args.telegram_workers,
+    )))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import logging
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import telegram
+
+import homework
+from adaptive import polling_policy
+from config import API_WORKERS, TELEGRAM_WORKERS
+from commands import chat_states
+from engine import PollingEngine
+from logs import register_logger
+from metrics import LOOP_LAG
+from state_store import open_state_store
+from tenants import load_tenants
+
+logger = logging.getLogger(__name__)
+register_logger(logger)
+
+
+class ThreadedPollingEngine(PollingEngine):
+    """Опрос подписок с блокирующим вводом-выводом в пулах потоков.
+
+    Запросы к API Практикума выполняются в пуле из api_workers потоков,
+    а проверка ответа и разбор статусов — в вызывающем потоке, поэтому
+    состояние тенантов меняется только в нём. Отправка в Telegram идёт
+    через отдельный пул: медленный Telegram не задерживает опрос.
+    Сообщения одного опроса отправляются по порядку одной задачей.
+    """
+
+    def __init__(self, bot, tenants, api_workers=API_WORKERS,
+                 telegram_workers=TELEGRAM_WORKERS, **kwargs):
+        """Создаём пулы потоков; остальные аргументы как у PollingEngine."""
+        super().__init__(bot, tenants, **kwargs)
+        self.api_pool = ThreadPoolExecutor(api_workers,
+                                           thread_name_prefix='api')
+        self.telegram_pool = ThreadPoolExecutor(
+            telegram_workers, thread_name_prefix='telegram'
+        )
+
+    def deliver(self, tenant, messages):
+        """Отправляем сообщения тенанта в пуле потоков Telegram."""
+        if self.outbox is not None or not messages:
+            super().deliver(tenant, messages)
+            return
+        self.telegram_pool.submit(super().deliver, tenant, messages)
+
+    def poll_due(self, keys):
+        """Опрашиваем тенантов keys параллельно в пуле потоков API."""
+        futures = {}
+        for key in keys:
+            if self.stopped.is_set():
+                break
+            tenant, state = self.tenants[key], self.states[key]
+            LOOP_LAG.observe(max(0.0, self.clock() - state.next_poll))
+            if state.paused:
+                self.poll(tenant, state)
+                self.reschedule(key)
+                continue
+            futures[self.api_pool.submit(self.fetch, tenant, state)] = key
+        for future in as_completed(futures):
+            key = futures[future]
+            self.complete(self.tenants[key], self.states[key], future.result)
+            self.reschedule(key)
+
+    def close(self, timeout=None):
+        """Дожидаемся начатых запросов и отправок и сохраняем состояние."""
+        if timeout is None:
+            timeout = homework.settings.current.shutdown_timeout
+        started = time.monotonic()
+        self.api_pool.shutdown(wait=True)
+        self.telegram_pool.shutdown(wait=True)
+        super().close(max(0.0, timeout - (time.monotonic() - started)))
+
+
+def main():
+    """Запуск опроса подписок из TENANTS_PATH в пулах потоков."""
+    tenants = load_tenants(homework.require_tenants())
+    logger.debug('Загружено подписок: %d', len(tenants))
+    bot = homework.configure_bot(
+        telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    )
+    config = homework.settings.current
+    # Каждому потоку API — своё keep-alive соединение в пуле requests.
+    homework.api_client.pool_size = max(homework.api_client.pool_size,
+                                        config.api_workers)
+    engine = ThreadedPollingEngine(
+        bot, tenants, config.api_workers, config.telegram_workers,
+        policy=polling_policy(config.adaptive_polling),
+        store=open_state_store(homework.STATE_PATH),
+        history=homework.history_log,
+    )
+    homework.start_services(bot, chat_states(engine.tenants, engine.states))
+    homework.interrupt_retries(engine.stopped)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, engine.stop)
+    engine.run_forever()
+
+
+if __name__ == '__main__':
+    homework.create_app()
+    main()
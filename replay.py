@@ -0,0 +1,231 @@
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+
+import homework
+from tenants import TenantState
+
+STAGES = ('get_api_answer', 'check_response', 'parse_status', 'send_message')
+PERCENTILES = (50, 95, 99)
+SYNTHETIC_STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+ReplayReport = namedtuple(
+    'ReplayReport',
+    ('responses', 'messages', 'errors', 'elapsed', 'peak_memory', 'timings'),
+)
+
+
+def percentile(values, rank):
+    """Перцентиль rank (0–100) по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, -(-rank * len(ordered) // 100) - 1)
+    return ordered[index]
+
+
+def load_recording(path):
+    """Читаем записанные ответы API из JSONL-файла.
+
+    Каждая строка — объект с полями at (секунды виртуального времени),
+    status_code (по умолчанию 200), headers и body (тело ответа).
+    """
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_recording(path, records):
+    """Сохраняем ответы API в JSONL-файл."""
+    with open(path, 'w', encoding='utf-8') as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def synthetic_recording(polls, homeworks=5, period=homework.RETRY_PERIOD,
+                        seed=0):
+    """Поток ответов API, в котором работы постепенно проверяются."""
+    rng = random.Random(seed)
+    steps = [0] * homeworks
+    records = []
+    for poll in range(polls):
+        changed = []
+        for number in range(homeworks):
+            if (steps[number] < len(SYNTHETIC_STATUSES) - 1
+                    and rng.random() < 0.1):
+                steps[number] += 1
+                changed.append({
+                    'id': number,
+                    'homework_name': f'student__hw{number:02d}.zip',
+                    'status': SYNTHETIC_STATUSES[steps[number]],
+                    'lesson_name': f'Спринт {number}',
+                    'reviewer_comment': 'Замечания в коде.',
+                })
+        records.append({'at': poll * period, 'status_code': 200,
+                        'body': {'homeworks': changed,
+                                 'current_date': poll * period}})
+    return records
+
+
+class VirtualClock:
+    """Виртуальное время: sleep сдвигает часы без ожидания."""
+
+    def __init__(self, now=0.0):
+        """Часы начинают с момента now."""
+        self.now = now
+
+    def __call__(self):
+        """Текущее виртуальное время."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Сдвигаем часы вперёд."""
+        self.now += seconds
+
+
+class ReplayResponse:
+    """Ответ API, восстановленный из записи."""
+
+    def __init__(self, record):
+        """Готовим код, заголовки и тело ответа."""
+        self.status_code = record.get('status_code', 200)
+        self.headers = record.get('headers', {})
+        self.content = json.dumps(record.get('body', {})).encode('utf-8')
+
+    def json(self):
+        """Тело ответа в виде словаря."""
+        return json.loads(self.content)
+
+
+class ReplaySession:
+    """Подмена requests.Session: отдаёт текущий записанный ответ.
+
+    Повторные запросы по политике повторов получают ту же запись.
+    """
+
+    def __init__(self):
+        """Записи подставляет run_replay."""
+        self.current = None
+
+    def get(self, **kwargs):
+        """Ответ из текущей записи."""
+        return ReplayResponse(self.current)
+
+    def close(self):
+        """Закрывать нечего."""
+
+
+class ReplayBot:
+    """Подмена telegram.Bot: считает отправленные сообщения."""
+
+    def __init__(self):
+        """Ни одного сообщения ещё не отправлено."""
+        self.sent = 0
+
+    def send_message(self, chat_id, text):
+        """Учитываем сообщение без обращения к Telegram."""
+        self.sent += 1
+
+
+@contextmanager
+def offline(session, clock):
+    """Подменяем сеть, паузы повторов и часы выключателя."""
+    client = homework.api_client
+    saved = (client._session, homework.api_retry.sleep,
+             homework.telegram_retry.sleep, homework.api_breaker.clock)
+    client._session = session
+    homework.api_retry.sleep = homework.telegram_retry.sleep = clock.sleep
+    homework.api_breaker.clock = clock
+    try:
+        yield
+    finally:
+        (client._session, homework.api_retry.sleep,
+         homework.telegram_retry.sleep, homework.api_breaker.clock) = saved
+
+
+def timed(timings, stage, func, *args):
+    """Вызываем func и записываем время её работы в timings[stage]."""
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings[stage].append(time.perf_counter() - started)
+
+
+def replay_record(state, bot, timings):
+    """Прогоняем один ответ API через все стадии обработки."""
+    response = timed(timings, 'get_api_answer', homework.get_api_answer,
+                     state.timestamp)
+    homeworks, state.timestamp = timed(
+        timings, 'check_response', homework.check_response, response
+    )
+    messages = timed(timings, 'parse_status', homework.parse_changes,
+                     state, homeworks)
+    for message in messages:
+        timed(timings, 'send_message', homework.send_message, bot, message)
+
+
+def run_replay(records):
+    """Прогоняем записанные ответы через цепочку обработки бота.
+
+    Сеть и Telegram подменены, время виртуальное. Возвращает
+    ReplayReport с пропускной способностью, временем стадий и пиковой
+    памятью.
+    """
+    session, clock, bot = ReplaySession(), VirtualClock(), ReplayBot()
+    state = TenantState(0)
+    timings = {stage: [] for stage in STAGES}
+    errors = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    with offline(session, clock):
+        for record in records:
+            clock.now = max(clock.now, record.get('at', clock.now))
+            session.current = record
+            try:
+                replay_record(state, bot, timings)
+            except Exception:
+                errors += 1
+    elapsed = time.perf_counter() - started
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return ReplayReport(len(records), bot.sent, errors, elapsed,
+                        peak_memory, timings)
+
+
+def format_report(report):
+    """Отчёт о прогоне в виде текста."""
+    throughput = report.responses / report.elapsed if report.elapsed else 0
+    lines = [
+        f'Ответов: {report.responses}, сообщений: {report.messages}, '
+        f'ошибок: {report.errors}',
+        f'Пропускная способность: {throughput:.0f} ответов/с',
+        f'Пиковая память: {report.peak_memory / 1024:.1f} КиБ',
+    ]
+    for stage in STAGES:
+        values = report.timings[stage]
+        quantiles = ', '.join(
+            f'p{rank} {percentile(values, rank) * 1e6:.0f} мкс'
+            for rank in PERCENTILES
+        )
+        lines.append(f'{stage}: {len(values)} вызовов, {quantiles}')
+    return '\n'.join(lines)
+
+
+def main():
+    """Прогон записи из файла или синтетического потока ответов."""
+    if len(sys.argv) > 1:
+        records = load_recording(sys.argv[1])
+    else:
+        records = synthetic_recording(10000)
+    # Отладочный лог на каждый ответ заглушил бы сам отчёт.
+    homework.logger.setLevel(logging.WARNING)
+    print(format_report(run_replay(records)))
+
+
+if __name__ == '__main__':
+    main()
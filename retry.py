@@ -0,0 +1,159 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+from exceptions import ShutdownRequested
+
+MAX_ATTEMPTS = 4
+BASE_DELAY = 1
+MAX_DELAY = 30
+MAX_ELAPSED = 120
+RETRY_STATUSES = frozenset((
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+))
+
+
+def parse_retry_after(value, now=None):
+    """Секунды ожидания из заголовка Retry-After.
+
+    Заголовок содержит число секунд или HTTP-дату; для пустого или
+    некорректного значения возвращается None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = datetime.now(timezone.utc) if now is None else now
+    return max(0.0, (moment - now).total_seconds())
+
+
+class RetryPolicy:
+    """Повтор вызова при временных сбоях.
+
+    Повторяются только исключения из retry_on, кроме give_up_on, и
+    только если код ответа из status_code исключения временный.
+    Классы исключений можно передать функцией, возвращающей кортеж:
+    тогда их модуль импортируется только при первом сбое. Пауза
+    перед повтором — full jitter: случайная от нуля до base·2^попытка,
+    не больше max_delay. Если исключение несёт retry_after, ждём
+    столько, сколько просит сервер. Повторы прекращаются после
+    max_attempts попыток или когда пауза вышла бы за max_elapsed
+    секунд от первого вызова. Если задано событие stop, после его
+    установки повторов нет: вызов завершается ShutdownRequested.
+    """
+
+    def __init__(self, retry_on, give_up_on=(), max_attempts=MAX_ATTEMPTS,
+                 base=BASE_DELAY, max_delay=MAX_DELAY,
+                 max_elapsed=MAX_ELAPSED, clock=time.monotonic,
+                 sleep=time.sleep, rng=None, listener=None, stop=None):
+        """Запоминаем классификацию исключений и бюджет повторов."""
+        self.retry_on = retry_on
+        self.give_up_on = give_up_on
+        self.max_attempts = max_attempts
+        self.base = base
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.listener = listener
+        self.stop = stop
+
+    def stop_on(self, stop, sleep=None):
+        """Прерываем паузы событием остановки stop.
+
+        По умолчанию пауза — stop.wait, которую установка события
+        заканчивает сразу.
+        """
+        self.stop = stop
+        self.sleep = sleep or stop.wait
+
+    def stopping(self):
+        """Запрошена ли остановка."""
+        return self.stop is not None and self.stop.is_set()
+
+    def retryable(self, error):
+        """Стоит ли повторять вызов после этого исключения."""
+        if not isinstance(self.retry_on, tuple):
+            self.retry_on = self.retry_on()
+        if not isinstance(self.give_up_on, tuple):
+            self.give_up_on = self.give_up_on()
+        if isinstance(error, self.give_up_on):
+            return False
+        if not isinstance(error, self.retry_on):
+            return False
+        status_code = getattr(error, 'status_code', None)
+        return status_code is None or status_code in RETRY_STATUSES
+
+    def delay(self, attempt, error):
+        """Пауза перед повтором номер attempt (с нуля)."""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return float(retry_after)
+        return self.rng.uniform(
+            0, min(self.max_delay, self.base * 2 ** attempt)
+        )
+
+    def backoff(self, attempt, started, error):
+        """Пауза перед повтором после сбоя или None, если не повторяем."""
+        if attempt + 1 >= self.max_attempts or not self.retryable(error):
+            return None
+        delay = self.delay(attempt, error)
+        if self.clock() - started + delay > self.max_elapsed:
+            return None
+        if self.listener is not None:
+            self.listener(self, error, attempt, delay)
+        return delay
+
+    def call(self, func, *args, **kwargs):
+        """Вызываем func, повторяя её при временных сбоях."""
+        started = self.clock()
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                delay = self.backoff(attempt, started, error)
+                if delay is None:
+                    raise
+                self.sleep(delay)
+                if self.stopping():
+                    raise ShutdownRequested() from error
+                attempt += 1
+
+
+class AsyncRetryPolicy(RetryPolicy):
+    """RetryPolicy для корутин: пауза ожидается через asyncio.sleep."""
+
+    def __init__(self, retry_on, sleep=asyncio.sleep, **kwargs):
+        """Аргументы как у RetryPolicy, sleep — корутинная функция."""
+        super().__init__(retry_on, sleep=sleep, **kwargs)
+
+    async def call(self, func, *args, **kwargs):
+        """Ожидаем func, повторяя её при временных сбоях."""
+        started = self.clock()
+        attempt = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as error:
+                delay = self.backoff(attempt, started, error)
+                if delay is None:
+                    raise
+                await self.sleep(delay)
+                if self.stopping():
+                    raise ShutdownRequested() from error
+                attempt += 1
@@ -0,0 +1,86 @@
+import heapq
+import itertools
+import math
+import random
+
+JITTER = 0.05
+
+
+def next_deadline(deadline, period, now):
+    """Следующий дедлайн без накопления дрейфа.
+
+    Дедлайны идут с шагом period от исходной фазы; пропущенные из-за
+    долгого опроса интервалы не навёрстываются пачкой, а пропускаются.
+    """
+    deadline += period
+    if deadline <= now:
+        deadline += period * math.ceil((now - deadline) / period)
+    return deadline
+
+
+class Scheduler:
+    """Очередь опросов по дедлайнам на основе кучи.
+
+    Первый опрос каждого ключа равномерно разносится по его интервалу,
+    а к моменту срабатывания добавляется небольшой случайный сдвиг,
+    который не влияет на последующие дедлайны.
+    """
+
+    def __init__(self, jitter=JITTER, rng=None):
+        """Случайный сдвиг jitter задаётся долей интервала опроса."""
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        """Число запланированных ключей."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Запланирован ли ключ."""
+        return key in self._entries
+
+    def _push(self, key, deadline, period):
+        fire_at = deadline + self.rng.uniform(0, self.jitter * period)
+        entry = [fire_at, next(self._counter), key, deadline, period]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        return fire_at
+
+    def add(self, key, period, now):
+        """Добавляем ключ со случайной фазой внутри интервала."""
+        return self._push(key, now + self.rng.uniform(0, period), period)
+
+    def remove(self, key):
+        """Убираем ключ; запись в куче отбрасывается лениво."""
+        self._entries.pop(key, None)
+
+    def reschedule(self, key, now, period=None):
+        """Планируем следующий опрос ключа после срабатывания."""
+        _, _, _, deadline, old_period = self._entries[key]
+        period = period or old_period
+        return self._push(key, next_deadline(deadline, period, now), period)
+
+    def _is_live(self, entry):
+        key = entry[2]
+        return key is not None and self._entries.get(key) is entry
+
+    def _discard_stale(self):
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def next_fire(self):
+        """Момент ближайшего срабатывания или None."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Ключи, чей момент срабатывания наступил, в порядке дедлайнов."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                due.append(entry[2])
+        return due
@@ -0,0 +1,372 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import telegram
+
+import homework
+from adaptive import polling_policy
+from engine import PollingEngine
+from logs import register_logger
+from outbox import Outbox
+from state_store import open_state_store
+from tenants import SQLITE_SUFFIXES, load_tenants
+
+logger = logging.getLogger(__name__)
+register_logger(logger)
+
+RING_REPLICAS = 100
+HEARTBEAT = 15
+LEASE_TTL = 60
+RESTART_DELAY = 1
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS workers '
+    '(worker TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS leases '
+    '(tenant TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL)',
+)
+
+
+def ring_hash(value):
+    """Позиция строки на кольце хешей."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big'
+    )
+
+
+class HashRing:
+    """Консистентное хеширование ключей по узлам.
+
+    Каждый узел занимает replicas точек на кольце, ключ принадлежит
+    узлу ближайшей точки по часовой стрелке. Добавление или удаление
+    одного из N узлов переносит около 1/N ключей.
+    """
+
+    def __init__(self, nodes, replicas=RING_REPLICAS):
+        """Расставляем точки узлов на кольце."""
+        points = sorted((ring_hash(f'{node}#{number}'), node)
+                        for node in set(nodes) for number in range(replicas))
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def owner(self, key):
+        """Узел, которому принадлежит ключ, или None для пустого кольца."""
+        if not self.nodes:
+            return None
+        index = bisect.bisect(self.hashes, ring_hash(key))
+        return self.nodes[index % len(self.nodes)]
+
+
+class LeaseTable:
+    """Участники и аренда тенантов в общей базе SQLite.
+
+    Воркер отмечается в таблице workers и опрашивает тенанта, только
+    пока держит его аренду в таблице leases. Аренда продлевается на
+    каждом такте и истекает через ttl секунд, если воркер пропал.
+    Держатель аренды — идентификатор процесса, поэтому два процесса
+    с одним именем воркера не получат одного тенанта.
+    """
+
+    def __init__(self, path, worker, ttl=LEASE_TTL, clock=time.time):
+        """Открываем базу и создаём таблицы."""
+        self.worker = worker
+        self.holder = f'{worker}:{uuid.uuid4().hex}'
+        self.ttl = ttl
+        self.clock = clock
+        self.connection = sqlite3.connect(path, timeout=30)
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def heartbeat(self):
+        """Продлеваем участие воркера."""
+        with self.connection:
+            self.connection.execute(
+                'INSERT INTO workers (worker, holder, expires) '
+                'VALUES (?, ?, ?) ON CONFLICT (worker) DO UPDATE SET '
+                'holder = excluded.holder, expires = excluded.expires',
+                (self.worker, self.holder, self.clock() + self.ttl)
+            )
+
+    def members(self):
+        """Имена живых воркеров."""
+        rows = self.connection.execute(
+            'SELECT worker FROM workers WHERE expires >= ?', (self.clock(),)
+        )
+        return [worker for worker, in rows]
+
+    def acquire(self, tenants):
+        """Берём или продлеваем аренду; возвращаем полученных тенантов."""
+        now = self.clock()
+        acquired = set()
+        with self.connection:
+            for tenant in tenants:
+                self.connection.execute(
+                    'INSERT OR IGNORE INTO leases (tenant, holder, expires) '
+                    "VALUES (?, '', 0)", (tenant,)
+                )
+                cursor = self.connection.execute(
+                    'UPDATE leases SET holder = ?, expires = ? '
+                    'WHERE tenant = ? AND (holder = ? OR expires < ?)',
+                    (self.holder, now + self.ttl, tenant, self.holder, now)
+                )
+                if cursor.rowcount:
+                    acquired.add(tenant)
+        return acquired
+
+    def release(self, tenants):
+        """Отдаём аренду тенантов."""
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM leases WHERE tenant = ? AND holder = ?',
+                [(tenant, self.holder) for tenant in tenants]
+            )
+
+    def leave(self):
+        """Выходим из числа участников и отдаём всю аренду."""
+        with self.connection:
+            self.connection.execute('DELETE FROM leases WHERE holder = ?',
+                                    (self.holder,))
+            self.connection.execute(
+                'DELETE FROM workers WHERE worker = ? AND holder = ?',
+                (self.worker, self.holder)
+            )
+
+    def close(self):
+        """Закрываем базу."""
+        self.connection.close()
+
+
+class ShardWorker:
+    """Опрос своей доли тенантов с передачей их между воркерами.
+
+    На каждом такте воркер продлевает участие, строит кольцо из живых
+    воркеров и берёт аренду тенантов, которые приходятся на него.
+    Тенанта, ушедшего другому воркеру, он перестаёт опрашивать,
+    сбрасывает его состояние в общее хранилище и только после этого
+    отдаёт аренду; новый владелец перечитывает состояние и не
+    повторяет уже отправленные уведомления. Такт должен быть заметно
+    короче ttl аренды.
+
+    Пачка опросов может идти дольше ttl, поэтому движок перед
+    обработкой каждого ответа спрашивает holds(): аренда при этом
+    продлевается, если с прошлого продления прошёл такт, а ответ
+    тенанта, аренду которого забрал другой воркер, отбрасывается.
+    """
+
+    def __init__(self, engine, tenants, leases, heartbeat=HEARTBEAT,
+                 replicas=RING_REPLICAS):
+        """Запоминаем движок опроса, реестр и таблицу аренды."""
+        self.engine = engine
+        self.tenants = tenants
+        self.leases = leases
+        self.heartbeat = heartbeat
+        self.replicas = replicas
+        self.stopped = threading.Event()
+        self.held = set()
+        self.renew_at = engine.clock()
+        engine.guard = self.holds
+
+    def renew(self):
+        """Продлеваем участие и аренду опрашиваемых тенантов."""
+        self.leases.heartbeat()
+        self.held = self.leases.acquire(self.engine.tenants)
+        self.renew_at = self.engine.clock() + self.heartbeat
+
+    def holds(self, key):
+        """Держит ли воркер аренду тенанта; продлеваем её, если пора."""
+        if self.engine.clock() >= self.renew_at:
+            self.renew()
+        return key in self.held
+
+    def assigned(self):
+        """Тенанты, которые кольцо отдаёт этому воркеру."""
+        ring = HashRing(self.leases.members(), self.replicas)
+        return {key for key in self.tenants
+                if ring.owner(key) == self.leases.worker}
+
+    def rebalance(self):
+        """Приводим опрашиваемых тенантов к раскладу по кольцу."""
+        self.leases.heartbeat()
+        wanted = self.assigned()
+        owned = set(self.engine.tenants)
+        acquired = self.leases.acquire(wanted)
+        for key in owned & wanted - acquired:
+            logger.warning('Аренда тенанта %s потеряна.', key,
+                           extra={'tenant': key})
+            self.engine.remove_tenant(key)
+            self.engine.store.reload(key)
+        released = owned - wanted
+        for key in released:
+            self.engine.remove_tenant(key)
+        self.engine.store.flush()
+        self.leases.release(released)
+        for key in acquired - owned:
+            self.engine.store.reload(key)
+            self.engine.add_tenant(key, self.tenants[key])
+        self.held = acquired
+        self.renew_at = self.engine.clock() + self.heartbeat
+        if released or acquired - owned:
+            logger.info('Воркер %s опрашивает тенантов: %d',
+                        self.leases.worker, len(self.engine.tenants))
+
+    def run_forever(self):
+        """Опрос и перебалансировка до вызова stop()."""
+        clock = self.engine.clock
+        next_rebalance = clock()
+        try:
+            while not self.stopped.is_set():
+                if clock() >= next_rebalance:
+                    self.rebalance()
+                    next_rebalance = clock() + self.heartbeat
+                delay = self.engine.run_pending()
+                self.stopped.wait(min(delay, next_rebalance - clock()))
+        finally:
+            self.leave()
+
+    def stop(self, signum=None, frame=None):
+        """Просим воркер остановиться; годится как обработчик сигнала."""
+        self.stopped.set()
+        self.engine.stop()
+
+    def leave(self):
+        """Сохраняем состояние и отдаём тенантов другим воркерам."""
+        self.engine.store.flush()
+        self.leases.leave()
+
+
+def run_worker(worker_id):
+    """Точка входа процесса-воркера."""
+    homework.create_app()
+    config = homework.settings.current
+    tenants = load_tenants(config.tenants_path)
+    bot = homework.configure_bot(
+        telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    )
+    store = open_state_store(homework.STATE_PATH)
+    outbox = Outbox(bot)
+    outbox.start()
+    engine = PollingEngine(bot, {},
+                           policy=polling_policy(config.adaptive_polling),
+                           store=store, outbox=outbox)
+    worker = ShardWorker(engine, tenants,
+                         LeaseTable(config.leases_path, worker_id))
+    homework.interrupt_retries(engine.stopped)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, worker.stop)
+    logger.debug('Воркер %s запущен', worker_id)
+    try:
+        worker.run_forever()
+    finally:
+        engine.close()
+
+
+class Supervisor:
+    """Запуск и перезапуск процессов-воркеров.
+
+    Процессы создаются методом spawn: дочерний процесс не наследует
+    потоки родителя, в том числе поток записи логов.
+    """
+
+    def __init__(self, workers, shard_id, target=run_worker):
+        """Запоминаем число воркеров и функцию процесса."""
+        self.workers = workers
+        self.shard_id = shard_id
+        self.target = target
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = {}
+        self.stopped = threading.Event()
+
+    def worker_id(self, index):
+        """Имя воркера: одинаковое после перезапуска процесса."""
+        return f'{self.shard_id}/{index}'
+
+    def spawn(self, index):
+        """Запускаем процесс воркера номер index."""
+        process = self.context.Process(
+            target=self.target, args=(self.worker_id(index),),
+            name=self.worker_id(index),
+        )
+        process.start()
+        self.processes[index] = process
+        return process
+
+    def start(self):
+        """Запускаем всех воркеров."""
+        for index in range(self.workers):
+            self.spawn(index)
+        return self
+
+    def check(self):
+        """Перезапускаем завершившихся воркеров; возвращаем их число."""
+        restarted = 0
+        for index, process in list(self.processes.items()):
+            if not process.is_alive() and not self.stopped.is_set():
+                logger.warning('Воркер %s завершился с кодом %s, '
+                               'перезапускаем.', process.name,
+                               process.exitcode)
+                self.spawn(index)
+                restarted += 1
+        return restarted
+
+    def stop(self, signum=None, frame=None):
+        """Просим супервизор остановиться."""
+        self.stopped.set()
+
+    def shutdown(self, timeout=LEASE_TTL):
+        """Останавливаем воркеров сигналом SIGTERM и ждём их выхода."""
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                logger.error('Воркер %s не остановился, завершаем.',
+                             process.name)
+                process.kill()
+                process.join()
+
+    def run(self):
+        """Запускаем воркеров и следим за ними до SIGTERM или SIGINT."""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+        self.start()
+        try:
+            while not self.stopped.wait(RESTART_DELAY):
+                self.check()
+        finally:
+            self.shutdown()
+
+
+def main():
+    """Запуск SHARD_WORKERS воркеров для тенантов из TENANTS_PATH.
+
+    Без SHARD_WORKERS воркеров столько, сколько ядер, а без SHARD_ID
+    узел называется по DYNO или имени хоста.
+    """
+    homework.require_tenants()
+    if Path(homework.STATE_PATH or '').suffix not in SQLITE_SUFFIXES:
+        logger.critical('Для шардирования STATE_PATH должен указывать '
+                        'на базу SQLite.')
+        sys.exit('STATE_PATH должен указывать на базу SQLite')
+    config = homework.settings.current
+    workers = config.shard_workers or os.cpu_count() or 1
+    shard_id = (config.shard_id or os.environ.get('DYNO')
+                or socket.gethostname())
+    logger.debug('Запускаем воркеров: %d', workers)
+    Supervisor(workers, shard_id).run()
+
+
+if __name__ == '__main__':
+    homework.create_app()
+    main()
@@ -0,0 +1,64 @@
+import logging
+import signal
+import threading
+from contextlib import contextmanager
+
+from exceptions import ShutdownRequested
+from logs import register_logger
+
+logger = logging.getLogger(__name__)
+register_logger(logger)
+
+# Heroku ждёт 30 секунд после SIGTERM, прежде чем послать SIGKILL.
+SHUTDOWN_TIMEOUT = 25
+SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class GracefulShutdown:
+    """Остановка по SIGTERM и SIGINT без потери начатой работы.
+
+    Сигнал только отмечает запрос остановки: опрос, отправка сообщения
+    и запись состояния доводятся до конца. Если процесс в этот момент
+    ждёт следующего опроса внутри waiting(), ожидание прерывается
+    исключением ShutdownRequested, и перезапуск не ждёт RETRY_PERIOD.
+    Используется как контекстный менеджер: прежние обработчики
+    сигналов восстанавливаются при выходе.
+    """
+
+    def __init__(self, signals=SIGNALS):
+        """Запоминаем сигналы, которые будем перехватывать."""
+        self.signals = signals
+        self.requested = threading.Event()
+        self._waiting = False
+        self._previous = {}
+
+    def __enter__(self):
+        """Подключаем обработчики сигналов."""
+        for signum in self.signals:
+            self._previous[signum] = signal.signal(signum, self.handle)
+        return self
+
+    def __exit__(self, *exc_info):
+        """Возвращаем прежние обработчики."""
+        for signum, handler in self._previous.items():
+            signal.signal(signum, handler)
+        self._previous.clear()
+
+    def handle(self, signum, frame):
+        """Обработчик сигнала."""
+        logger.info('Получен сигнал %s, останавливаемся.',
+                    signal.Signals(signum).name)
+        self.requested.set()
+        if self._waiting:
+            raise ShutdownRequested(signum)
+
+    @contextmanager
+    def waiting(self):
+        """Ожидание, которое сигнал остановки прерывает сразу."""
+        if self.requested.is_set():
+            raise ShutdownRequested()
+        self._waiting = True
+        try:
+            yield
+        finally:
+            self._waiting = False
@@ -0,0 +1,195 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from history_log import TenantHistory
+from homework_index import HomeworkIndex
+from tenants import HISTORY_SIZE, SQLITE_SUFFIXES, TenantState
+
+FLUSH_INTERVAL = 60
+
+
+def new_record():
+    """Пустое сохранённое состояние тенанта."""
+    return {'timestamp': None, 'homeworks': {}, 'names': {},
+            'paused': False}
+
+
+def restore_state(store, key, now, next_poll, history=None):
+    """TenantState, восстановленный из сохранённого состояния.
+
+    С журналом history история тенанта ведётся в нём, а если хранилище
+    не знает статусов работ, они восстанавливаются из журнала.
+    """
+    saved = store.get(key)
+    state = TenantState(saved['timestamp'] or int(now), next_poll)
+    state.homeworks = HomeworkIndex(saved['homeworks'], saved.get('names'))
+    state.paused = saved.get('paused', False)
+    if history is not None:
+        state.history = TenantHistory(history, key, HISTORY_SIZE)
+        if not state.homeworks:
+            state.homeworks = HomeworkIndex(history.statuses(key))
+    return state
+
+
+def checkpoint_state(store, key, state):
+    """Переносим состояние опроса тенанта в хранилище."""
+    store.update(key, timestamp=state.timestamp,
+                 homeworks=state.homeworks.statuses,
+                 names=state.homeworks.names, paused=state.paused)
+
+
+class StateStore:
+    """Хранилище состояния опроса, переживающее перезапуск процесса.
+
+    Изменения копятся в памяти и сбрасываются на диск не чаще раза
+    в flush_interval секунд, поэтому опрос не добавляет ввод-вывод
+    на каждый цикл. Наследники реализуют _read и _write.
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, clock=time.monotonic):
+        """Загружаем сохранённое состояние."""
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._dirty = set()
+        self._last_flush = clock()
+        self.records = self._read()
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _write(self, keys):
+        raise NotImplementedError
+
+    def _read_key(self, key):
+        return self._read().get(key)
+
+    def get(self, key):
+        """Сохранённое состояние тенанта."""
+        return self.records.setdefault(key, new_record())
+
+    def update(self, key, **fields):
+        """Обновляем поля состояния тенанта."""
+        self.get(key).update(fields)
+        self._dirty.add(key)
+
+    def reload(self, key):
+        """Отбрасываем изменения тенанта и перечитываем его состояние.
+
+        Нужно, когда тенанта опрашивал другой процесс, записавший своё
+        состояние в то же хранилище.
+        """
+        self._dirty.discard(key)
+        record = self._read_key(key)
+        if record is None:
+            self.records.pop(key, None)
+        else:
+            self.records[key] = record
+
+    def maybe_flush(self):
+        """Сбрасываем изменения, если прошёл flush_interval."""
+        if self._dirty and (
+            self.clock() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """Немедленно записываем все изменения."""
+        if self._dirty:
+            self._write(self._dirty)
+            self._dirty = set()
+        self._last_flush = self.clock()
+
+    def close(self):
+        """Записываем накопленные изменения перед остановкой."""
+        self.flush()
+
+
+class MemoryStateStore(StateStore):
+    """Состояние только в памяти, если путь к хранилищу не задан."""
+
+    def _read(self):
+        return {}
+
+    def _read_key(self, key):
+        return self.records.get(key)
+
+    def _write(self, keys):
+        pass
+
+
+class JsonStateStore(StateStore):
+    """Состояние в JSON-файле, заменяемом атомарно через rename."""
+
+    def __init__(self, path, **kwargs):
+        """Запоминаем путь к файлу состояния."""
+        self.path = Path(path)
+        super().__init__(**kwargs)
+
+    def _read(self):
+        if not self.path.exists():
+            return {}
+        with open(self.path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def _write(self, keys):
+        descriptor, tmp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f'.{self.path.name}.'
+        )
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(self.records, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class SQLiteStateStore(StateStore):
+    """Состояние в SQLite: пишутся только изменившиеся тенанты."""
+
+    def __init__(self, path, **kwargs):
+        """Открываем базу и создаём таблицу состояния."""
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS state '
+            '(key TEXT PRIMARY KEY, data TEXT NOT NULL)'
+        )
+        super().__init__(**kwargs)
+
+    def _read(self):
+        rows = self.connection.execute('SELECT key, data FROM state')
+        return {key: json.loads(data) for key, data in rows}
+
+    def _read_key(self, key):
+        row = self.connection.execute(
+            'SELECT data FROM state WHERE key = ?', (key,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _write(self, keys):
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO state (key, data) VALUES (?, ?)',
+                [(key, json.dumps(self.records[key], ensure_ascii=False))
+                 for key in keys]
+            )
+
+    def close(self):
+        """Записываем изменения и закрываем базу."""
+        super().close()
+        self.connection.close()
+
+
+def open_state_store(path=None, **kwargs):
+    """Хранилище состояния, тип определяется по расширению пути."""
+    if not path:
+        return MemoryStateStore(**kwargs)
+    if Path(path).suffix in SQLITE_SUFFIXES:
+        return SQLiteStateStore(path, **kwargs)
+    return JsonStateStore(path, **kwargs)
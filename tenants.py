@@ -0,0 +1,115 @@
+import hashlib
+import json
+import sqlite3
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from api_client import ResponseCache
+from dedupe import DedupeCache
+from homework_index import HomeworkIndex
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+SQLITE_QUERY = 'SELECT practicum_token, chat_id, retry_period FROM tenants'
+HISTORY_SIZE = 20
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Подписка: токен Практикума и чат, куда слать уведомления."""
+
+    practicum_token: str = field(repr=False)
+    chat_id: str
+    retry_period: Optional[int] = None
+
+    @property
+    def key(self):
+        """Уникальный ключ тенанта в реестре.
+
+        Попадает в логи, поэтому вместо токена в нём короткий хеш.
+        """
+        digest = hashlib.blake2b(self.practicum_token.encode(),
+                                 digest_size=8).hexdigest()
+        return f'{self.chat_id}:{digest}'
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API Практикума."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+
+class TenantState:
+    """Минимальное состояние опроса одного тенанта."""
+
+    __slots__ = ('timestamp', 'next_poll', 'status', 'idle_polls',
+                 'homeworks', 'sent', 'errors', 'response_cache', 'history',
+                 'paused')
+
+    def __init__(self, timestamp, next_poll=0.0):
+        """Начинаем опрос с момента timestamp."""
+        self.timestamp = timestamp
+        self.next_poll = next_poll
+        self.status = None
+        self.idle_polls = 0
+        self.homeworks = HomeworkIndex()
+        self.sent = DedupeCache()
+        self.errors = DedupeCache()
+        self.response_cache = ResponseCache()
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.paused = False
+
+    def observe(self, status=None):
+        """Учитываем последний изменившийся статус из ответа API.
+
+        None означает, что за этот опрос ни одна работа не изменилась.
+        """
+        if status is not None:
+            self.status = status
+            self.idle_polls = 0
+        else:
+            self.idle_polls += 1
+
+
+def _from_mapping(item):
+    return Tenant(
+        practicum_token=str(item['practicum_token']),
+        chat_id=str(item['chat_id']),
+        retry_period=item.get('retry_period'),
+    )
+
+
+def load_tenants_json(path):
+    """Читаем список тенантов из JSON-файла."""
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise TypeError('Файл подписок должен содержать список')
+    return [_from_mapping(item) for item in data]
+
+
+def load_tenants_sqlite(path):
+    """Читаем список тенантов из таблицы tenants базы SQLite."""
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(SQLITE_QUERY).fetchall()
+    finally:
+        connection.close()
+    return [
+        Tenant(str(token), str(chat_id), retry_period)
+        for token, chat_id, retry_period in rows
+    ]
+
+
+def load_tenants(path):
+    """Загружаем реестр подписок, формат определяется по расширению."""
+    if Path(path).suffix in SQLITE_SUFFIXES:
+        tenants = load_tenants_sqlite(path)
+    else:
+        tenants = load_tenants_json(path)
+    registry = {}
+    for tenant in tenants:
+        if not tenant.practicum_token or not tenant.chat_id:
+            raise KeyError(f'Неполная подписка для чата {tenant.chat_id}')
+        registry[tenant.key] = tenant
+    return registry
@@ -1,6 +1,8 @@
 import sys
 import os
 
+import pytest
+
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
@@ -26,3 +28,18 @@ os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
 
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    from breaker import BREAKERS
+    for breaker in BREAKERS.values():
+        breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delays(monkeypatch):
+    import homework
+    for policy in (homework.api_retry, homework.telegram_retry):
+        monkeypatch.setattr(policy, 'sleep', lambda seconds: None)
+        monkeypatch.setattr(policy, 'stop', None)
@@ -0,0 +1,78 @@
+from statistics import mean, quantiles
+
+from adaptive import AdaptiveInterval, FixedInterval, replay
+from tenants import TenantState
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class TestAdaptiveInterval:
+    # Неделя студента: сдача, проверка, доработка, повторная проверка,
+    # затем несколько дней тишины и следующая работа.
+    TIMELINE = [
+        (2 * HOUR + 317, 'reviewing'),
+        (5 * HOUR + 41, 'rejected'),
+        (DAY + 1234, 'reviewing'),
+        (DAY + 2 * HOUR + 555, 'approved'),
+        (4 * DAY + 4321, 'reviewing'),
+        (4 * DAY + HOUR + 4321, 'approved'),
+    ]
+
+    def test_backoff_and_tightening(self):
+        policy = AdaptiveInterval()
+        assert policy.interval('reviewing', 0, 600) == 60, (
+            'Во время проверки интервал опроса должен сокращаться.'
+        )
+        assert policy.interval('approved', 0, 600) == 600
+        assert policy.interval('approved', 10, 600) == 3600, (
+            'Интервал должен расти экспоненциально до верхней границы.'
+        )
+        assert policy.interval('unknown', 0, 600) == 600
+        assert policy.interval(None, 10, 600) == 600, (
+            'Без известного статуса интервал не должен превышать базовый.'
+        )
+        assert policy.interval('reviewing', 10, 600) <= 600
+
+    def test_state_observe(self):
+        state = TenantState(0)
+        state.observe('reviewing')
+        state.observe()
+        state.observe()
+        assert (state.status, state.idle_polls) == ('reviewing', 2)
+        state.observe('approved')
+        assert (state.status, state.idle_polls) == ('approved', 0)
+
+    def replay_shifted(self, policy, horizon):
+        # Та же неделя со сдвигами внутри часа: задержка зависит от того,
+        # где смена статуса попала между опросами.
+        api_calls, latencies = 0, []
+        for shift in range(0, HOUR, 180):
+            timeline = [(moment + shift, status)
+                        for moment, status in self.TIMELINE]
+            result = replay(timeline, policy, horizon)
+            api_calls += result.api_calls
+            latencies += result.latencies
+        return api_calls, latencies
+
+    def test_replay_cuts_api_calls(self):
+        horizon = 7 * DAY
+        adaptive = replay(self.TIMELINE, AdaptiveInterval(), horizon)
+        assert len(adaptive.latencies) == len(self.TIMELINE)
+        fixed_calls, fixed = self.replay_shifted(FixedInterval(), horizon)
+        api_calls, latencies = self.replay_shifted(AdaptiveInterval(),
+                                                   horizon)
+        assert api_calls < fixed_calls / 2, (
+            f'Адаптивный опрос сделал {api_calls} запросов '
+            f'против {fixed_calls} при постоянном интервале.'
+        )
+        assert mean(latencies) <= 1.1 * mean(fixed), (
+            'Адаптивный опрос не должен увеличивать среднюю задержку '
+            'уведомлений.'
+        )
+        p95 = quantiles(latencies, n=20, method='inclusive')[-1]
+        fixed_p95 = quantiles(fixed, n=20, method='inclusive')[-1]
+        assert p95 <= fixed_p95, (
+            f'p95 задержки {p95:.0f} с против {fixed_p95:.0f} с '
+            'при постоянном интервале.'
+        )
@@ -0,0 +1,101 @@
+import json
+from http import HTTPStatus
+
+import requests
+
+import utils
+from api_client import PracticumClient, ResponseCache
+
+
+class TestPracticumClient:
+    ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+    def test_session_is_reused(self):
+        client = PracticumClient(self.ENDPOINT, pool_size=4)
+        session = client.session
+        assert client.session is session, (
+            'Убедитесь, что сессия создаётся один раз и переиспользуется.'
+        )
+        adapter = session.get_adapter(self.ENDPOINT)
+        assert adapter._pool_maxsize == 4, (
+            'Проверьте, что размер пула соединений настраивается.'
+        )
+        client.close()
+        assert client._session is None
+
+    def test_get_passes_timeout_and_headers(self, monkeypatch):
+        calls = []
+
+        def mock_get(**kwargs):
+            calls.append(kwargs)
+
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_get))
+        client = PracticumClient(self.ENDPOINT, {'Authorization': 'OAuth x'},
+                                 connect_timeout=1, read_timeout=2)
+        client.get(100)
+        client.get(200, headers={'Authorization': 'OAuth y'})
+        assert calls[0]['timeout'] == (1, 2), (
+            'Убедитесь, что в запрос передаётся таймаут.'
+        )
+        assert calls[0]['params'] == {'from_date': 100}
+        assert calls[0]['headers'] == {'Authorization': 'OAuth x'}
+        assert calls[1]['headers'] == {'Authorization': 'OAuth y'}
+
+
+class TestResponseCache:
+    def test_hash_ignores_current_date(self):
+        cache = ResponseCache()
+        assert cache.unchanged({}, b'{"homeworks": [], "current_date": 1}') \
+            is None
+        assert cache.unchanged(
+            {}, b'{"homeworks": [], "current_date": 25}'
+        ) == 25, 'Ответ, отличающийся только current_date, не изменился.'
+        assert cache.unchanged(
+            {}, b'{"homeworks": [{"status": "approved"}], '
+                b'"current_date": 26}'
+        ) is None
+
+    def test_conditional_headers(self):
+        cache = ResponseCache()
+        headers = {'Authorization': 'OAuth x'}
+        assert cache.conditional_headers(headers) is headers
+        cache.unchanged({'ETag': '"abc"'}, b'{}')
+        assert cache.conditional_headers(headers) == {
+            'Authorization': 'OAuth x', 'If-None-Match': '"abc"'
+        }
+        assert 'If-None-Match' not in headers
+
+    def test_unchanged_response_is_not_parsed(self, monkeypatch,
+                                              homework_module):
+        body = b'{"homeworks": [{"homework_name": "hw"}], "current_date": 5}'
+        parsed = []
+
+        def mock_get(*args, **kwargs):
+            response = utils.MockResponseGET()
+            response.headers = {}
+            response.content = body
+            return response
+
+        def mock_loads(content):
+            parsed.append(1)
+            return json.loads(content)
+
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_get))
+        monkeypatch.setattr(homework_module, 'loads', mock_loads)
+        cache = ResponseCache()
+        homework_module.request_api_answer(0, cache=cache)
+        answer = homework_module.request_api_answer(5, cache=cache)
+        assert parsed == [1], (
+            'Убедитесь, что неизменившийся ответ не разбирается повторно.'
+        )
+        assert answer == {'homeworks': [], 'current_date': 5}
+
+    def test_not_modified(self, monkeypatch, homework_module):
+        def mock_get(*args, **kwargs):
+            return utils.MockResponseGET(http_status=HTTPStatus.NOT_MODIFIED)
+
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_get))
+        answer = homework_module.request_api_answer(
+            7, cache=ResponseCache()
+        )
+        assert answer == {'homeworks': [], 'current_date': 7}
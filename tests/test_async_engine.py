@@ -0,0 +1,233 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+import async_engine
+import homework
+from async_engine import (AsyncPollingEngine, async_get_api_answer,
+                          async_send_message)
+from exceptions import WrongStatusCode
+from health import Health
+from tenants import Tenant
+
+
+@pytest.fixture(autouse=True)
+def no_async_retry_delays(monkeypatch):
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    for policy in (async_engine.api_retry, async_engine.telegram_retry):
+        monkeypatch.setattr(policy, 'sleep', sleep)
+        monkeypatch.setattr(policy, 'stop', None)
+    return delays
+
+
+class FakeResponse:
+    def __init__(self, status, data=None, headers=None):
+        self.status = status
+        self.data = data
+        self.headers = headers or {}
+
+    async def read(self):
+        return json.dumps(self.data).encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """Заменитель aiohttp.ClientSession, считающий запросы в полёте."""
+
+    def __init__(self, status=HTTPStatus.OK):
+        self.status = status
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sent = []
+        self.urls = []
+
+    def get(self, url, headers=None, params=None):
+        session = self
+
+        class Request(FakeResponse):
+            async def __aenter__(self):
+                session.in_flight += 1
+                session.max_in_flight = max(session.max_in_flight,
+                                            session.in_flight)
+                await asyncio.sleep(0)
+                session.in_flight -= 1
+                return self
+
+        return Request(self.status, {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': params['from_date'],
+        })
+
+    def post(self, url, json=None):
+        self.urls.append(url)
+        self.sent.append(json)
+        return FakeResponse(HTTPStatus.OK)
+
+
+class ScriptedSession:
+    """Сессия, отвечающая заранее заданными ответами по порядку."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def respond(self, *args, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+    get = post = respond
+
+
+class TestAsyncEngine:
+    def test_async_get_api_answer(self):
+        answer = asyncio.run(async_get_api_answer(FakeSession(), 100))
+        assert isinstance(answer, dict), (
+            'Проверьте, что `async_get_api_answer` возвращает словарь.'
+        )
+
+    def test_async_get_api_answer_not_200(self):
+        session = FakeSession(HTTPStatus.INTERNAL_SERVER_ERROR)
+        with pytest.raises(WrongStatusCode) as error:
+            asyncio.run(async_get_api_answer(session, 100))
+        assert error.value.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+
+    def test_api_errors_are_retried(self, no_async_retry_delays):
+        session = ScriptedSession([
+            FakeResponse(HTTPStatus.SERVICE_UNAVAILABLE,
+                         headers={'Retry-After': '7'}),
+            FakeResponse(HTTPStatus.OK, {'homeworks': [],
+                                         'current_date': 100}),
+        ])
+        answer = asyncio.run(async_get_api_answer(session, 100))
+        assert answer == {'homeworks': [], 'current_date': 100}
+        assert no_async_retry_delays == [7], (
+            'Повтор запроса должен учитывать заголовок Retry-After.'
+        )
+
+    def test_throttled_message_is_retried(self, no_async_retry_delays):
+        session = ScriptedSession([
+            FakeResponse(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False, 'error_code': 429,
+                'parameters': {'retry_after': 3},
+            }),
+            FakeResponse(HTTPStatus.OK),
+        ])
+        asyncio.run(async_send_message(session, 'token', 1, 'text'))
+        assert session.calls == 2, (
+            'Сообщение, отклонённое с кодом 429, должно отправляться снова.'
+        )
+        assert no_async_retry_delays == [3]
+
+    def test_telegram_base_url_is_read_on_send(self, monkeypatch):
+        session = FakeSession()
+        asyncio.run(async_send_message(session, 'token', 1, 'text'))
+        monkeypatch.setattr(homework, 'TELEGRAM_BASE_URL',
+                            'http://127.0.0.1:8080/bot')
+        asyncio.run(async_send_message(session, 'token', 1, 'text'))
+        assert session.urls == [
+            'https://api.telegram.org/bottoken/sendMessage',
+            'http://127.0.0.1:8080/bottoken/sendMessage',
+        ], 'Адрес Telegram должен учитывать текущий TELEGRAM_BASE_URL.'
+
+    def test_rejected_message_is_not_retried(self):
+        session = ScriptedSession([FakeResponse(HTTPStatus.BAD_REQUEST),
+                                   FakeResponse(HTTPStatus.OK)])
+        asyncio.run(async_send_message(session, 'token', 1, 'text'))
+        assert session.calls == 1
+
+    def test_async_send_message_swallows_errors(self, caplog):
+        class BrokenSession:
+            def post(self, *args, **kwargs):
+                raise ConnectionError('Something wrong')
+
+        asyncio.run(async_send_message(BrokenSession(), 'token', 1, 'text'))
+        assert any(r.levelname == 'ERROR' for r in caplog.records), (
+            'Убедитесь, что ошибка отправки логируется с уровнем `ERROR`.'
+        )
+
+    def test_concurrency_is_bounded(self):
+        session = FakeSession()
+        tenants = {
+            str(i): Tenant(f'token-{i}', str(i)) for i in range(50)
+        }
+
+        async def poll_all():
+            engine = AsyncPollingEngine(session, 'token', tenants,
+                                        api_concurrency=5)
+            await asyncio.gather(*(
+                engine.poll(engine.tenants[key], engine.states[key])
+                for key in tenants
+            ))
+
+        asyncio.run(poll_all())
+        assert session.max_in_flight == 5, (
+            'Убедитесь, что семафор ограничивает число запросов в полёте.'
+        )
+        assert len(session.sent) == 50
+
+    def test_health_waits_for_nearest_tenant(self, monkeypatch):
+        health = Health()
+        monkeypatch.setattr(async_engine, 'HEALTH', health)
+        tenants = {str(i): Tenant(f'token-{i}', str(i)) for i in range(2)}
+
+        async def run_and_stop():
+            engine = AsyncPollingEngine(FakeSession(), 'token', tenants,
+                                        retry_period=600)
+            engine.states['0'].next_poll = engine.clock()
+            engine.states['1'].next_poll = engine.clock() + 30
+            asyncio.get_running_loop().call_later(0.2, engine.stop)
+            await asyncio.wait_for(engine.run_forever(), 5)
+
+        asyncio.run(run_and_stop())
+        assert health.beaten is not None
+        assert health.due - health.beaten < 60, (
+            'Следующий такт — ближайший опрос среди всех тенантов.'
+        )
+
+    def test_stop_interrupts_sleeping_tenants(self):
+        session = FakeSession()
+        tenants = {str(i): Tenant(f'token-{i}', str(i)) for i in range(5)}
+
+        async def run_and_stop():
+            engine = AsyncPollingEngine(session, 'token', tenants,
+                                        retry_period=600)
+            for state in engine.states.values():
+                state.next_poll = engine.clock()
+            asyncio.get_running_loop().call_later(0.2, engine.stop)
+            await asyncio.wait_for(engine.run_forever(), 5)
+
+        asyncio.run(run_and_stop())
+        assert len(session.sent) == 5, (
+            'Начатые опросы должны завершиться до остановки.'
+        )
+
+    def test_stop_interrupts_retry_backoff(self):
+        session = ScriptedSession([
+            FakeResponse(HTTPStatus.SERVICE_UNAVAILABLE,
+                         headers={'Retry-After': '100'})
+            for _ in range(4)
+        ])
+        tenants = {'0': Tenant('token-0', '0')}
+
+        async def run_and_stop():
+            engine = AsyncPollingEngine(session, 'token', tenants,
+                                        retry_period=600)
+            engine.states['0'].next_poll = engine.clock()
+            asyncio.get_running_loop().call_later(0.2, engine.stop)
+            await asyncio.wait_for(engine.run_forever(), 5)
+
+        asyncio.run(run_and_stop())
+        assert session.calls == 1, (
+            'Остановка должна прерывать паузу перед повтором запроса.'
+        )
@@ -192,7 +192,7 @@ class TestHomework:
                     'Проверьте, что в параметре `from_date` передано число.'
                 )
 
-        monkeypatch.setattr(requests, 'get', check_request_get_call)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(check_request_get_call))
         try:
             homework_module.get_api_answer(current_timestamp)
         except AssertionError as e:
@@ -215,7 +215,7 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         result = homework_module.get_api_answer(current_timestamp)
         assert isinstance(result, dict), (
@@ -235,7 +235,7 @@ class TestHomework:
             self.HOMEWORK_FUNC_WITH_PARAMS_QTY[func_name]
         )
 
-        monkeypatch.setattr(requests, 'get', response)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(response))
         try:
             homework_module.get_api_answer(current_timestamp)
         except Exception:
@@ -259,7 +259,7 @@ class TestHomework:
         def mock_request_get_with_exception(*args, **kwargs):
             raise requests.RequestException('Something wrong')
 
-        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_request_get_with_exception))
         try:
             homework_module.get_api_answer(current_timestamp)
         except requests.RequestException:
@@ -587,7 +587,7 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
     def test_main_without_env_vars_raise_exception(
             self, caplog, monkeypatch, random_timestamp, current_timestamp,
@@ -641,7 +641,7 @@ class TestHomework:
                     if record.message == utils.MockResponseGET.CALLED_LOG_MSG
                 ]
                 assert log_record, (
-                    'Убедитесь, что бот использует функцию `requests.get()` '
+                    'Убедитесь, что бот использует пул соединений `requests.Session` '
                     'для отправки запроса к API домашки.'
                 )
 
@@ -724,9 +724,9 @@ class TestHomework:
                 data=data_with_new_hw_status
             ))
         monkeypatch.setattr(
-            requests,
+            requests.Session,
             'get',
-            mock_response_get_with_new_status
+            staticmethod(mock_response_get_with_new_status)
         )
 
         hw_status = data_with_new_hw_status['homeworks'][0]['status']
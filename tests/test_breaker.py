@@ -0,0 +1,94 @@
+import random
+from http import HTTPStatus
+
+import requests
+
+import utils
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, breaker_for
+from engine import PollingEngine
+from tenants import Tenant
+from test_engine import RecordingBot, mock_statuses
+from utils import FakeClock
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_probes_once(self):
+        clock = FakeClock(0)
+        changes = []
+        breaker = CircuitBreaker(
+            'api', failure_threshold=2, reset_timeout=60, clock=clock,
+            listener=lambda breaker, old, new: changes.append(new)
+        )
+        breaker.record_failure()
+        assert breaker.allow() and breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN and not breaker.allow(), (
+            'После порога сбоев запросы должны блокироваться.'
+        )
+        clock.sleep(60)
+        assert breaker.allow() and breaker.state == HALF_OPEN
+        assert not breaker.allow(), (
+            'В полуоткрытом состоянии разрешён только один пробный запрос.'
+        )
+        breaker.record_failure()
+        assert breaker.state == OPEN and not breaker.allow()
+        clock.sleep(60)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED and breaker.allow()
+        assert changes == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED]
+
+    def test_breaker_is_shared_per_endpoint(self):
+        assert breaker_for('https://a/') is breaker_for('https://a/')
+        assert breaker_for('https://a/') is not breaker_for('https://b/')
+
+
+class TestEngineWithBreaker:
+    def run_until(self, engine, clock, moment):
+        while clock.now < moment:
+            clock.sleep(engine.run_pending())
+
+    def test_outage_is_probed_once_and_reported_once(
+            self, monkeypatch, homework_module):
+        statuses = {f'token-{number}': 'reviewing' for number in range(10)}
+        calls = []
+        outage = True
+        healthy_get = mock_statuses(statuses).__func__
+
+        def mock_get(**kwargs):
+            calls.append(kwargs)
+            if outage:
+                return utils.MockResponseGET(
+                    http_status=HTTPStatus.SERVICE_UNAVAILABLE
+                )
+            return healthy_get(**kwargs)
+
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_get))
+        clock = FakeClock()
+        monkeypatch.setattr(homework_module.api_breaker, 'clock', clock)
+        tenants = [Tenant(token, str(number))
+                   for number, token in enumerate(statuses)]
+        bot = RecordingBot()
+        engine = PollingEngine(bot, {t.key: t for t in tenants},
+                               retry_period=60, clock=clock,
+                               sleep=clock.sleep, rng=random.Random(1))
+        self.run_until(engine, clock, 1000 + 600)
+        breaker = homework_module.api_breaker
+        assert len(calls) <= breaker.failure_threshold + 600 / 60 + 1, (
+            'Пока API недоступен, вместо запросов всех тенантов '
+            'выполняется одна проба за интервал.'
+        )
+        opened = [chat for chat, text in bot.sent if 'недоступен' in text]
+        assert opened and len(opened) == len(set(opened)), (
+            'О недоступности API каждому чату сообщается один раз.'
+        )
+
+        outage = False
+        self.run_until(engine, clock, 1000 + 600 + 180)
+        assert breaker.state == CLOSED
+        recovered = [chat for chat, text in bot.sent
+                     if text == homework_module.RECOVERED_MESSAGE]
+        assert sorted(recovered) == sorted(opened), (
+            'О восстановлении API сообщается один раз тем чатам, '
+            'которым сообщили о сбое.'
+        )
@@ -0,0 +1,109 @@
+import random
+from types import SimpleNamespace
+
+import requests
+
+from commands import CommandService, chat_states
+from engine import PollingEngine
+from state_store import MemoryStateStore, checkpoint_state, restore_state
+from tenants import Tenant, TenantState
+from test_engine import RecordingBot, mock_statuses
+from utils import FakeClock
+
+
+def forbidden_get(*args, **kwargs):
+    raise AssertionError('Команды не должны обращаться к API Практикума.')
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.handlers = []
+
+    def add_handler(self, handler):
+        self.handlers.append(handler)
+
+
+class TestCommandService:
+    def service(self, homework_module):
+        state = TenantState(1581604970)
+        homeworks, _ = homework_module.check_response({
+            'homeworks': [{'id': 1, 'homework_name': 'hw1.zip',
+                           'status': 'reviewing'}],
+            'current_date': 0,
+        })
+        homework_module.parse_changes(state, homeworks)
+        return CommandService({'12345': [state]},
+                              homework_module.HOMEWORK_VERDICTS), state
+
+    def test_status_and_history_use_cached_state(self, monkeypatch,
+                                                 homework_module):
+        monkeypatch.setattr(requests.Session, 'get',
+                            staticmethod(forbidden_get))
+        service, _ = self.service(homework_module)
+        verdict = homework_module.HOMEWORK_VERDICTS['reviewing']
+        assert f'hw1.zip: {verdict}' in service.status(12345), (
+            'В /status должны быть название работы и вердикт, '
+            'как в уведомлениях.'
+        )
+        assert f'hw1.zip: {verdict}' in service.history('12345')
+        assert 'не подписан' in service.status('1')
+
+    def test_names_survive_restart(self, homework_module):
+        _, state = self.service(homework_module)
+        store = MemoryStateStore()
+        checkpoint_state(store, '12345', state)
+        restored = restore_state(store, '12345', now=0, next_poll=0)
+        service = CommandService({'12345': [restored]},
+                                 homework_module.HOMEWORK_VERDICTS)
+        assert service.status(12345).endswith(
+            'hw1.zip: ' + homework_module.HOMEWORK_VERDICTS['reviewing']
+        ), 'Название работы должно сохраняться вместе со статусом.'
+
+    def test_pause_and_resume(self, homework_module):
+        service, state = self.service(homework_module)
+        service.pause('12345')
+        assert state.paused and 'на паузе' in service.status('12345')
+        service.resume('12345')
+        assert not state.paused
+
+    def test_handlers_reply_to_chat(self, homework_module):
+        service, _ = self.service(homework_module)
+        dispatcher = FakeDispatcher()
+        service.register(dispatcher)
+        commands = {
+            command for handler in dispatcher.handlers
+            for command in handler.command
+        }
+        assert commands == {'status', 'history', 'pause', 'resume'}
+        replies = []
+        update = SimpleNamespace(
+            effective_chat=SimpleNamespace(id=12345),
+            effective_message=SimpleNamespace(reply_text=replies.append),
+        )
+        handler = dispatcher.handlers[0]
+        assert handler.run_async, (
+            'Команды должны обрабатываться в пуле потоков Updater.'
+        )
+        handler.callback(update, None)
+        assert replies == [service.status(12345)]
+
+
+class TestPausedTenant:
+    def test_engine_skips_paused_tenant(self, monkeypatch):
+        statuses = {'token-a': 'reviewing', 'token-b': 'approved'}
+        monkeypatch.setattr(requests.Session, 'get', mock_statuses(statuses))
+        tenants = {t.key: t for t in (Tenant('token-a', '1'),
+                                      Tenant('token-b', '2'))}
+        clock = FakeClock()
+        bot = RecordingBot()
+        engine = PollingEngine(bot, tenants, retry_period=600, clock=clock,
+                               sleep=clock.sleep, jitter=0,
+                               rng=random.Random(1))
+        service = CommandService(chat_states(engine.tenants, engine.states),
+                                 {})
+        service.pause('1')
+        while clock.now < 1600:
+            clock.sleep(engine.run_pending())
+        assert [chat for chat, _ in bot.sent] == ['2'], (
+            'Тенант на паузе не должен опрашиваться.'
+        )
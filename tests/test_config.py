@@ -0,0 +1,131 @@
+import json
+import os
+import signal
+import time
+
+import pytest
+
+from config import Config, ConfigManager, load_config
+
+ENVIRON = {'PRACTICUM_TOKEN': 'env-token', 'TELEGRAM_TOKEN': '1:x',
+           'TELEGRAM_CHAT_ID': '7'}
+
+
+def write_config(path, data, mtime):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+class TestConfig:
+    def test_file_overrides_environment(self, tmp_path):
+        path = tmp_path / 'config.json'
+        write_config(path, {'PRACTICUM_TOKEN': 'file-token',
+                            'RETRY_PERIOD': 60}, 1000)
+        config = load_config(dict(ENVIRON, RETRY_PERIOD='300'), path)
+        assert config.practicum_token == 'file-token'
+        assert config.retry_period == 60, 'RETRY_PERIOD приводится к int.'
+        assert config.telegram_chat_id == '7'
+        assert config.headers == {'Authorization': 'OAuth file-token'}
+
+    def test_problems(self):
+        assert not Config.from_mapping(ENVIRON).problems()
+        config = Config.from_mapping({'PRACTICUM_TOKEN': 'token',
+                                      'RETRY_PERIOD': '0'})
+        assert config.problems() == [
+            'не задан TELEGRAM_TOKEN', 'не задан TELEGRAM_CHAT_ID',
+            'RETRY_PERIOD должен быть положительным',
+        ]
+
+    def test_tenants_config_problems(self):
+        config = Config.from_mapping({'TELEGRAM_TOKEN': '1:x',
+                                      'TENANTS_PATH': 'tenants.json'})
+        assert not config.problems(), (
+            'С TENANTS_PATH токен Практикума и чат не обязательны.'
+        )
+
+    def test_reload_tenants_config(self, tmp_path):
+        path = tmp_path / 'config.json'
+        environ = {'TELEGRAM_TOKEN': '1:x', 'TENANTS_PATH': 'tenants.json'}
+        write_config(path, {'RETRY_PERIOD': 600}, 1000)
+        manager = ConfigManager(lambda: load_config(environ, path), path)
+        write_config(path, {'RETRY_PERIOD': 60}, 2000)
+        assert manager.reload()
+        assert manager.current.retry_period == 60
+
+    def test_process_settings(self, tmp_path):
+        path = tmp_path / 'config.json'
+        write_config(path, {'TELEGRAM_COMMANDS': False, 'HEALTH_PORT': 8081},
+                     1000)
+        config = load_config(dict(
+            ENVIRON, TENANTS_PATH='tenants.json', METRICS_PORT='9000',
+            HEALTH_STALE_FACTOR='1.5', ADAPTIVE_POLLING='1',
+            TELEGRAM_COMMANDS='1',
+        ), path)
+        assert config.tenants_path == 'tenants.json'
+        assert config.metrics_port == 9000
+        assert config.health_port == 8081
+        assert config.health_stale_factor == 1.5
+        assert config.adaptive_polling is True
+        assert config.telegram_commands is False, (
+            'false из файла настроек выключает флаг.'
+        )
+        assert config.shard_workers is None
+
+    def test_invalid_value_names_variable(self):
+        with pytest.raises(ValueError, match='RETRY_PERIOD'):
+            Config.from_mapping({'RETRY_PERIOD': 'abc'})
+
+    def test_reload_on_file_change(self, tmp_path):
+        path = tmp_path / 'config.json'
+        write_config(path, {'RETRY_PERIOD': 600}, 1000)
+        manager = ConfigManager(lambda: load_config(ENVIRON, path), path)
+        old = manager.current
+        assert not manager.check(), 'Без изменений файл не перечитывается.'
+        write_config(path, {'RETRY_PERIOD': 60}, 2000)
+        assert manager.check()
+        assert manager.current.retry_period == 60
+        assert old.retry_period == 600, (
+            'Прежний Config не меняется: опрос, взявший его, не замечает '
+            'перезагрузки.'
+        )
+
+    def test_invalid_reload_keeps_config(self, tmp_path):
+        path = tmp_path / 'config.json'
+        write_config(path, {}, 1000)
+        manager = ConfigManager(lambda: load_config(ENVIRON, path), path)
+        config = manager.current
+        path.write_text('{', encoding='utf-8')
+        os.utime(path, (2000, 2000))
+        assert not manager.check(), 'Битый файл не применяется.'
+        write_config(path, {'RETRY_PERIOD': -1}, 3000)
+        assert not manager.check(), 'Некорректные значения не применяются.'
+        assert manager.current is config
+
+    def test_sighup_wakes_watcher(self):
+        handler = signal.getsignal(signal.SIGHUP)
+        values = dict(ENVIRON)
+        manager = ConfigManager(lambda: Config.from_mapping(values),
+                                interval=60).start()
+        try:
+            values['PRACTICUM_TOKEN'] = 'new-token'
+            os.kill(os.getpid(), signal.SIGHUP)
+            for _ in range(200):
+                if manager.current.practicum_token == 'new-token':
+                    break
+                time.sleep(0.01)
+        finally:
+            manager.stop()
+            signal.signal(signal.SIGHUP, handler)
+        assert manager.current.practicum_token == 'new-token'
+
+    def test_tenant_overrides_follow_reload(self):
+        values = dict(ENVIRON)
+        manager = ConfigManager(lambda: Config.from_mapping(values))
+        tenant = manager.for_tenant(retry_period=60, endpoint=None)
+        assert tenant.retry_period == 60
+        assert tenant.overrides == {'retry_period': 60}, (
+            'Тенант хранит только переопределённые поля.'
+        )
+        values['PRACTICUM_ENDPOINT'] = 'http://localhost/api/'
+        manager.reload()
+        assert tenant.endpoint == 'http://localhost/api/'
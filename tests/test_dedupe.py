@@ -0,0 +1,67 @@
+from dedupe import DedupeCache
+from tenants import TenantState
+from utils import FakeClock
+
+
+class TestDedupeCache:
+    def test_ttl(self):
+        clock = FakeClock(0)
+        cache = DedupeCache(ttl=10, clock=clock)
+        assert cache.add(('hw', 'approved'))
+        assert not cache.add(('hw', 'approved'))
+        clock.now = 11
+        assert cache.add(('hw', 'approved')), (
+            'Ключ должен забываться по истечении TTL.'
+        )
+
+    def test_size_is_bounded(self):
+        cache = DedupeCache(maxsize=3)
+        for number in range(1000):
+            cache.add(number)
+        assert len(cache) == 3, (
+            'Размер кэша не должен расти со временем работы.'
+        )
+        assert 999 in cache and 0 not in cache
+
+    def test_value_is_part_of_repeat(self):
+        cache = DedupeCache()
+        assert cache.add('hw', 'reviewing')
+        assert not cache.add('hw', 'reviewing')
+        assert cache.add('hw', 'rejected')
+        assert cache.add('hw', 'reviewing'), (
+            'Повтором считается только последнее значение ключа.'
+        )
+
+    def test_review_rounds_are_delivered(self, homework_module):
+        state = TenantState(0)
+        statuses = ('reviewing', 'rejected', 'reviewing', 'rejected',
+                    'reviewing', 'approved')
+        sent = []
+        for status in statuses:
+            homeworks, _ = homework_module.check_response({
+                'homeworks': [{'homework_name': 'hw', 'status': status}],
+                'current_date': 0,
+            })
+            sent += homework_module.parse_changes(state, homeworks)
+        assert sent == [homework_module.parse_status(
+            {'homework_name': 'hw', 'status': status}
+        ) for status in statuses], (
+            'Каждый новый круг проверки должен доходить до студента.'
+        )
+
+    def test_errors_are_tracked_separately(self, homework_module):
+        state = TenantState(0)
+        homeworks, _ = homework_module.check_response({
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 0,
+        })
+        homework_module.parse_changes(state, homeworks)
+        assert homework_module.error_message(state, KeyError('a'))
+        assert homework_module.error_message(state, KeyError('b')) is None, (
+            'Ошибки одного типа должны отправляться один раз.'
+        )
+        assert homework_module.error_message(state, TypeError('c'))
+        state.homeworks.statuses.clear()
+        assert homework_module.parse_changes(state, homeworks) == [], (
+            'Ошибки не должны сбрасывать кэш отправленных статусов.'
+        )
@@ -0,0 +1,88 @@
+import json
+import random
+
+import requests
+
+import utils
+from engine import PollingEngine
+from tenants import Tenant
+from utils import FakeClock
+
+
+class RecordingBot(utils.MockTelegramBot):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def mock_statuses(statuses):
+    """Session.get, отвечающий статусом работы по токену тенанта."""
+    def mock_get(url=None, headers=None, params=None, **kwargs):
+        response = utils.MockResponseGET(random_timestamp=params['from_date'])
+        token = headers['Authorization'].split()[-1]
+        data = {
+            'homeworks': [{'homework_name': token,
+                           'status': statuses[token]}],
+            'current_date': params['from_date'] + 1,
+        }
+        response.headers = {}
+        response.content = json.dumps(data).encode()
+        response.json = lambda: json.loads(response.content)
+        return response
+    return staticmethod(mock_get)
+
+
+class TestPollingEngine:
+    def run_until(self, engine, clock, moment):
+        while clock.now < moment:
+            clock.sleep(engine.run_pending())
+
+    def test_polls_every_tenant(self, monkeypatch):
+        statuses = {'token-a': 'reviewing', 'token-b': 'approved'}
+        monkeypatch.setattr(requests.Session, 'get', mock_statuses(statuses))
+        tenants = [Tenant('token-a', '1'), Tenant('token-b', '2', 60)]
+        clock = FakeClock()
+        bot = RecordingBot()
+        engine = PollingEngine(bot, {t.key: t for t in tenants},
+                               retry_period=600, clock=clock,
+                               sleep=clock.sleep, jitter=0,
+                               rng=random.Random(1))
+
+        self.run_until(engine, clock, 1600)
+        assert sorted(chat for chat, _ in bot.sent) == ['1', '2'], (
+            'Убедитесь, что опрашиваются все тенанты, а неизменившийся '
+            'статус не отправляется повторно.'
+        )
+
+        statuses['token-b'] = 'rejected'
+        self.run_until(engine, clock, 1660)
+        assert bot.sent[-1][0] == '2', (
+            'Проверьте, что учитывается интервал опроса тенанта.'
+        )
+        assert 'замечания' in bot.sent[-1][1]
+
+    def test_stop_ends_due_batch(self, monkeypatch):
+        statuses = {f'token-{number}': 'reviewing' for number in range(5)}
+        monkeypatch.setattr(requests.Session, 'get', mock_statuses(statuses))
+        tenants = [Tenant(token, str(chat))
+                   for chat, token in enumerate(sorted(statuses))]
+        clock = FakeClock()
+        bot = RecordingBot()
+        engine = PollingEngine(bot, {t.key: t for t in tenants},
+                               retry_period=600, clock=clock,
+                               sleep=clock.sleep, jitter=0,
+                               rng=random.Random(1))
+        send = bot.send_message
+
+        def send_and_stop(*args, **kwargs):
+            send(*args, **kwargs)
+            engine.stop()
+
+        bot.send_message = send_and_stop
+        self.run_until(engine, clock, 1600)
+        assert len(bot.sent) == 1, (
+            'После stop() оставшиеся тенанты пачки не опрашиваются.'
+        )
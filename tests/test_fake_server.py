@@ -0,0 +1,61 @@
+import pytest
+import telegram
+
+from api_client import PracticumClient
+from exceptions import WrongStatusCode
+from fake_server import (HOMEWORKS_PATH, FakeBackend, FakeServerConfig,
+                         ServerThread)
+from utils import FakeClock
+
+
+@pytest.fixture
+def fake_server():
+    servers = []
+
+    def start(config=None, clock=None):
+        backend = FakeBackend(config, clock=clock or FakeClock(1000))
+        server = ServerThread(backend).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.stop()
+
+
+class TestFakeServer:
+    def test_homework_statuses_from_date(self, monkeypatch, fake_server,
+                                         homework_module):
+        clock = FakeClock(1000)
+        server = fake_server(FakeServerConfig(homeworks=2,
+                                              change_interval=600), clock)
+        monkeypatch.setattr(homework_module, 'api_client', PracticumClient(
+            server.url + HOMEWORKS_PATH, {'Authorization': 'OAuth token'}
+        ))
+        clock.sleep(1200)
+        answer = homework_module.get_api_answer(0)
+        homeworks, current_date = homework_module.check_response(answer)
+        assert homeworks and current_date == 2200
+        assert homework_module.get_api_answer(current_date)['homeworks'] \
+            == [], 'Работы, не изменившиеся после from_date, не отдаются.'
+
+    def test_failure_injection(self, monkeypatch, fake_server,
+                               homework_module):
+        server = fake_server(FakeServerConfig(api_failure_rate=1))
+        client = PracticumClient(server.url + HOMEWORKS_PATH,
+                                 {'Authorization': 'OAuth token'})
+        monkeypatch.setattr(homework_module, 'api_client', client)
+        with pytest.raises(WrongStatusCode) as error:
+            homework_module.fetch_api_answer(0)
+        assert error.value.status_code == 503
+        assert error.value.retry_after == 1
+
+    def test_send_message_is_rate_limited(self, fake_server):
+        server = fake_server(FakeServerConfig(chat_interval=1))
+        bot = telegram.Bot(token='1234:abcdefg', base_url=server.url + '/bot')
+        assert bot.send_message('1', 'первое').text == 'первое'
+        bot.send_message('2', 'другой чат')
+        with pytest.raises(telegram.error.RetryAfter) as error:
+            bot.send_message('1', 'второе')
+        assert error.value.retry_after == 1
+        assert server.backend.messages == [('1', 'первое'),
+                                           ('2', 'другой чат')]
@@ -0,0 +1,98 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from health import DELIVERY, POLL, Health, start_health_server
+from outbox import Outbox
+from test_engine import RecordingBot
+from utils import FakeClock
+
+
+def fetch(server):
+    url = f'http://127.0.0.1:{server.server_port}/health'
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+class TestHealth:
+    def test_stale_loop(self):
+        clock = FakeClock()
+        health = Health(clock=clock)
+        clock.sleep(599)
+        assert health.report(600, factor=1)['status'] == 'ok'
+        clock.sleep(2)
+        assert health.report(600, factor=1)['status'] == 'stale', (
+            'Цикл, не сделавший ни одного такта, должен считаться зависшим.'
+        )
+        health.beat(600)
+        clock.sleep(1199)
+        assert health.report(600, factor=1)['status'] == 'ok', (
+            'Обычная пауза между опросами не должна считаться зависанием.'
+        )
+        clock.sleep(2)
+        report = health.report(600, factor=1)
+        assert report['status'] == 'stale'
+        assert report['overdue'] == 601
+
+    def test_beat_sets_nearest_deadline(self):
+        clock = FakeClock()
+        health = Health(clock=clock)
+        health.beat(600)
+        health.beat(3600)
+        health.beat(10)
+        clock.sleep(700)
+        assert health.report(600, factor=1)['status'] == 'stale', (
+            'Срок следующего такта — ближайший опрос, а не самый поздний.'
+        )
+
+    def test_report_contents(self):
+        clock = FakeClock()
+        health = Health(clock=clock)
+        health.register('queue', lambda: 3)
+        health.retrying(POLL, 2, 1.5, ConnectionError('сбой'))
+        health.success(DELIVERY)
+        report = health.report(600)
+        assert report['retrying'] == {
+            POLL: {'attempt': 2, 'delay': 1.5, 'error': 'сбой'}
+        }
+        assert report['last_delivery'] == clock.now
+        assert report['last_poll'] is None
+        assert report['queue'] == 3
+        clock.sleep(5)
+        health.success(POLL)
+        report = health.report(600)
+        assert report['retrying'] == {}, (
+            'Успешный опрос должен сбрасывать запланированный повтор.'
+        )
+        assert report['last_poll'] == clock.now
+
+    def test_outbox_reports_delivery(self, monkeypatch):
+        health = Health()
+        monkeypatch.setattr('outbox.HEALTH', health)
+        outbox = Outbox(RecordingBot())
+        outbox.put(1, 'a')
+        outbox.drain_once()
+        assert health.report(600)['last_delivery'] is not None
+
+    @pytest.mark.parametrize('elapsed, code', [(1000, 200), (1300, 503)])
+    def test_http_status(self, elapsed, code):
+        clock = FakeClock()
+        health = Health(clock=clock)
+        health.beat(600)
+        clock.sleep(elapsed)
+        server = start_health_server(0, lambda: 600, health=health,
+                                     host='127.0.0.1')
+        try:
+            status, report = fetch(server)
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert status == code, (
+            'Зависший цикл должен отвечать кодом 503.'
+        )
+        assert report['status'] == ('ok' if code == 200 else 'stale')
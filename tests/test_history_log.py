@@ -0,0 +1,113 @@
+import time
+
+from history_log import ENTRY, HistoryLog, TenantHistory
+from state_store import MemoryStateStore, restore_state
+
+STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+
+def fill(log, tenants=3, homeworks=4):
+    moment = 0
+    for status in STATUSES:
+        for tenant in range(tenants):
+            for homework in range(homeworks):
+                moment += 1
+                log.append(moment, f'chat-{tenant}', str(homework),
+                           f'hw{homework}.zip', status)
+    return moment
+
+
+class TestHistoryLog:
+    def test_lookups_follow_chains(self, tmp_path):
+        log = HistoryLog(tmp_path / 'history.log')
+        fill(log)
+        events = log.events('chat-1', '2')
+        assert [event.status for event in events] == list(
+            reversed(STATUSES)
+        ), 'История работы должна идти от новых смен к старым.'
+        assert {event.tenant for event in log.events('chat-1')} == {'chat-1'}
+        assert len(log.events('chat-0', limit=5)) == 5
+        assert log.statuses('chat-2') == {str(number): 'approved'
+                                          for number in range(4)}
+        assert log.events('chat-9') == []
+
+    def test_reopen_recovers_heads(self, tmp_path):
+        path = tmp_path / 'history.log'
+        log = HistoryLog(path)
+        fill(log)
+        log.close()
+        log = HistoryLog(path)
+        log.append(1000, 'chat-0', '0', 'hw0.zip', 'rejected')
+        # Процесс упал: начала цепочек не сохранены, а последняя запись
+        # индекса дописана наполовину.
+        with open(path.with_name('history.log.idx'), 'ab') as index:
+            index.write(b'\0' * (ENTRY.size // 2))
+        log = HistoryLog(path)
+        assert len(log) == 49
+        assert log.statuses('chat-0')['0'] == 'rejected'
+        assert [event.moment for event in log.events('chat-0', '0')][:2] \
+            == [1000, 37]
+
+    def test_compaction_keeps_recent_events(self, tmp_path):
+        path = tmp_path / 'history.log'
+        log = HistoryLog(path, keep=2, compact_every=10_000)
+        fill(log)
+        size = path.stat().st_size
+        log.compact()
+        assert len(log) == 3 * 4 * 2
+        assert path.stat().st_size < size
+        assert [event.status for event in log.events('chat-1', '3')] == [
+            'approved', 'reviewing'
+        ]
+        assert log.statuses('chat-1')['3'] == 'approved'
+        log.append(1000, 'chat-1', '3', 'hw3.zip', 'rejected')
+        assert HistoryLog(path).events('chat-1', '3', limit=1)[0].moment \
+            == 1000
+
+    def test_interrupted_compaction_rebuilds_index(self, tmp_path):
+        path = tmp_path / 'history.log'
+        log = HistoryLog(path, keep=1)
+        fill(log)
+        log.close()
+        old_index = path.with_name('history.log.idx').read_bytes()
+        log = HistoryLog(path, keep=1)
+        log.compact()
+        log.close()
+        path.with_name('history.log.idx').write_bytes(old_index)
+        path.with_name('history.log.heads').unlink()
+        log = HistoryLog(path)
+        assert len(log) == 12
+        assert log.statuses('chat-0') == {str(number): 'approved'
+                                          for number in range(4)}
+
+    def test_append_cost_does_not_grow(self, tmp_path):
+        log = HistoryLog(tmp_path / 'history.log')
+        timings = []
+        for batch in range(5):
+            started = time.perf_counter()
+            for number in range(2000):
+                log.append(number, f'chat-{number % 50}', str(number % 500),
+                           'hw.zip', 'reviewing')
+            timings.append(time.perf_counter() - started)
+        assert timings[-1] < 3 * timings[0] + 0.05, (
+            'Добавление в журнал не должно замедляться с его ростом.'
+        )
+
+
+class TestTenantHistory:
+    def test_state_history_is_backed_by_log(self, tmp_path):
+        log = HistoryLog(tmp_path / 'history.log')
+        store = MemoryStateStore()
+        state = restore_state(store, 'chat', now=100, next_poll=0,
+                              history=log)
+        assert isinstance(state.history, TenantHistory)
+        state.history.extend([(1, 'a', 'a.zip', 'reviewing'),
+                              (2, 'a', 'a.zip', 'approved')])
+        assert list(state.history) == [(1, 'a', 'a.zip', 'reviewing'),
+                                       (2, 'a', 'a.zip', 'approved')]
+
+        restored = restore_state(MemoryStateStore(), 'chat', now=200,
+                                 next_poll=0, history=log)
+        assert restored.homeworks.statuses == {'a': 'approved'}, (
+            'Без сохранённого состояния статусы восстанавливаются из журнала.'
+        )
@@ -0,0 +1,97 @@
+import random
+import time
+
+from homework_index import HomeworkIndex
+from tenants import TenantState
+from validation import ResponseValidator
+
+VALIDATOR = ResponseValidator({'approved': '', 'reviewing': '',
+                               'rejected': ''})
+
+
+def records(homeworks):
+    return VALIDATOR.validate({'homeworks': homeworks, 'current_date': 0})[0]
+
+
+def synthetic_homeworks(count, seed=0):
+    rng = random.Random(seed)
+    return records([
+        {'id': number, 'homework_name': f'hw{number}',
+         'status': rng.choice(('approved', 'reviewing', 'rejected'))}
+        for number in range(count)
+    ])
+
+
+class TestHomeworkIndex:
+    def test_key(self):
+        assert VALIDATOR.record(
+            {'id': 7, 'homework_name': 'hw', 'status': 'approved'}
+        ).key == '7'
+        assert VALIDATOR.record(
+            {'homework_name': 'hw', 'status': 'approved'}
+        ).key == 'hw'
+
+    def test_all_homeworks_are_processed(self, homework_module):
+        state = TenantState(0)
+        homeworks = records([
+            {'homework_name': 'hw2', 'status': 'reviewing'},
+            {'homework_name': 'hw1', 'status': 'approved'},
+        ])
+        messages = homework_module.parse_changes(state, homeworks)
+        assert len(messages) == 2, (
+            'Убедитесь, что обрабатываются все работы из ответа API, '
+            'а не только первая.'
+        )
+        assert '"hw1"' in messages[0] and '"hw2"' in messages[1], (
+            'Сообщения должны идти от старых работ к новым.'
+        )
+        assert state.status == 'reviewing'
+        assert homework_module.parse_changes(state, homeworks) == [], (
+            'Неизменившиеся статусы не должны порождать сообщения.'
+        )
+
+    def test_failed_parse_does_not_commit(self, homework_module):
+        state = TenantState(0)
+        homeworks = records([
+            {'homework_name': 'hw2', 'status': 'unknown'},
+            {'homework_name': 'hw1', 'status': 'approved'},
+        ])
+        try:
+            homework_module.parse_changes(state, homeworks)
+        except KeyError:
+            pass
+        assert len(state.homeworks) == 0, (
+            'Индекс не должен обновляться, если сообщение не разобрано.'
+        )
+
+    def test_large_batch(self):
+        count = 100000
+        index = HomeworkIndex()
+        homeworks = synthetic_homeworks(count)
+        changes = index.diff(homeworks)
+        assert len(changes) == count
+        index.commit(changes)
+
+        updated = synthetic_homeworks(count, seed=1)
+        expected = sum(
+            old.status != new.status
+            for old, new in zip(homeworks, updated)
+        )
+        started = time.perf_counter()
+        changes = index.diff(updated)
+        elapsed = time.perf_counter() - started
+        assert len(changes) == expected
+        assert all(change.old != change.new for change in changes)
+        assert elapsed < 1, (
+            f'Сравнение {count} работ заняло {elapsed:.2f} с.'
+        )
+
+    def test_duplicates_in_batch(self):
+        index = HomeworkIndex({'1': 'reviewing'})
+        changes = index.diff(records([
+            {'id': 1, 'homework_name': 'hw', 'status': 'approved'},
+            {'id': 1, 'homework_name': 'hw', 'status': 'rejected'},
+        ]))
+        assert [(c.old, c.new) for c in changes] == [
+            ('reviewing', 'approved')
+        ], 'Для повторяющейся работы учитывается самая свежая запись.'
@@ -0,0 +1,80 @@
+import io
+import json
+import logging
+import random
+
+from logs import (JsonFormatter, SamplingFilter, build_handler,
+                  parse_sampling)
+
+
+class CountingStr:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'сообщение'
+
+
+def make_logger(name, handler, level=logging.DEBUG):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+class TestLogs:
+    def test_json_records_with_fields(self):
+        stream = io.StringIO()
+        handler, listener = build_handler(stream, log_format='json')
+        logger = make_logger('test_logs.json', handler)
+        listener.start()
+        logger.info('Отправлено: %s', 'текст',
+                    extra={'tenant': '42', 'latency': 0.25})
+        listener.stop()
+        record = json.loads(stream.getvalue())
+        assert record['message'] == 'Отправлено: текст'
+        assert record['level'] == 'INFO'
+        assert record['tenant'] == '42' and record['latency'] == 0.25
+        assert 'homework' not in record
+
+    def test_formatting_is_lazy_and_deferred(self):
+        stream = io.StringIO()
+        handler, listener = build_handler(stream)
+        logger = make_logger('test_logs.lazy', handler, logging.INFO)
+        argument = CountingStr()
+        logger.debug('Пропущено: %s', argument)
+        assert argument.calls == 0, (
+            'Отфильтрованная запись не должна форматироваться.'
+        )
+        logger.info('Записано: %s', argument)
+        assert argument.calls == 0, (
+            'Запись должна форматироваться в потоке QueueListener.'
+        )
+        listener.start()
+        listener.stop()
+        assert argument.calls == 1
+        assert 'Записано: сообщение' in stream.getvalue()
+
+    def test_sampling_per_level(self):
+        rates = parse_sampling('debug=0.1, ERROR=1')
+        assert rates == {logging.DEBUG: 0.1, logging.ERROR: 1.0}
+        sampling = SamplingFilter(rates, rng=random.Random(3))
+
+        def kept(level):
+            record = logging.LogRecord('x', level, '', 0, 'msg', (), None)
+            return sum(sampling.filter(record) for _ in range(1000))
+
+        assert 50 < kept(logging.DEBUG) < 150
+        assert kept(logging.ERROR) == kept(logging.INFO) == 1000
+
+    def test_json_includes_exception(self):
+        try:
+            raise ValueError('сбой')
+        except ValueError as error:
+            record = logging.LogRecord('x', logging.ERROR, '', 0, '%s',
+                                       (error,), (ValueError, error, None))
+        data = json.loads(JsonFormatter().format(record))
+        assert data['message'] == 'сбой'
+        assert 'ValueError' in data['exc_info']
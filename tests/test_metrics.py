@@ -0,0 +1,84 @@
+import urllib.request
+
+import pytest
+import requests
+
+import utils
+from metrics import (API_RESPONSES, VALIDATION_FAILURES, Counter, Histogram,
+                     Registry, api_response, count_exceptions,
+                     start_http_server)
+
+
+class TestMetrics:
+    def test_exposition_format(self):
+        registry = Registry()
+        counter = Counter('requests_total', 'Запросы.', ('code',),
+                          registry=registry)
+        histogram = Histogram('latency_seconds', 'Задержка.',
+                              buckets=(0.1, 1), registry=registry)
+        counter.labels('200').inc()
+        counter.labels('200').inc()
+        histogram.observe(0.05)
+        histogram.observe(5)
+        text = registry.exposition()
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{code="200"} 2' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1.0"} 1' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+        assert 'latency_seconds_count 2' in text
+
+    def test_label_child_is_cached(self):
+        counter = Counter('cached_total', 'Кэш.', ('stage',),
+                          registry=Registry())
+        assert counter.labels('a') is counter.labels('a'), (
+            'Серия метрики должна создаваться один раз.'
+        )
+
+    def test_api_response_series_per_code(self):
+        assert api_response(200) is API_RESPONSES.labels('200')
+        assert api_response(200) is api_response(200), (
+            'Серия кода ответа должна браться из кеша.'
+        )
+
+    def test_count_exceptions(self):
+        counter = Counter('errors_total', 'Ошибки.', registry=Registry())
+
+        @count_exceptions(counter)
+        def broken():
+            raise KeyError('x')
+
+        with pytest.raises(KeyError):
+            broken()
+        assert counter.labels().value == 1
+
+    def test_homework_is_instrumented(self, monkeypatch, homework_module):
+        def mock_get(*args, **kwargs):
+            return utils.MockResponseGET(random_timestamp=1)
+
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_get))
+        ok = API_RESPONSES.labels('200')
+        failed = VALIDATION_FAILURES.labels('check_response')
+        before_ok, before_failed = ok.value, failed.value
+        homework_module.get_api_answer(0)
+        with pytest.raises(TypeError):
+            homework_module.check_response([])
+        assert ok.value == before_ok + 1, (
+            'Убедитесь, что коды ответов API попадают в метрики.'
+        )
+        assert failed.value == before_failed + 1, (
+            'Убедитесь, что ошибки проверки ответа попадают в метрики.'
+        )
+
+    def test_http_endpoint(self):
+        registry = Registry()
+        Counter('served_total', 'Отдано.', registry=registry).inc()
+        server = start_http_server(0, registry, host='127.0.0.1')
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'served_total 1' in body
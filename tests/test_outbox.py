@@ -0,0 +1,156 @@
+import time
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+import utils
+from outbox import Outbox, TokenBucket
+from utils import FakeClock
+
+
+class FlakyBot(utils.MockTelegramBot):
+    """Бот, который сначала выбрасывает заданные ошибки."""
+
+    def __init__(self, errors=(), **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+class TestOutbox:
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=2, now=0)
+        bucket.consume(0)
+        bucket.consume(0)
+        assert bucket.delay(0) == 0.5
+        assert bucket.delay(0.5) == 0
+
+    def test_messages_for_chat_are_coalesced(self):
+        bot = FlakyBot()
+        outbox = Outbox(bot, clock=FakeClock(0.0))
+        for status in ('reviewing', 'rejected', 'approved'):
+            outbox.put(1, status)
+        outbox.put(2, 'approved')
+        outbox.drain_once()
+        assert bot.sent == [(1, 'reviewing\n\nrejected\n\napproved'),
+                            (2, 'approved')], (
+            'Сообщения для одного чата должны склеиваться в одно.'
+        )
+        assert len(outbox) == 0
+
+    def test_rate_limits(self):
+        clock = FakeClock(0.0)
+        bot = FlakyBot()
+        outbox = Outbox(bot, global_rate=2, chat_interval=1, clock=clock)
+        for chat_id in range(4):
+            outbox.put(chat_id, 'a')
+        delay = outbox.drain_once()
+        assert len(bot.sent) == 2 and delay == 0.5, (
+            'Проверьте глобальное ограничение частоты отправки.'
+        )
+        outbox.put(0, 'b')
+        clock.now = 0.5
+        outbox.drain_once()
+        assert [chat for chat, _ in bot.sent] == [0, 1, 2], (
+            'Проверьте ограничение частоты отправки в один чат.'
+        )
+        clock.now = 1
+        outbox.drain_once()
+        assert bot.sent[-1] == (3, 'a'), (
+            'Чаты должны обслуживаться по очереди.'
+        )
+        clock.now = 1.5
+        outbox.drain_once()
+        assert bot.sent[-1] == (0, 'b')
+
+    def test_retry_after_is_honored(self):
+        clock = FakeClock(0.0)
+        bot = FlakyBot([RetryAfter(30)])
+        outbox = Outbox(bot, clock=clock)
+        outbox.put(1, 'a')
+        assert outbox.drain_once() == 30, (
+            'Убедитесь, что после RetryAfter отправка приостанавливается.'
+        )
+        outbox.put(2, 'b')
+        clock.now = 29
+        outbox.drain_once()
+        assert bot.sent == []
+        clock.now = 30
+        outbox.drain_once()
+        assert sorted(bot.sent) == [(1, 'a'), (2, 'b')]
+
+    def test_backoff_and_permanent_errors(self, caplog):
+        clock = FakeClock(0.0)
+        bot = FlakyBot([NetworkError('a'), NetworkError('b'),
+                        BadRequest('chat not found')])
+        outbox = Outbox(bot, backoff=1, clock=clock)
+        outbox.put(1, 'first')
+        assert outbox.drain_once() == 1
+        clock.now = 1
+        assert outbox.drain_once() == 2, (
+            'Пауза между повторами должна расти экспоненциально.'
+        )
+        clock.now = 3
+        outbox.drain_once()
+        assert len(outbox) == 0 and bot.sent == [], (
+            'Сообщение с неисправимой ошибкой должно отбрасываться.'
+        )
+        assert any(r.levelname == 'ERROR' for r in caplog.records)
+
+    def test_many_chats_in_send_time_order(self):
+        clock = FakeClock(0.0)
+        bot = FlakyBot([NetworkError('a')])
+        outbox = Outbox(bot, global_rate=10000, chat_interval=1,
+                        backoff=5, clock=clock)
+        for chat_id in range(1000):
+            outbox.put(chat_id, 'a')
+        assert outbox.drain_once() == 5
+        assert len(bot.sent) == 999 and len(outbox.chats) == 1000
+        for chat_id in (10, 20):
+            outbox.put(chat_id, 'b')
+        clock.now = 1
+        assert outbox.drain_once() == 4
+        assert bot.sent[-2:] == [(10, 'b'), (20, 'b')], (
+            'Чаты должны отправляться по времени, когда им это разрешено.'
+        )
+        assert list(outbox.chats) == [0, 10, 20], (
+            'Опустевшие чаты должны забываться после интервала отправки.'
+        )
+        clock.now = 5
+        outbox.drain_once()
+        assert bot.sent[-1] == (0, 'a') and len(outbox) == 0
+
+    def test_worker_thread(self):
+        bot = FlakyBot()
+        outbox = Outbox(bot)
+        outbox.start()
+        outbox.put(1, 'a')
+        deadline = time.monotonic() + 5
+        while not bot.sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+        outbox.stop(timeout=5)
+        assert bot.sent == [(1, 'a')]
+
+    def test_drain_sends_rest_within_deadline(self, caplog):
+        bot = FlakyBot([NetworkError('a')])
+        outbox = Outbox(bot, chat_interval=0, backoff=0.05)
+        outbox.put(1, 'a')
+        outbox.put(2, 'b')
+        assert outbox.drain(timeout=5) == 0
+        assert sorted(bot.sent) == [(1, 'a'), (2, 'b')], (
+            'При остановке очередь должна досылаться.'
+        )
+
+        bot = FlakyBot([NetworkError(str(number)) for number in range(5)])
+        outbox = Outbox(bot, backoff=10)
+        outbox.put(1, 'a')
+        started = time.monotonic()
+        assert outbox.drain(timeout=1) == 1
+        assert time.monotonic() - started < 1, (
+            'Досылка не должна выходить за отведённое время.'
+        )
+        assert any(r.levelname == 'ERROR' for r in caplog.records)
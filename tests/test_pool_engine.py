@@ -0,0 +1,78 @@
+import random
+import threading
+
+import requests
+
+from fake_server import FakeServerConfig
+from pool_benchmark import format_rows, run_benchmark
+from pool_engine import ThreadedPollingEngine
+from tenants import Tenant
+from test_engine import RecordingBot, mock_statuses
+from utils import FakeClock
+
+
+class BlockedBot(RecordingBot):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.released = threading.Event()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.released.wait(5)
+        super().send_message(chat_id, text)
+
+
+def make_engine(bot, statuses, clock, **kwargs):
+    tenants = [Tenant(token, str(chat)) for chat, token
+               in enumerate(sorted(statuses))]
+    return ThreadedPollingEngine(bot, {t.key: t for t in tenants},
+                                 retry_period=600, clock=clock,
+                                 sleep=clock.sleep, jitter=0,
+                                 rng=random.Random(1), **kwargs)
+
+
+class TestThreadedPollingEngine:
+    def test_polls_every_tenant(self, monkeypatch):
+        statuses = {f'token-{number}': 'reviewing' for number in range(20)}
+        monkeypatch.setattr(requests.Session, 'get', mock_statuses(statuses))
+        clock, bot = FakeClock(), RecordingBot()
+        engine = make_engine(bot, statuses, clock, api_workers=4)
+        engine.poll_due(list(engine.tenants))
+        engine.close()
+        assert sorted(chat for chat, _ in bot.sent) == sorted(
+            str(chat) for chat in range(20)
+        ), 'Каждый тенант должен быть опрошен и получить сообщение.'
+        assert all(state.next_poll > clock.now
+                   for state in engine.states.values())
+
+    def test_slow_telegram_does_not_stall_polling(self, monkeypatch):
+        statuses = {'token-a': 'reviewing', 'token-b': 'approved'}
+        monkeypatch.setattr(requests.Session, 'get', mock_statuses(statuses))
+        bot = BlockedBot()
+        engine = make_engine(bot, statuses, FakeClock(), telegram_workers=1)
+        engine.poll_due(list(engine.tenants))
+        assert not bot.sent, 'Опрос не должен ждать отправки в Telegram.'
+        assert all(state.homeworks.statuses
+                   for state in engine.states.values())
+        bot.released.set()
+        engine.close()
+        assert len(bot.sent) == 2, (
+            'Остановка должна дождаться отправки всех сообщений.'
+        )
+
+    def test_stop_ends_run_forever(self, monkeypatch):
+        monkeypatch.setattr(requests.Session, 'get',
+                            mock_statuses({'token-a': 'reviewing'}))
+        engine = make_engine(RecordingBot(), {'token-a': 'reviewing'},
+                             FakeClock())
+        engine.sleep = lambda seconds: engine.stop()
+        engine.run_forever()
+        assert engine.api_pool._shutdown and engine.telegram_pool._shutdown
+
+
+class TestPoolBenchmark:
+    def test_benchmark_runs(self):
+        rows = run_benchmark((1, 5), FakeServerConfig(homeworks=1,
+                                                      change_interval=1),
+                             telegram_latency=0, api_workers=2)
+        assert [row.tenants for row in rows] == [1, 5]
+        assert 'ускорение' in format_rows(rows)
@@ -0,0 +1,35 @@
+from replay import (STAGES, format_report, load_recording, percentile,
+                    run_replay, save_recording, synthetic_recording)
+
+
+class TestReplay:
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 95) == 0.0
+
+    def test_replay_runs_every_stage_offline(self, tmp_path,
+                                             homework_module):
+        records = synthetic_recording(200, homeworks=3)
+        records.insert(50, {'at': records[49]['at'] + 1,
+                            'status_code': 503, 'body': {}})
+        path = tmp_path / 'recording.jsonl'
+        save_recording(path, records)
+        session = homework_module.api_client._session
+
+        report = run_replay(load_recording(path))
+
+        changes = sum(len(record['body'].get('homeworks', []))
+                      for record in records)
+        assert report.responses == len(records)
+        assert report.messages == changes, (
+            'Каждая смена статуса из записи должна дойти до send_message.'
+        )
+        assert report.errors == 1
+        assert len(report.timings['get_api_answer']) == len(records)
+        assert report.peak_memory > 0
+        assert homework_module.api_client._session is session, (
+            'После прогона сеть должна быть восстановлена.'
+        )
+        assert all(stage in format_report(report) for stage in STAGES)
@@ -0,0 +1,130 @@
+import random
+import threading
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import pytest
+import requests
+import telegram
+
+import utils
+from exceptions import (CircuitOpen, RequestError, ShutdownRequested,
+                        WrongStatusCode)
+from retry import RetryPolicy, parse_retry_after
+from test_engine import RecordingBot
+from utils import FakeClock
+
+
+def flaky(errors, result='ok'):
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    return func, calls
+
+
+class TestRetryPolicy:
+    def policy(self, clock, **kwargs):
+        return RetryPolicy((RequestError, WrongStatusCode), clock=clock,
+                           sleep=clock.sleep, rng=random.Random(1), **kwargs)
+
+    def test_parse_retry_after(self):
+        now = datetime(2020, 2, 13, 14, 40, 0, tzinfo=timezone.utc)
+        assert parse_retry_after('120') == 120
+        assert parse_retry_after('Thu, 13 Feb 2020 14:40:30 GMT', now) == 30
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after(None) is None
+
+    def test_transient_errors_are_retried_with_full_jitter(self):
+        clock = FakeClock(0)
+        func, calls = flaky([RequestError('x'), RequestError('y')])
+        policy = self.policy(clock, base=1, max_delay=30)
+        assert policy.call(func) == 'ok' and len(calls) == 3
+        assert 0 <= clock.now <= 1 + 2, (
+            'Пауза перед повтором не должна превышать base·2^попытка.'
+        )
+
+    @pytest.mark.parametrize('error', [
+        WrongStatusCode('401', HTTPStatus.UNAUTHORIZED),
+        CircuitOpen('open'),
+        KeyError('homeworks'),
+    ])
+    def test_permanent_errors_are_not_retried(self, error):
+        func, calls = flaky([error])
+        with pytest.raises(type(error)):
+            self.policy(FakeClock(0)).call(func)
+        assert len(calls) == 1
+
+    def test_retry_after_is_honored(self):
+        clock = FakeClock(0)
+        func, calls = flaky([WrongStatusCode(
+            '429', HTTPStatus.TOO_MANY_REQUESTS, retry_after=7
+        )])
+        assert self.policy(clock).call(func) == 'ok'
+        assert clock.now == 7, 'Убедитесь, что учитывается Retry-After.'
+
+    def test_max_elapsed_budget(self):
+        clock = FakeClock(0)
+        func, calls = flaky([WrongStatusCode(
+            '503', HTTPStatus.SERVICE_UNAVAILABLE, retry_after=300
+        )])
+        with pytest.raises(WrongStatusCode):
+            self.policy(clock, max_elapsed=60).call(func)
+        assert len(calls) == 1 and clock.now == 0, (
+            'Повтор, выходящий за бюджет времени, не выполняется.'
+        )
+
+    def test_stop_interrupts_backoff(self):
+        stop = threading.Event()
+        func, calls = flaky([RequestError('x')] * 3)
+        policy = self.policy(FakeClock(0))
+        policy.stop_on(stop, lambda seconds: stop.set())
+        with pytest.raises(ShutdownRequested):
+            policy.call(func)
+        assert len(calls) == 1, (
+            'После запроса остановки повторов быть не должно.'
+        )
+
+    def test_stop_wait_returns_at_once(self):
+        stop = threading.Event()
+        stop.set()
+        policy = self.policy(FakeClock(0), max_delay=30)
+        policy.stop_on(stop)
+        func, calls = flaky([WrongStatusCode(
+            '503', HTTPStatus.SERVICE_UNAVAILABLE, retry_after=30
+        )])
+        with pytest.raises(ShutdownRequested):
+            policy.call(func)
+        assert len(calls) == 1
+
+
+class TestRetriesInHomework:
+    def test_get_api_answer_survives_a_blip(self, monkeypatch,
+                                            homework_module):
+        responses = [
+            utils.MockResponseGET(http_status=HTTPStatus.BAD_GATEWAY),
+            utils.MockResponseGET(random_timestamp=5),
+        ]
+        monkeypatch.setattr(requests.Session, 'get',
+                            staticmethod(lambda **kwargs: responses.pop(0)))
+        answer = homework_module.get_api_answer(0)
+        assert answer == {'homeworks': [], 'current_date': 5}, (
+            'Временный сбой API должен повторяться, а не ждать цикл.'
+        )
+
+    def test_send_message_retries_network_errors(self, homework_module):
+        errors = [telegram.error.NetworkError('reset')]
+
+        class FlakyBot(RecordingBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if errors:
+                    raise errors.pop()
+                super().send_message(chat_id, text)
+
+        bot = FlakyBot()
+        homework_module.send_message(bot, 'hello')
+        assert bot.sent == [(homework_module.TELEGRAM_CHAT_ID, 'hello')]
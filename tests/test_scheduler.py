@@ -0,0 +1,51 @@
+import random
+from collections import Counter
+
+from scheduler import Scheduler, next_deadline
+
+
+class TestScheduler:
+    def test_next_deadline_has_no_drift(self):
+        assert next_deadline(100, 600, 650) == 700, (
+            'Дедлайн должен отсчитываться от предыдущего, а не от '
+            'окончания опроса.'
+        )
+        assert next_deadline(100, 600, 1950) == 2500, (
+            'Пропущенные интервалы не должны навёрстываться пачкой.'
+        )
+
+    def test_remove_and_reschedule(self):
+        scheduler = Scheduler(jitter=0, rng=random.Random(1))
+        scheduler.add('a', 10, now=0)
+        scheduler.add('b', 10, now=0)
+        scheduler.remove('b')
+        assert 'b' not in scheduler and len(scheduler) == 1
+        assert scheduler.pop_due(10) == ['a']
+        assert scheduler.reschedule('a', now=10, period=20) > 20
+
+    def test_even_rate_for_10k_tenants(self):
+        tenants, period, bucket = 10000, 600, 60
+        scheduler = Scheduler(rng=random.Random(42))
+        for key in range(tenants):
+            scheduler.add(key, period, now=0)
+
+        now, fired = 0, Counter()
+        per_tenant = Counter()
+        while now < 6 * period:
+            for key in scheduler.pop_due(now):
+                fired[now // bucket] += 1
+                per_tenant[key] += 1
+                scheduler.reschedule(key, now)
+            now += 1
+
+        expected = tenants * bucket / period
+        rates = [fired[index] for index in range(6 * period // bucket)]
+        assert max(rates) < expected * 1.15, (
+            f'Всплеск запросов: {max(rates)} при ожидаемых {expected}.'
+        )
+        assert min(rates[1:]) > expected * 0.85, (
+            f'Провал в запросах: {min(rates)} при ожидаемых {expected}.'
+        )
+        assert set(per_tenant.values()) <= {5, 6}, (
+            'Каждый тенант должен опрашиваться раз в свой интервал.'
+        )
@@ -0,0 +1,166 @@
+import random
+from collections import Counter
+
+import requests
+
+from engine import PollingEngine
+from sharding import HashRing, LeaseTable, ShardWorker, Supervisor
+from state_store import SQLiteStateStore
+from tenants import Tenant
+from test_engine import RecordingBot, mock_statuses
+from utils import FakeClock
+
+KEYS = [f'tenant-{number}' for number in range(2000)]
+
+
+def make_worker(tmp_path, name, tenants, clock, bot):
+    store = SQLiteStateStore(tmp_path / 'state.sqlite3', clock=clock)
+    engine = PollingEngine(bot, {}, retry_period=600, clock=clock,
+                           sleep=clock.sleep, jitter=0,
+                           rng=random.Random(1), store=store)
+    leases = LeaseTable(tmp_path / 'leases.sqlite3', name, clock=clock)
+    return ShardWorker(engine, tenants, leases)
+
+
+def run_until(workers, clock, moment):
+    while clock.now < moment:
+        delay = min(worker.engine.run_pending() for worker in workers)
+        clock.sleep(max(delay, 1))
+
+
+class TestHashRing:
+    def test_balance(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        shares = Counter(ring.owner(key) for key in KEYS)
+        assert set(shares) == {'a', 'b', 'c', 'd'}
+        assert max(shares.values()) < 2 * min(shares.values()), (
+            'Ключи должны распределяться по узлам примерно поровну.'
+        )
+
+    def test_adding_node_moves_few_keys(self):
+        before = HashRing(['a', 'b', 'c', 'd'])
+        after = HashRing(['a', 'b', 'c', 'd', 'e'])
+        moved = [key for key in KEYS if before.owner(key) != after.owner(key)]
+        assert all(after.owner(key) == 'e' for key in moved), (
+            'Ключи должны переходить только на новый узел.'
+        )
+        assert len(moved) < 0.3 * len(KEYS)
+
+    def test_empty_ring(self):
+        assert HashRing([]).owner('key') is None
+
+
+class TestLeaseTable:
+    def test_lease_is_exclusive_until_expiry(self, tmp_path):
+        clock = FakeClock()
+        first = LeaseTable(tmp_path / 'leases.db', 'a', ttl=60, clock=clock)
+        second = LeaseTable(tmp_path / 'leases.db', 'b', ttl=60, clock=clock)
+        assert first.acquire(['t1', 't2']) == {'t1', 't2'}
+        assert second.acquire(['t1']) == set()
+        first.release(['t1'])
+        assert second.acquire(['t1']) == {'t1'}
+        clock.sleep(61)
+        assert second.acquire(['t2']) == {'t2'}, (
+            'Аренда пропавшего воркера должна истекать.'
+        )
+        assert first.acquire(['t2']) == set()
+
+    def test_members(self, tmp_path):
+        clock = FakeClock()
+        first = LeaseTable(tmp_path / 'leases.db', 'a', ttl=60, clock=clock)
+        second = LeaseTable(tmp_path / 'leases.db', 'b', ttl=60, clock=clock)
+        first.heartbeat()
+        second.heartbeat()
+        assert sorted(first.members()) == ['a', 'b']
+        second.leave()
+        assert first.members() == ['a']
+
+
+class TestShardWorker:
+    def test_tenants_move_without_duplicate_messages(self, tmp_path,
+                                                     monkeypatch):
+        statuses = {f'token-{number}': 'reviewing' for number in range(30)}
+        monkeypatch.setattr(requests.Session, 'get', mock_statuses(statuses))
+        tenants = {}
+        for chat, token in enumerate(sorted(statuses)):
+            tenant = Tenant(token, str(chat))
+            tenants[tenant.key] = tenant
+        clock, bot = FakeClock(), RecordingBot()
+        first = make_worker(tmp_path, 'a', tenants, clock, bot)
+        second = make_worker(tmp_path, 'b', tenants, clock, bot)
+        first.leases.heartbeat()
+        second.rebalance()
+        first.rebalance()
+        second.rebalance()
+        owned = [set(first.engine.tenants), set(second.engine.tenants)]
+        assert owned[0] and owned[1] and not owned[0] & owned[1], (
+            'Каждый тенант должен опрашиваться ровно одним воркером.'
+        )
+        assert owned[0] | owned[1] == set(tenants)
+
+        run_until([first, second], clock, 1700)
+        assert sorted(chat for chat, _ in bot.sent) == sorted(
+            tenant.chat_id for tenant in tenants.values()
+        )
+        second.leave()
+        first.rebalance()
+        assert set(first.engine.tenants) == set(tenants)
+        sent = len(bot.sent)
+        run_until([first], clock, 2400)
+        assert len(bot.sent) == sent, (
+            'Новый владелец не должен повторять уже отправленные '
+            'уведомления.'
+        )
+
+    def test_long_batch_keeps_leases(self, tmp_path, monkeypatch):
+        statuses = {f'token-{number}': 'reviewing' for number in range(4)}
+        clock, bot = FakeClock(), RecordingBot()
+        answer = mock_statuses(statuses).__func__
+
+        def slow_get(*args, **kwargs):
+            clock.sleep(40)
+            return answer(*args, **kwargs)
+
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(slow_get))
+        tenants = {}
+        for chat, token in enumerate(sorted(statuses)):
+            tenant = Tenant(token, str(chat))
+            tenants[tenant.key] = tenant
+        worker = make_worker(tmp_path, 'a', tenants, clock, bot)
+        worker.rebalance()
+        rival = LeaseTable(tmp_path / 'leases.sqlite3', 'b', clock=clock)
+        clock.sleep(600)
+        worker.engine.run_pending()
+        assert len(bot.sent) == 4
+        assert rival.acquire(tenants) == set(), (
+            'Аренда должна продлеваться во время пачки опросов длиннее ttl.'
+        )
+
+    def test_lost_lease_drops_answer(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(requests.Session, 'get',
+                            mock_statuses({'token-1': 'approved'}))
+        tenant = Tenant('token-1', '1')
+        clock, bot = FakeClock(), RecordingBot()
+        worker = make_worker(tmp_path, 'a', {tenant.key: tenant}, clock, bot)
+        worker.rebalance()
+        worker.held.clear()
+        worker.engine.poll(tenant, worker.engine.states[tenant.key])
+        assert bot.sent == [], (
+            'Тенанту, чью аренду забрали, нельзя слать сообщения.'
+        )
+        assert not worker.engine.store.get(tenant.key)['homeworks']
+
+
+class TestSupervisor:
+    def test_restarts_finished_workers(self):
+        supervisor = Supervisor(2, 'node', target=str).start()
+        try:
+            for process in supervisor.processes.values():
+                process.join(30)
+            assert [process.name for process
+                    in supervisor.processes.values()] == ['node/0', 'node/1']
+            assert supervisor.check() == 2
+        finally:
+            supervisor.stop()
+            supervisor.shutdown(timeout=30)
+        assert supervisor.check() == 0
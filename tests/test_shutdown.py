@@ -0,0 +1,66 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from engine import PollingEngine
+from exceptions import ShutdownRequested
+from outbox import Outbox
+from shutdown import GracefulShutdown
+from test_engine import RecordingBot
+
+
+def send_signal(delay):
+    timer = threading.Timer(delay, os.kill, (os.getpid(), signal.SIGTERM))
+    timer.start()
+    return timer
+
+
+class TestGracefulShutdown:
+    def test_signal_interrupts_wait(self):
+        started = time.monotonic()
+        with GracefulShutdown() as shutdown:
+            send_signal(0.1)
+            with pytest.raises(ShutdownRequested):
+                with shutdown.waiting():
+                    time.sleep(10)
+        assert time.monotonic() - started < 5, (
+            'Сигнал должен прерывать ожидание следующего опроса.'
+        )
+        assert shutdown.requested.is_set()
+
+    def test_signal_does_not_interrupt_work(self):
+        with GracefulShutdown() as shutdown:
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert shutdown.requested.is_set(), (
+                'Сигнал вне ожидания только отмечает запрос остановки.'
+            )
+            with pytest.raises(ShutdownRequested):
+                with shutdown.waiting():
+                    pytest.fail('Ожидание после сигнала не должно начинаться.')
+
+    def test_handlers_restored(self):
+        previous = signal.getsignal(signal.SIGTERM)
+        with GracefulShutdown():
+            assert signal.getsignal(signal.SIGTERM) != previous
+        assert signal.getsignal(signal.SIGTERM) == previous
+
+
+class TestEngineShutdown:
+    def test_stop_drains_outbox_and_flushes(self):
+        bot = RecordingBot()
+        outbox = Outbox(bot)
+        engine = PollingEngine(bot, {}, retry_period=600, outbox=outbox)
+        flushed = []
+        engine.store.close = lambda: flushed.append(True)
+        outbox.put(1, 'a')
+        threading.Timer(0.1, engine.stop).start()
+        started = time.monotonic()
+        engine.run_forever()
+        assert time.monotonic() - started < 5, (
+            'stop() должен прерывать паузу между опросами.'
+        )
+        assert bot.sent == [(1, 'a')]
+        assert flushed == [True]
@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from config import Config, ConfigManager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('telegram', 'requests', 'dotenv', 'aiohttp')
+IMPORT_BUDGET_US = 500_000
+
+
+def import_times(module):
+    """Время импорта модулей по выводу python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup:
+    def test_import_is_light(self):
+        times = import_times('homework')
+        heavy = [name for name in times
+                 if name.split('.')[0] in HEAVY_MODULES]
+        assert not heavy, (
+            f'Импорт homework не должен тянуть тяжёлые модули: {heavy}'
+        )
+        print(f'import homework: {times["homework"] / 1000:.1f} ms')
+        assert times['homework'] < IMPORT_BUDGET_US
+
+    def test_import_has_no_side_effects(self):
+        code = (
+            'import logging, threading, homework; '
+            'assert not logging.getLogger().handlers; '
+            'assert threading.active_count() == 1'
+        )
+        subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR,
+                       check=True, env=dict(os.environ, PYTHONPATH=BASE_DIR))
+
+    def test_create_app_applies_config(self, monkeypatch, homework_module):
+        for name in ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID',
+                     'STATE_PATH', 'HEADERS', 'RETRY_PERIOD', 'ENDPOINT',
+                     'TELEGRAM_BASE_URL', 'api_breaker', 'applied'):
+            monkeypatch.setattr(homework_module, name,
+                                getattr(homework_module, name))
+        for name in ('headers', 'endpoint'):
+            monkeypatch.setattr(homework_module.api_client, name,
+                                getattr(homework_module.api_client, name))
+        for name in ('settings', 'history_log'):
+            monkeypatch.setattr(homework_module, name,
+                                getattr(homework_module, name))
+        monkeypatch.setattr(homework_module, 'configure_logging',
+                            lambda **kwargs: None)
+        run = homework_module.create_app({
+            'PRACTICUM_TOKEN': 'new-token', 'TELEGRAM_TOKEN': '1:x',
+            'TELEGRAM_CHAT_ID': '7', 'TENANTS_PATH': 'tenants.json',
+            'METRICS_PORT': '9000',
+        })
+        assert run is homework_module.main
+        assert homework_module.TELEGRAM_CHAT_ID == '7'
+        assert homework_module.api_client.headers == {
+            'Authorization': 'OAuth new-token'
+        }
+        config = homework_module.settings.current
+        assert (config.tenants_path, config.metrics_port) == (
+            'tenants.json', 9000
+        ), 'Настройки точек входа читаются в create_app, а не при импорте.'
+
+    def test_invalid_environment(self):
+        result = subprocess.run(
+            [sys.executable, '-c', 'import homework; homework.create_app()'],
+            cwd=BASE_DIR, capture_output=True,
+            text=True, env=dict(os.environ, PYTHONPATH=BASE_DIR,
+                                RETRY_PERIOD='abc'),
+        )
+        assert 'Traceback' not in result.stderr, (
+            'Некорректная настройка не должна ронять импорт.'
+        )
+        assert result.returncode == 1
+        assert 'RETRY_PERIOD' in result.stderr
+
+    def test_entry_points_share_tenants_check(self, monkeypatch,
+                                              homework_module):
+        monkeypatch.setattr(homework_module, 'settings',
+                            ConfigManager(Config))
+        with pytest.raises(SystemExit, match='TENANTS_PATH'):
+            homework_module.require_tenants()
+        monkeypatch.setattr(homework_module, 'settings', ConfigManager(
+            lambda: Config(tenants_path='tenants.json')
+        ))
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1:x')
+        assert homework_module.require_tenants() == 'tenants.json'
@@ -0,0 +1,51 @@
+import pytest
+
+from state_store import (JsonStateStore, MemoryStateStore, SQLiteStateStore,
+                         checkpoint_state, open_state_store, restore_state)
+from utils import FakeClock
+
+
+class TestStateStore:
+    @pytest.mark.parametrize('name', ['state.json', 'state.sqlite3'])
+    def test_state_survives_restart(self, tmp_path, name):
+        store = open_state_store(tmp_path / name)
+        state = restore_state(store, 'chat', now=100, next_poll=0)
+        assert state.timestamp == 100
+        state.timestamp = 200
+        state.homeworks.statuses['hw1'] = 'approved'
+        checkpoint_state(store, 'chat', state)
+        store.close()
+
+        store = open_state_store(tmp_path / name)
+        state = restore_state(store, 'chat', now=999, next_poll=0)
+        assert state.timestamp == 200, (
+            'Убедитесь, что после перезапуска опрос продолжается с '
+            'сохранённого `current_date`.'
+        )
+        assert state.homeworks.statuses == {'hw1': 'approved'}, (
+            'Убедитесь, что после перезапуска сохраняются статусы работ.'
+        )
+
+    def test_open_state_store_types(self, tmp_path):
+        assert isinstance(open_state_store(None), MemoryStateStore)
+        assert isinstance(open_state_store(tmp_path / 's.json'),
+                          JsonStateStore)
+        assert isinstance(open_state_store(tmp_path / 's.db'),
+                          SQLiteStateStore)
+
+    def test_writes_are_throttled(self, tmp_path):
+        clock = FakeClock(0)
+        path = tmp_path / 'state.json'
+        store = JsonStateStore(path, flush_interval=60, clock=clock)
+        store.update('chat', timestamp=1)
+        store.maybe_flush()
+        assert not path.exists(), (
+            'Состояние не должно записываться чаще flush_interval.'
+        )
+        clock.now = 60
+        store.update('chat', timestamp=2)
+        store.maybe_flush()
+        assert JsonStateStore(path).get('chat')['timestamp'] == 2
+        assert [p.name for p in tmp_path.iterdir()] == ['state.json'], (
+            'Временный файл должен заменять файл состояния через rename.'
+        )
@@ -0,0 +1,60 @@
+import json
+import sqlite3
+
+import pytest
+
+from tenants import Tenant, load_tenants
+
+
+class TestTenants:
+    ROWS = [
+        {'practicum_token': 'token-aaaa', 'chat_id': '1'},
+        {'practicum_token': 'token-bbbb', 'chat_id': '2',
+         'retry_period': 60},
+    ]
+
+    def test_load_json(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps(self.ROWS))
+        registry = load_tenants(path)
+        assert len(registry) == 2
+        tenant = registry[Tenant('token-bbbb', '2').key]
+        assert tenant == Tenant('token-bbbb', '2', 60)
+        assert tenant.headers == {'Authorization': 'OAuth token-bbbb'}
+
+    def test_load_sqlite(self, tmp_path):
+        path = tmp_path / 'tenants.db'
+        connection = sqlite3.connect(path)
+        connection.execute('CREATE TABLE tenants '
+                           '(practicum_token, chat_id, retry_period)')
+        connection.executemany(
+            'INSERT INTO tenants VALUES (?, ?, ?)',
+            [(row['practicum_token'], row['chat_id'],
+              row.get('retry_period')) for row in self.ROWS]
+        )
+        connection.commit()
+        connection.close()
+        registry = load_tenants(path)
+        assert sorted(registry) == sorted(
+            Tenant(row['practicum_token'], row['chat_id']).key
+            for row in self.ROWS
+        )
+
+    def test_key_hides_token(self):
+        first = Tenant('first-token-abcd', '1')
+        second = Tenant('second-token-abcd', '1')
+        assert first.key != second.key, (
+            'Токены одного чата с одинаковым окончанием '
+            'не должны давать один ключ.'
+        )
+        assert first.key == Tenant('first-token-abcd', '1', 60).key
+        assert 'abcd' not in first.key + repr(first), (
+            'Токен не должен попадать в ключ и repr тенанта.'
+        )
+
+    def test_incomplete_tenant(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'practicum_token': '',
+                                     'chat_id': '1'}]))
+        with pytest.raises(KeyError):
+            load_tenants(path)
@@ -0,0 +1,107 @@
+import json
+import timeit
+
+import pytest
+
+import validation
+from validation import HomeworkRecord, ResponseValidator
+
+VERDICTS = {
+    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
+    'reviewing': 'Работа взята на проверку ревьюером.',
+    'rejected': 'Работа проверена: у ревьюера есть замечания.',
+}
+
+
+def legacy_check_response(response):
+    if not isinstance(response, dict):
+        raise TypeError('Ответ API не является словарём')
+    if 'current_date' in response and 'homeworks' in response:
+        homeworks = response['homeworks']
+        if not isinstance(homeworks, list):
+            raise TypeError('В ответе API homeworks не является списком')
+        return homeworks, response['current_date']
+    raise KeyError('Содержание ответа от API не соответствует ожидаемому.')
+
+
+def legacy_parse_status(homework):
+    if 'homework_name' in homework and 'status' in homework:
+        try:
+            verdict = VERDICTS[homework['status']]
+        except KeyError:
+            raise KeyError('Hеожиданный статус домашней работы')
+        return ('Изменился статус проверки '
+                f'работы "{homework["homework_name"]}". {verdict}')
+    raise KeyError('Не найден необходимый ключ в ответе API.')
+
+
+def sample_body(count):
+    statuses = list(VERDICTS)
+    return json.dumps({
+        'homeworks': [
+            {'id': number, 'homework_name': f'user__hw{number}.zip',
+             'status': statuses[number % len(statuses)],
+             'reviewer_comment': 'Всё хорошо.', 'lesson_name': 'Итоговый'}
+            for number in range(count)
+        ],
+        'current_date': 1581604970,
+    }).encode('utf-8')
+
+
+class TestResponseValidator:
+    validator = ResponseValidator(VERDICTS)
+
+    def test_records_and_messages_match_legacy(self):
+        response = json.loads(sample_body(5))
+        records, current_date = self.validator.validate(response)
+        homeworks, timestamp = legacy_check_response(response)
+        assert current_date == timestamp
+        assert all(isinstance(record, HomeworkRecord) for record in records)
+        assert [record.key for record in records] == [
+            str(homework['id']) for homework in homeworks
+        ]
+        assert [self.validator.message(record) for record in records] == [
+            legacy_parse_status(homework) for homework in homeworks
+        ], 'Сообщения должны совпадать с прежней реализацией.'
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({'homeworks': []}, KeyError),
+        ({'current_date': 0}, KeyError),
+        ({'homeworks': {}, 'current_date': 0}, TypeError),
+        ({'homeworks': [{'status': 'approved'}], 'current_date': 0},
+         KeyError),
+        ({'homeworks': ['hw'], 'current_date': 0}, KeyError),
+    ])
+    def test_errors_match_legacy(self, response, error):
+        with pytest.raises(error):
+            self.validator.validate(response)
+
+    def test_unknown_status(self):
+        record = self.validator.record(
+            {'homework_name': 'hw', 'status': 'unknown'}
+        )
+        with pytest.raises(KeyError):
+            self.validator.message(record)
+
+    def test_microbenchmark(self):
+        body = sample_body(50)
+
+        def legacy():
+            homeworks, _ = legacy_check_response(json.loads(body))
+            return [legacy_parse_status(homework) for homework in homeworks]
+
+        def one_pass():
+            records, _ = self.validator.validate(validation.loads(body))
+            return [self.validator.message(record) for record in records]
+
+        assert legacy() == one_pass(), (
+            'Результат проверки должен совпадать с прежним.'
+        )
+        # Замер только выводится: разница в пределах шума и зависит от
+        # того, установлен ли orjson.
+        legacy_time = min(timeit.repeat(legacy, number=200, repeat=3))
+        one_pass_time = min(timeit.repeat(one_pass, number=200, repeat=3))
+        print(f'legacy {legacy_time:.4f} s, '
+              f'validator {one_pass_time:.4f} s, '
+              f'json backend {validation.loads.__module__}')
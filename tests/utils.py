@@ -79,6 +79,7 @@ class MockResponseGET:
                  http_status=HTTPStatus.OK, **kwargs):
         self.random_timestamp = random_timestamp
         self.status_code = http_status
+        self.headers = {}
         self.reason = ''
         self.text = ''
         logging.warn(MockResponseGET.CALLED_LOG_MSG)
@@ -101,5 +102,18 @@ class MockTelegramBot:
         self.text = text
 
 
+class FakeClock:
+    """Ручные часы для тестов: время идёт только через sleep и now."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
 class BreakInfiniteLoop(Exception):
     pass
@@ -0,0 +1,78 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+loads = json.loads if orjson is None else orjson.loads
+
+MESSAGE_PREFIX = 'Изменился статус проверки работы "'
+
+
+class HomeworkRecord:
+    """Проверенная запись о домашней работе из ответа API."""
+
+    __slots__ = ('key', 'name', 'status')
+
+    def __init__(self, key, name, status):
+        """Ключ работы, её название и статус."""
+        self.key = key
+        self.name = name
+        self.status = status
+
+    def __repr__(self):
+        """Представление для отладки."""
+        return f'HomeworkRecord({self.key!r}, {self.name!r}, {self.status!r})'
+
+
+class ResponseValidator:
+    """Проверка ответа API, собранная один раз из словаря вердиктов.
+
+    Ответ проверяется за один проход: каждая работа сразу превращается
+    в HomeworkRecord, а окончания сообщений для всех статусов
+    подготовлены заранее. Ошибки те же, что у исходных проверок:
+    TypeError для неверных типов и KeyError для отсутствующих ключей
+    и неизвестных статусов.
+    """
+
+    def __init__(self, verdicts):
+        """Готовим окончания сообщений для каждого статуса."""
+        self.suffixes = {
+            status: f'". {verdict}' for status, verdict in verdicts.items()
+        }
+
+    @staticmethod
+    def record(homework):
+        """Запись о работе из словаря ответа API."""
+        try:
+            name = homework['homework_name']
+            status = homework['status']
+        except (KeyError, TypeError):
+            raise KeyError('Не найден необходимый ключ в ответе API.')
+        key = homework.get('id', name)
+        return HomeworkRecord(key if type(key) is str else str(key),
+                              name, status)
+
+    def validate(self, response):
+        """Список записей о работах и current_date из ответа API."""
+        if not isinstance(response, dict):
+            raise TypeError('Ответ API не является словарём')
+        try:
+            homeworks = response['homeworks']
+            current_date = response['current_date']
+        except KeyError:
+            raise KeyError('Содержание ответа от API не '
+                           'соответствует ожидаемому.')
+        if not isinstance(homeworks, list):
+            raise TypeError('В ответе API homeworks не является списком')
+        record = self.record
+        return [record(homework) for homework in homeworks], current_date
+
+    def message(self, record):
+        """Текст уведомления об изменении статуса работы."""
+        suffix = self.suffixes.get(record.status)
+        if suffix is None:
+            raise KeyError('Hеожиданный статус домашней '
+                           f'работы, {record.status}')
+        return f'{MESSAGE_PREFIX}{record.name}{suffix}'